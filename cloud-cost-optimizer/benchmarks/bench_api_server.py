@@ -0,0 +1,124 @@
+"""
+Load-tests the HTTP API against the local stub LLM: throughput, latency
+percentiles and how many upstream LLM calls request coalescing saved.
+
+Usage:
+    python benchmarks/bench_api_server.py [requests] [clients] [distinct_projects] [latency_seconds]
+
+Defaults to 400 /v1/report requests from 32 concurrent clients over 8
+distinct projects with 0.2 s of stub latency. The response cache is
+bypassed, so every upstream call saved comes from coalescing.
+"""
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("LLM_CACHE_BYPASS", "1")
+os.environ.setdefault("RECOMMENDATION_SOURCE", "hybrid")
+
+from modules.api_server import ApiServer, OptimizerService
+from modules.llm_client import LLMClient, set_client
+from modules.llm_stub import StubLLMServer
+from modules.metrics import get_metrics
+
+
+def stub_responder(payload):
+    prompt = payload["messages"][-1]["content"]
+    if "Cloud Billing Simulator" in prompt:
+        return json.dumps([
+            {"month": "2025-01", "service": service, "resource_id": f"{service.lower()}-1",
+             "region": "ap-south-1", "usage_type": "On-Demand", "usage_quantity": "720",
+             "unit": "Hrs", "cost_inr": cost, "desc": service}
+            for service, cost in (("EC2", "1,800"), ("RDS", 1200), ("S3", "₹300"))
+        ])
+    if "rules engine produced" in prompt:
+        return json.dumps([{"id": 0, "description": "Stub enrichment", "steps": ["Do it"]}])
+    return json.dumps({"name": "Stub Project", "budget_inr_per_month": 3000,
+                       "tech_stack": {"backend": "Node.js", "database": "PostgreSQL"},
+                       "non_functional_requirements": ["low latency"]})
+
+
+def start_api(workers):
+    """
+    Runs the API server on its own event loop thread; returns (server, loop).
+    """
+    ready = threading.Event()
+    loop = asyncio.new_event_loop()
+    server = ApiServer(OptimizerService(workers=workers), port=0)
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+    return server, loop
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    projects = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    latency = float(sys.argv[4]) if len(sys.argv) > 4 else 0.2
+
+    with StubLLMServer(responder=stub_responder, latency=latency) as stub:
+        set_client(LLMClient(api_url=stub.url, api_token="stub", max_concurrency=16))
+        server, loop = start_api(workers=16)
+        local = threading.local()
+
+        def call(i):
+            session = getattr(local, "session", None) or requests.Session()
+            local.session = session
+            body = {"description": f"Project {i % projects}: a Node.js API on PostgreSQL."}
+            start = time.perf_counter()
+            response = session.post(f"{server.url}/v1/report", json=body, timeout=60)
+            elapsed = time.perf_counter() - start
+            return response.status_code, elapsed
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            results = list(pool.map(call, range(count)))
+        wall = time.perf_counter() - start
+
+        latencies = [elapsed for _, elapsed in results]
+        failures = sum(1 for status, _ in results if status != 200)
+        coalesced = sum(c["value"] for c in get_metrics().snapshot()["counters"]
+                        if c["name"] in ("api_coalesced_total", "llm_coalesced_total"))
+        print(f"{count} requests, {clients} clients, {projects} distinct projects, "
+              f"{latency}s LLM latency")
+        print(f"throughput {count / wall:.1f} req/s, p50 {percentile(latencies, 0.5) * 1000:.0f} ms, "
+              f"p99 {percentile(latencies, 0.99) * 1000:.0f} ms, failures {failures}")
+        # Each uncoalesced report costs 3 LLM calls (profile, billing, enrichment)
+        print(f"upstream LLM calls {stub.request_count} (uncoalesced: {count * 3}), "
+              f"coalesced requests {coalesced}")
+
+        # Background job round trip
+        session = requests.Session()
+        job = session.post(f"{server.url}/v1/jobs", json={"task": "analysis",
+                           "description": "Job project: a Node.js API."}).json()
+        while job["status"] in ("queued", "running"):
+            time.sleep(0.05)
+            job = session.get(f"{server.url}/v1/jobs/{job['id']}").json()
+        print(f"job {job['task']}: {job['status']} in {job['seconds']}s")
+
+        asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+
+if __name__ == "__main__":
+    main()
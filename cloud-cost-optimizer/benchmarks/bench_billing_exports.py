@@ -0,0 +1,109 @@
+"""
+Times streaming ingestion of provider billing exports: one gzipped AWS CUR,
+GCP and Azure CSV per month, imported into a billing store with one process
+and with a process per CPU, then analyzed straight from the files.
+
+Usage:
+    python benchmarks/bench_billing_exports.py [rows_per_file] [months]
+
+Defaults to 200k rows per file x 3 months (1.8M rows across 9 files).
+"""
+import csv
+import gzip
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.billing_exports import BillingExports, import_exports
+from modules.billing_store import BillingStore
+from modules.cost_analyzer import analyze_costs
+
+PROFILE = {"name": "Export benchmark", "budget_inr_per_month": 500000}
+# provider -> (header, row(random, index, month))
+EXPORTS = {
+    "aws": (
+        ["identity/LineItemId", "lineItem/UsageStartDate", "lineItem/ProductCode", "product/region",
+         "lineItem/ResourceId", "lineItem/UsageType", "lineItem/UsageAmount", "pricing/unit",
+         "lineItem/UnblendedCost", "lineItem/CurrencyCode"],
+        lambda r, i, month: [
+            i, f"{month}-{r.randint(10, 28)}T00:00:00Z", r.choice(("AmazonEC2", "AmazonRDS", "AmazonS3")),
+            "ap-south-1", f"i-{i % 5000:05d}", r.choice(("BoxUsage:m5.large", "EBS:VolumeUsage.gp3")),
+            round(r.random() * 24, 4), "Hrs", round(r.random() * 3, 6), "USD"],
+    ),
+    "gcp": (
+        ["billing_account_id", "service.description", "sku.description", "usage_start_time",
+         "location.region", "cost", "currency", "usage.amount", "usage.unit", "project.id"],
+        lambda r, i, month: [
+            "0000-AAAA", r.choice(("Compute Engine", "Cloud SQL", "Cloud Storage")), "N2 Instance Core",
+            f"{month}-{r.randint(10, 28)} 00:00:00 UTC", "asia-south1", round(r.random() * 3, 6), "USD",
+            round(r.random() * 24, 4), "hour", f"project-{i % 50}"],
+    ),
+    "azure": (
+        ["Date", "MeterCategory", "MeterSubCategory", "ResourceLocation", "ResourceId", "Quantity",
+         "UnitOfMeasure", "CostInBillingCurrency", "BillingCurrency"],
+        lambda r, i, month: [
+            f"{month[5:]}/{r.randint(10, 28)}/{month[:4]}", r.choice(("Virtual Machines", "Storage")),
+            "D2s v3", "centralindia", f"/subscriptions/s/vm{i % 5000}", round(r.random() * 24, 4),
+            "1 Hour", round(r.random() * 250, 4), "INR"],
+    ),
+}
+
+
+def write_exports(directory, rows, months):
+    paths = []
+    r = random.Random(7)
+    for provider, (header, row) in EXPORTS.items():
+        for m in range(1, months + 1):
+            month = f"2025-{m:02d}"
+            path = os.path.join(directory, f"{provider}-{month}.csv.gz")
+            with gzip.open(path, "wt", newline="", encoding="utf-8", compresslevel=1) as f:
+                writer = csv.writer(f)
+                writer.writerow(header)
+                writer.writerows(row(r, i, month) for i in range(rows))
+            paths.append(path)
+    return paths
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    months = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    directory = tempfile.mkdtemp(prefix="bench-exports-")
+    try:
+        start = time.perf_counter()
+        paths = write_exports(directory, rows, months)
+        size = sum(os.path.getsize(p) for p in paths)
+        total = rows * len(paths)
+        print(f"wrote {len(paths)} files, {total:,} rows, {size / 2**20:.1f} MB gzipped "
+              f"in {time.perf_counter() - start:.1f}s")
+
+        for workers in sorted({1, os.cpu_count() or 1}):
+            store_dir = os.path.join(directory, f"store-{workers}")
+            start = time.perf_counter()
+            imported = import_exports(paths, BillingStore(store_dir), workers=workers)
+            elapsed = time.perf_counter() - start
+            assert sum(imported.values()) == total, imported
+            print(f"import, {workers:>2} worker(s): {elapsed:6.2f}s  {total / elapsed:>10,.0f} rows/s")
+
+        start = time.perf_counter()
+        analysis = analyze_costs(PROFILE, BillingExports(paths))
+        elapsed = time.perf_counter() - start
+        # Separate traced run: tracing slows the parsing down several times
+        tracemalloc.start()
+        analyze_costs(PROFILE, BillingExports(paths[:1]))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"analyze from exports:   {elapsed:6.2f}s  {total / elapsed:>10,.0f} rows/s  "
+              f"{len(analysis['monthly_costs'])} months, peak {peak / 2**20:.1f} MB for one file")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
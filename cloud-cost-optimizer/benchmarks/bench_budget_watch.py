@@ -0,0 +1,77 @@
+"""
+Times the budget watcher's incremental update against a full re-analysis:
+a billing CSV with a large history gets small appends, and each append is
+either polled by BudgetWatcher or analyzed from scratch.
+
+Usage:
+    python benchmarks/bench_budget_watch.py [history_rows] [append_rows] [appends]
+
+Defaults to 500k history rows and 10 appends of 1000 rows.
+"""
+import csv
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.billing_exports import BillingExports
+from modules.budget_watch import BudgetWatcher
+from modules.cost_analyzer import analyze_costs
+from modules.synthetic_billing import BILLING_FIELDS
+
+PROFILE = {"name": "Watch benchmark", "budget_inr_per_month": 2_000_000, "tech_stack": {}}
+SERVICES = ("EC2", "RDS", "S3", "CloudFront", "ElastiCache")
+
+
+def write_rows(path, start, count, month):
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        if not start:
+            writer.writerow(BILLING_FIELDS)
+        for i in range(start, start + count):
+            row = {"month": month, "service": SERVICES[i % len(SERVICES)], "region": "ap-south-1",
+                   "resource_id": f"r-{i % 2000}", "usage_type": "BoxUsage", "usage_quantity": 24,
+                   "unit": "hour", "cost_inr": 1 + i % 7, "desc": ""}
+            writer.writerow([row.get(field, "") for field in BILLING_FIELDS])
+
+
+def main():
+    history = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    append = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    appends = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+
+    directory = tempfile.mkdtemp(prefix="bench-watch-")
+    path = os.path.join(directory, "billing.csv")
+    try:
+        write_rows(path, 0, history, "2025-02")
+        watcher = BudgetWatcher(PROFILE, directory, sinks=(), recommend=lambda *args: [])
+        start = time.perf_counter()
+        watcher.poll()
+        print(f"initial scan of {history:,} rows: {time.perf_counter() - start:.2f}s")
+
+        polls, full = [], []
+        rows = history
+        for _ in range(appends):
+            write_rows(path, rows, append, "2025-03")
+            rows += append
+            start = time.perf_counter()
+            watcher.poll()
+            polls.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            analysis = analyze_costs(PROFILE, BillingExports([path]))
+            full.append(time.perf_counter() - start)
+            assert abs(analysis["total_monthly_cost"] - watcher.analysis["total_monthly_cost"]) < 1e-6
+
+        poll, recompute = statistics.median(polls), statistics.median(full)
+        print(f"append of {append:,} rows, median of {appends}: poll {poll * 1000:.1f}ms, "
+              f"full re-analysis {recompute * 1000:.1f}ms ({recompute / poll:.0f}x)")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
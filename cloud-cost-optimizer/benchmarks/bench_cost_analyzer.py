@@ -0,0 +1,109 @@
+"""
+Compares the streaming CostAggregator behind analyze_costs with the original
+per-record dict loop: the totals-only fast path (trends=False) computes the
+same figures as the loop, the default path adds the monthly trends.
+
+Usage:
+    python benchmarks/bench_cost_analyzer.py [rows ...]
+
+Defaults to 10k, 1M and 10M rows. Rows are produced by repeating one
+pre-built chunk so generation cost and memory stay out of the measurement.
+"""
+import os
+import sys
+import time
+from itertools import repeat
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.cost_analyzer import analyze_cost_batches
+
+DEFAULT_SIZES = [10_000, 1_000_000, 10_000_000]
+CHUNK_SIZE = 50_000
+
+SERVICES = ["EC2", "RDS", "S3", "CloudFront", "Lambda", "EBS", "NAT Gateway", "MongoDB"]
+REGIONS = ["ap-south-1", "us-east-1", "eu-west-1", "ap-southeast-1"]
+
+
+def build_chunk(size):
+    chunk = []
+    for i in range(size):
+        chunk.append({
+            "month": f"2025-{(i % 12) + 1:02d}",
+            "service": SERVICES[i % len(SERVICES)],
+            "resource_id": f"res-{i % 5000}",
+            "region": REGIONS[i % len(REGIONS)],
+            "usage_type": "On-Demand",
+            "usage_quantity": 1,
+            "unit": "hour",
+            "cost_inr": (i * 7) % 500,
+            "desc": "benchmark record",
+        })
+    return chunk
+
+
+def legacy_analyze(profile, billing_data):
+    """
+    The original analyze_costs loop, kept verbatim for comparison.
+    """
+    budget = profile.get('budget_inr_per_month', 0)
+    total_cost = 0
+    service_costs = {}
+
+    for record in billing_data:
+        cost = record.get('cost_inr', 0)
+        service = record.get('service', 'Other')
+
+        total_cost += cost
+        service_costs[service] = service_costs.get(service, 0) + cost
+
+    sorted_services = sorted(service_costs.items(), key=lambda x: x[1], reverse=True)
+    return {
+        "total_monthly_cost": total_cost,
+        "budget": budget,
+        "budget_variance": total_cost - budget,
+        "service_costs": service_costs,
+        "high_cost_services": {k: v for k, v in sorted_services[:3]},
+        "is_over_budget": total_cost > budget
+    }
+
+
+def batches_for(rows, chunk):
+    full, rest = divmod(rows, len(chunk))
+    yield from repeat(chunk, full)
+    if rest:
+        yield chunk[:rest]
+
+
+def records_for(rows, chunk):
+    for batch in batches_for(rows, chunk):
+        yield from batch
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    profile = {"name": "benchmark", "budget_inr_per_month": 5000}
+    chunk = build_chunk(CHUNK_SIZE)
+
+    print(f"{'rows':>12} {'legacy (s)':>12} {'totals (s)':>12} {'rows/s':>12} {'trends (s)':>12}")
+    for rows in sizes:
+        start = time.perf_counter()
+        expected = legacy_analyze(profile, records_for(rows, chunk))
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = analyze_cost_batches(profile, batches_for(rows, chunk), trends=False)
+        totals_time = time.perf_counter() - start
+        assert result == expected, "engine output differs from legacy loop"
+
+        # Monthly trends, anomalies and forecast on top (service x month cells)
+        start = time.perf_counter()
+        result = analyze_cost_batches(profile, batches_for(rows, chunk))
+        trends_time = time.perf_counter() - start
+        assert {key: result[key] for key in expected} == expected
+
+        print(f"{rows:>12,} {legacy_time:>12.3f} {totals_time:>12.3f} {rows / totals_time:>12,.0f} "
+              f"{trends_time:>12.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Fuzz and benchmark suite for the JSON extractor behind extract_json_from_text.
+
+Usage:
+    python benchmarks/bench_json_extract.py [fuzz_cases]
+
+1. Corpus: every response in json_corpus.jsonl is run through the
+   original regex/find extractor and the new scanner, with the schema each
+   prompt expects. The corpus is synthetic: hand-written profile, billing
+   and recommendation replies covering the defects seen in model output
+   (fences, prose with braces, single quotes, trailing commas, truncation),
+   not captured model responses.
+2. Fuzz: seeded random corruptions of the valid corpus entries. The new
+   extractor must never raise and must only return schema-valid values.
+3. Timing: per-call time on the corpus and on a ~1.6 MB billing response (whole and truncated).
+"""
+import json
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.json_extract import extract_json, validate_json
+
+CORPUS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "json_corpus.jsonl")
+DEFAULT_FUZZ_CASES = 2000
+PROSE = ["Here is the JSON:", "Note: {values} are estimates.", "Hope this helps!",
+         "Sure, see below [1].", "```", "Output:\n"]
+
+
+def legacy_extract(text):
+    """
+    The extractor before the scanner, kept for comparison.
+    """
+    match = re.search(r"```(?:json)?\s*(.*?)\s*```", text, re.DOTALL)
+    if match:
+        json_str = match.group(1)
+    else:
+        start_obj = text.find('{')
+        start_list = text.find('[')
+        starts = [s for s in (start_obj, start_list) if s != -1]
+        if not starts:
+            return None
+        start = min(starts)
+        end = max(text.rfind('}'), text.rfind(']'))
+        if end == -1 or end < start:
+            return None
+        json_str = text[start:end + 1]
+    try:
+        return json.loads(json_str)
+    except json.JSONDecodeError:
+        return None
+
+
+def load_corpus():
+    with open(CORPUS_FILE, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def is_valid(value, schema):
+    return value is not None and validate_json(value, schema) is not None
+
+
+def mutate(text, rng):
+    kind = rng.randrange(6)
+    if kind == 0:
+        return text[:rng.randrange(1, len(text))]
+    if kind == 1:
+        return f"{rng.choice(PROSE)}\n{text}\n{rng.choice(PROSE)}"
+    if kind == 2:
+        return re.sub(r"(\]|\})", lambda m: (",\n" if rng.random() < 0.3 else "") + m.group(1), text)
+    if kind == 3:
+        return text.replace('"', "'")
+    if kind == 4:
+        cut = rng.randrange(len(text))
+        return text[:cut] + rng.choice(["// note\n", "/* c */", "\n"]) + text[cut:]
+    return text.replace("true", "True").replace("null", "None")
+
+
+def run_corpus(corpus):
+    print(f"{'synthetic corpus entry':<44} {'legacy':>7} {'new':>5}")
+    legacy_ok = new_ok = 0
+    for entry in corpus:
+        schema = entry["schema"]
+        old = is_valid(legacy_extract(entry["text"]), schema)
+        new = extract_json(entry["text"], schema=schema) is not None
+        legacy_ok += old
+        new_ok += new
+        print(f"{entry['name']:<44} {'ok' if old else '-':>7} {'ok' if new else '-':>5}")
+    print(f"{'total':<44} {legacy_ok:>7} {new_ok:>5}  (of {len(corpus)})\n")
+
+
+def run_fuzz(corpus, cases):
+    rng = random.Random(1234)
+    seeds = [e for e in corpus if extract_json(e["text"], schema=e["schema"]) is not None]
+    legacy_ok = new_ok = 0
+    for _ in range(cases):
+        entry = rng.choice(seeds)
+        text = mutate(entry["text"], rng)
+        try:
+            value = extract_json(text, schema=entry["schema"])
+        except Exception as e:
+            raise AssertionError(f"extractor raised {e!r} on mutated {entry['name']}: {text!r}")
+        if value is not None:
+            assert validate_json(value, entry["schema"]) is not None, f"invalid value for {text!r}"
+            new_ok += 1
+        legacy_ok += is_valid(legacy_extract(text), entry["schema"])
+    print(f"fuzz: {cases} mutated responses, recovered legacy {legacy_ok} / new {new_ok}, no exceptions\n")
+
+
+def time_calls(func, texts, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            func(text)
+    return (time.perf_counter() - start) / (repeat * len(texts)) * 1e6
+
+
+def run_timing(corpus):
+    texts = [e["text"] for e in corpus]
+    print(f"corpus: legacy {time_calls(legacy_extract, texts, 200):.1f} us/call, "
+          f"new {time_calls(extract_json, texts, 200):.1f} us/call")
+
+    record = json.loads(next(e["text"] for e in corpus if e["name"] == "billing_compact"))[0]
+    big = "Here are the records:\n```json\n" + json.dumps([record] * 6000, indent=2) + "\n```\nDone {ok}."
+    print(f"{len(big) / 1e6:.1f} MB billing response: legacy {time_calls(legacy_extract, [big], 5) / 1000:.1f} ms, "
+          f"new {time_calls(extract_json, [big], 5) / 1000:.1f} ms")
+    truncated = big[:len(big) - 200]
+    print(f"same, truncated: legacy {time_calls(legacy_extract, [truncated], 5) / 1000:.1f} ms "
+          f"(result {legacy_extract(truncated) is not None}), "
+          f"new {time_calls(extract_json, [truncated], 5) / 1000:.1f} ms "
+          f"(result {extract_json(truncated) is not None})")
+
+
+def main():
+    cases = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_FUZZ_CASES
+    corpus = load_corpus()
+    run_corpus(corpus)
+    run_fuzz(corpus, cases)
+    run_timing(corpus)
+
+
+if __name__ == "__main__":
+    main()
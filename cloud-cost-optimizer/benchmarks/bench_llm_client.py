@@ -0,0 +1,65 @@
+"""
+Exercises LLMClient against the local stub server: sequential vs concurrent
+profile extraction, plus 429 Retry-After handling.
+
+Usage:
+    python benchmarks/bench_llm_client.py [requests] [latency_seconds]
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("LLM_CACHE_BYPASS", "1")
+
+from modules.llm_client import LLMClient, set_client
+from modules.llm_stub import StubLLMServer
+from modules.profile_extractor import extract_project_profile, aextract_project_profiles
+
+
+def profile_responder(payload):
+    return "```json\n" + json.dumps({
+        "name": "Stub Project",
+        "budget_inr_per_month": "4000",
+        "description": "stub",
+        "tech_stack": {"backend": "Node.js", "database": "MongoDB"},
+        "non_functional_requirements": ["low latency"],
+    }) + "\n```"
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    descriptions = [f"Project {i}: a Node.js API with MongoDB." for i in range(count)]
+
+    with StubLLMServer(responder=profile_responder, latency=latency) as stub:
+        client = LLMClient(api_url=stub.url, api_token="stub", max_concurrency=8, backoff_base=0.05)
+        set_client(client)
+
+        start = time.perf_counter()
+        sequential = [extract_project_profile(d) for d in descriptions]
+        sequential_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        concurrent = asyncio.run(aextract_project_profiles(descriptions))
+        concurrent_time = time.perf_counter() - start
+
+        assert sequential == concurrent and all(p["budget_inr_per_month"] == 4000 for p in concurrent)
+        print(f"{count} profiles @ {latency}s latency: sequential {sequential_time:.2f}s, "
+              f"concurrent (limit {client.max_concurrency}) {concurrent_time:.2f}s")
+
+    with StubLLMServer(responder=profile_responder, rate_limit_every=2, retry_after=0.05) as stub:
+        client = LLMClient(api_url=stub.url, api_token="stub", retries=3)
+        set_client(client)
+        profiles = asyncio.run(aextract_project_profiles(descriptions[:4]))
+        assert all(profiles), "rate-limited requests were not retried"
+        print(f"429 handling: {stub.rate_limited_count} rate-limited responses retried, "
+              f"{stub.request_count} requests total")
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
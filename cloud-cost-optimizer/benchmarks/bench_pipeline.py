@@ -0,0 +1,103 @@
+"""
+End-to-end benchmark of extract_project_profile -> generate_synthetic_billing
+-> analyze_costs -> generate_recommendations against the offline LLM, at
+several billing sizes. Needs no network or API token.
+
+Usage:
+    python benchmarks/bench_pipeline.py [repeats] [latency_seconds] [concurrent_projects]
+
+Defaults to 3 repeats, no simulated LLM latency and 16 concurrent projects.
+Per stage it prints the median wall time and the peak traced memory (from a
+separate traced run, since tracing slows the code down), then the throughput
+of whole pipelines run from a thread pool.
+"""
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Every run must reach the stand-in rather than the response cache
+os.environ.setdefault("LLM_CACHE_BYPASS", "1")
+os.environ.setdefault("RECOMMENDATION_SOURCE", "hybrid")
+
+from modules.billing_generator import generate_synthetic_billing
+from modules.cost_analyzer import analyze_costs
+from modules.llm_client import set_client
+from modules.llm_offline import OfflineLLM
+from modules.profile_extractor import extract_project_profile
+from modules.recommendation_engine import generate_recommendations
+
+# name -> (billing months, resources) generated by the billing fixture
+SCALES = {"small": (3, 5), "medium": (12, 100), "large": (24, 1000)}
+STAGES = ("profile", "billing", "analysis", "recommendations")
+DESCRIPTION = ("Project {n}: a React storefront with a Node.js API on PostgreSQL, Redis "
+               "and S3 behind Nginx on AWS. Budget ₹{budget} per month; needs high availability.")
+
+
+def run_pipeline(n, timings=None, memory=None):
+    """
+    Runs the four stages for project n; fills {stage: seconds} / {stage: peak bytes}.
+    """
+    values = {}
+    steps = (
+        ("profile", lambda: extract_project_profile(DESCRIPTION.format(n=n, budget=20000 + n * 500))),
+        ("billing", lambda: generate_synthetic_billing(values["profile"])),
+        ("analysis", lambda: analyze_costs(values["profile"], values["billing"])),
+        ("recommendations", lambda: generate_recommendations(values["profile"], values["analysis"],
+                                                             values["billing"])),
+    )
+    for stage, step in steps:
+        if memory is not None:
+            tracemalloc.start()
+        start = time.perf_counter()
+        values[stage] = step()
+        if timings is not None:
+            timings[stage] = time.perf_counter() - start
+        if memory is not None:
+            memory[stage] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        if not values[stage]:
+            raise RuntimeError(f"{stage} stage returned nothing")
+    return values
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+    projects = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+
+    print(f"offline LLM, {latency}s latency per request, median of {repeats} runs")
+    print(f"{'scale':<8} {'records':>8} " + " ".join(f"{s:>16}" for s in STAGES)
+          + f" {'total':>9} {'records/s':>10}")
+    for scale, (months, resources) in SCALES.items():
+        llm = OfflineLLM(latency=latency, billing_months=months, billing_resources=resources)
+        set_client(llm)
+
+        runs = []
+        for i in range(repeats):
+            timings = {}
+            values = run_pipeline(i, timings=timings)
+            runs.append(timings)
+        memory = {}
+        run_pipeline(repeats, memory=memory)
+
+        medians = {stage: statistics.median(run[stage] for run in runs) for stage in STAGES}
+        total = sum(medians.values())
+        records = len(values["billing"])
+        cells = " ".join(f"{medians[s] * 1000:>7.1f}ms {memory[s] / 2**20:>5.1f}MB" for s in STAGES)
+        print(f"{scale:<8} {records:>8,} {cells} {total:>8.3f}s {records / total:>10,.0f}")
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=projects) as pool:
+            list(pool.map(run_pipeline, range(100, 100 + projects)))
+        wall = time.perf_counter() - start
+        print(f"{'':<8} {projects} concurrent projects: {projects / wall:.2f} pipelines/s, "
+              f"{llm.request_count} LLM requests")
+
+
+if __name__ == "__main__":
+    main()
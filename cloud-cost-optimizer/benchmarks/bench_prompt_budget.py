@@ -0,0 +1,70 @@
+"""
+Shows how the recommendation prompt grows with the number of services,
+before and after token budgeting.
+
+Usage:
+    python benchmarks/bench_prompt_budget.py [services ...]
+
+Defaults to 5, 50, 500 and 5000 services. Token counts are the local
+estimate from modules/prompt_budget.py, not a real tokenizer.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.metrics import get_metrics
+from modules.prompt_budget import estimate_tokens
+from modules.recommendation_engine import _recommendation_messages
+
+DEFAULT_SIZES = [5, 50, 500, 5000]
+
+
+def build_inputs(services):
+    rng = random.Random(services)
+    profile = {
+        "name": "Prompt budget benchmark",
+        "tech_stack": {f"component_{i}": f"technology-{i}" for i in range(min(services, 40))},
+        "non_functional_requirements": ["high availability", "low latency", "GDPR compliance"],
+    }
+    # Pareto-distributed costs: a few large services and a long tail
+    service_costs = {f"service-{i:05d}": round(rng.paretovariate(1.2) * 100, 2) for i in range(services)}
+    total = sum(service_costs.values())
+    analysis = {
+        "total_monthly_cost": total,
+        "budget": 5000,
+        "budget_variance": total - 5000,
+        "service_costs": service_costs,
+    }
+    return profile, analysis
+
+
+def saved_tokens():
+    for counter in get_metrics().snapshot()["counters"]:
+        if counter["name"] == "prompt_tokens_saved_total":
+            return counter["value"]
+    return 0
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+
+    print(f"{'services':>10} {'naive tokens':>14} {'budgeted':>10} {'build (ms)':>12}")
+    for services in sizes:
+        profile, analysis = build_inputs(services)
+        get_metrics().reset()
+
+        start = time.perf_counter()
+        messages = _recommendation_messages(profile, analysis)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        tokens = estimate_tokens(messages[0]["content"])
+        # Without budgeting the prompt would be this much larger
+        naive = tokens + saved_tokens()
+        print(f"{services:>10,} {naive:>14,} {tokens:>10,} {elapsed:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
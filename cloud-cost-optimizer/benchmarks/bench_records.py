@@ -0,0 +1,78 @@
+"""
+Measures bulk billing validation and the memory of a validated BillingBatch
+against the same records kept as dicts.
+
+Usage:
+    python benchmarks/bench_records.py [rows ...]
+
+Defaults to 10k, 100k and 1M rows. A tenth of the costs are strings like
+"1,200" and a tenth of the units need normalizing, as in LLM output.
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.records import validate_billing
+from modules.cost_analyzer import analyze_costs
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+SERVICES = ["EC2", "RDS", "S3", "CloudFront", "Lambda", "EBS", "NAT Gateway", "MongoDB"]
+REGIONS = ["ap-south-1", "us-east-1", "eu-west-1", "ap-southeast-1"]
+
+
+def build_records(size):
+    records = []
+    for i in range(size):
+        cost = (i * 7) % 500
+        records.append({
+            "month": f"2025-{(i % 12) + 1:02d}",
+            # Built per record so the strings are not already shared
+            "service": "".join(SERVICES[i % len(SERVICES)]),
+            "resource_id": f"res-{i % 5000}",
+            "region": "".join(REGIONS[i % len(REGIONS)]),
+            "usage_type": "On-Demand",
+            "usage_quantity": 1,
+            "unit": "hrs" if i % 10 == 0 else "hour",
+            "cost_inr": f"{cost * 10:,}" if i % 10 == 0 else cost,
+            "desc": "benchmark record",
+        })
+    return records
+
+
+def traced(build):
+    tracemalloc.start()
+    value = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    profile = {"budget_inr_per_month": 5000}
+
+    print(f"{'rows':>10} {'dicts (MB)':>12} {'batch (MB)':>12} {'validate (s)':>13} "
+          f"{'analyze (s)':>12}")
+    for rows in sizes:
+        records, dict_bytes = traced(lambda: build_records(rows))
+        start = time.perf_counter()
+        batch = validate_billing(records)
+        validate_seconds = time.perf_counter() - start
+        del records
+        # Batch memory only: the dicts are freed before measuring
+        _, batch_bytes = traced(lambda: validate_billing(batch.to_json()))
+
+        start = time.perf_counter()
+        analyze_costs(profile, batch)
+        analyze_seconds = time.perf_counter() - start
+
+        print(f"{rows:>10,} {dict_bytes / 2**20:>12.1f} {batch_bytes / 2**20:>12.1f} "
+              f"{validate_seconds:>13.3f} {analyze_seconds:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Times building the rollup index over a synthetic billing store, drill-down
+queries against it, and the incremental update after appending a month.
+
+Usage:
+    python benchmarks/bench_rollup_index.py [resources] [months] [line_items]
+
+Defaults to 5000 resources x 12 months x 10 line items (600k records).
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.billing_store import BillingStore
+from modules.rollup_index import RollupIndex
+from modules.synthetic_billing import iter_local_billing_batches
+
+PROFILE = {
+    "name": "Rollup benchmark",
+    "budget_inr_per_month": 500000,
+    "tech_stack": {"backend": "Node.js", "database": "PostgreSQL", "cache": "Redis",
+                   "storage": "S3", "cdn": "CloudFront"},
+}
+REPEAT = 200
+
+
+def timed(func, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return result, (time.perf_counter() - start) / repeat
+
+
+def main():
+    resources = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    months = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+    line_items = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+
+    path = tempfile.mkdtemp(prefix="rollup-bench-")
+    try:
+        store = BillingStore(path)
+        store.append(iter_local_billing_batches(PROFILE, months=months, resources=resources,
+                                                line_items_per_month=line_items, region_spread=0.3))
+        index, build = timed(lambda: RollupIndex.for_store(store))
+        print(f"{store.rows:,} records -> {len(index.base):,} cells, built in {build:.2f}s")
+
+        service = index.values("service")[0]
+        queries = {
+            "cost by region x service x month": lambda: index.query(("region", "service", "month")),
+            f"month trend where service={service}": lambda: index.query("month", where={"service": service}),
+            "top 5 resources per service": lambda: index.top("resource_id", 5, per="service"),
+            "usage_type breakdown": lambda: index.query("usage_type"),
+        }
+        for name, query in queries.items():
+            _, first = timed(query)
+            _, warm = timed(query, REPEAT)
+            print(f"  {name:<40} first {first * 1000:8.3f} ms, then {warm * 1000:.3f} ms")
+
+        next_month = f"{int(index.values('month')[-1][:4]) + 1}-01"
+        store.append(iter_local_billing_batches(PROFILE, months=1, resources=resources,
+                                                line_items_per_month=line_items, start_month=next_month))
+        _, incremental = timed(lambda: RollupIndex.for_store(store))
+        _, rebuild = timed(lambda: RollupIndex.from_billing(store))
+        print(f"append {next_month}: incremental update {incremental:.2f}s, full rebuild {rebuild:.2f}s")
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
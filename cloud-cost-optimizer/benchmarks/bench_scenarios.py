@@ -0,0 +1,100 @@
+"""
+Times the what-if scenario planner on synthetic recommendation sets and
+checks it against brute-force enumeration of every subset on a small set.
+
+Usage:
+    python benchmarks/bench_scenarios.py [recommendations ...]
+
+Defaults to 50, 200 and 800 recommendations spread over one service per
+four recommendations; the brute-force check uses 14.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.records import LEVELS
+from modules.scenarios import EFFORT_POINTS, REPLACEMENT_TYPES, plan_scenarios
+
+DEFAULT_SIZES = [50, 200, 800]
+BRUTE_FORCE_SIZE = 14
+TYPES = ["right_sizing", "idle_resources", "storage_tiering", "free_tier",
+         "open_source", "alternative_provider"]
+
+
+def build_inputs(count, seed=7):
+    rng = random.Random(seed)
+    services = {f"service-{i}": float(rng.randint(100, 20000)) for i in range(max(1, count // 4))}
+    names = list(services)
+    recommendations = []
+    for _ in range(count):
+        service = rng.choice(names)
+        recommendations.append({
+            "title": f"Optimize {service}",
+            "service": service,
+            "potential_savings": round(services[service] * rng.uniform(0.05, 0.7), 2),
+            "recommendation_type": rng.choice(TYPES),
+            "implementation_effort": rng.choice(LEVELS),
+            "risk_level": rng.choice(LEVELS),
+        })
+    return recommendations, services
+
+
+def brute_force(recommendations, service_costs):
+    """
+    Best savings per (effort, risk) over every valid subset.
+    """
+    best = {}
+    count = len(recommendations)
+    for mask in range(1, 1 << count):
+        chosen = [r for i, r in enumerate(recommendations) if mask >> i & 1]
+        groups = {(r["service"], "replace" if r["recommendation_type"] in REPLACEMENT_TYPES
+                   else r["recommendation_type"]) for r in chosen}
+        if len(groups) < len(chosen):
+            continue
+        remaining = dict(service_costs)
+        for r in chosen:
+            cost = service_costs[r["service"]]
+            remaining[r["service"]] *= 1 - min(r["potential_savings"] / cost, 1)
+        savings = sum(service_costs[s] - remaining[s] for s in service_costs)
+        effort = sum(EFFORT_POINTS[r["implementation_effort"]] for r in chosen)
+        risk = max(LEVELS.index(r["risk_level"]) for r in chosen)
+        best[effort, risk] = max(best.get((effort, risk), 0), savings)
+    return best
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+
+    recommendations, costs = build_inputs(BRUTE_FORCE_SIZE)
+    start = time.perf_counter()
+    exact = brute_force(recommendations, costs)
+    brute_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    scenarios = plan_scenarios(recommendations, costs)
+    plan_seconds = time.perf_counter() - start
+    mismatches = 0
+    for s in scenarios:
+        expected = max(v for (e, r), v in exact.items()
+                       if e <= s["effort"] and r <= LEVELS.index(s["risk_level"]))
+        mismatches += abs(expected - s["savings"]) > 0.01
+    print(f"{BRUTE_FORCE_SIZE} recommendations: brute force {brute_seconds:.2f}s over "
+          f"{2 ** BRUTE_FORCE_SIZE:,} subsets, planner {plan_seconds * 1000:.2f} ms, "
+          f"{len(scenarios)} scenarios, {mismatches} mismatches")
+
+    print(f"{'recommendations':>15} {'services':>9} {'scenarios':>10} {'seconds':>9} "
+          f"{'best savings':>13} {'naive sum':>13}")
+    for count in sizes:
+        recommendations, costs = build_inputs(count)
+        start = time.perf_counter()
+        scenarios = plan_scenarios(recommendations, costs)
+        seconds = time.perf_counter() - start
+        naive = sum(r["potential_savings"] for r in recommendations)
+        print(f"{count:>15,} {len(costs):>9,} {len(scenarios):>10,} {seconds:>9.3f} "
+              f"{scenarios[-1]['savings']:>13,.0f} {naive:>13,.0f}")
+
+
+if __name__ == "__main__":
+    main()
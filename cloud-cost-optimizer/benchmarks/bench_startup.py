@@ -0,0 +1,90 @@
+"""
+Checks CLI startup cost with `python -X importtime`: the non-interactive
+`view` and `analyze` commands must not import rich, requests or dotenv, and
+their imports must fit in a time budget.
+
+Usage:
+    python benchmarks/bench_startup.py [budget_ms] [top]
+
+Defaults to a 100 ms budget and lists the 10 slowest top-level imports per
+command. Interpreter startup (the `site` module) is not counted. Exits with
+status 1 if a command fails, imports a forbidden module or exceeds the budget.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, "main.py")
+
+FORBIDDEN = ("rich", "requests", "urllib3", "dotenv")
+PROFILE = os.path.join(ROOT, "project_profile.json")
+COMMANDS = {
+    "view": ["view", "--report", "report.json"],
+    "analyze": ["analyze", "--out", "report.json", "--billing-store", "no_store"],
+}
+
+
+def import_times(stderr):
+    """
+    Parses -X importtime output into [(module, cumulative_us, depth)],
+    skipping everything imported while `site` ran.
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        imports.append((name.strip(), int(cumulative), depth))
+        if name.strip() == "site" and depth == 0:
+            imports.clear()
+    return imports
+
+
+def run(name, args, cwd):
+    env = dict(os.environ, BILLING_SOURCE="local", RECOMMENDATION_SOURCE="rules")
+    result = subprocess.run([sys.executable, "-X", "importtime", MAIN] + args,
+                            cwd=cwd, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"{name}: exited with {result.returncode}\n{result.stderr[-2000:]}")
+        return None
+    return import_times(result.stderr)
+
+
+def main():
+    budget_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 100
+    top = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    cwd = tempfile.mkdtemp(prefix="startup-bench-")
+    failed = False
+    try:
+        shutil.copy(PROFILE, os.path.join(cwd, "project_profile.json"))
+        # analyze runs first so view has a report to print
+        for name in ("analyze", "view"):
+            imports = run(name, COMMANDS[name], cwd)
+            if imports is None:
+                failed = True
+                continue
+            top_level = [(module, us) for module, us, depth in imports if depth == 0]
+            total_ms = sum(us for _, us in top_level) / 1000
+            loaded = sorted({module.split(".")[0] for module, _, _ in imports} & set(FORBIDDEN))
+            status = "ok"
+            if loaded:
+                status = f"FAIL: imported {', '.join(loaded)}"
+            elif total_ms > budget_ms:
+                status = f"FAIL: over the {budget_ms:g} ms budget"
+            failed = failed or status != "ok"
+
+            print(f"{name}: {len(imports)} modules, {total_ms:.1f} ms of imports ({status})")
+            for module, us in sorted(top_level, key=lambda item: -item[1])[:top]:
+                print(f"  {module:<40} {us / 1000:8.2f} ms")
+    finally:
+        shutil.rmtree(cwd, ignore_errors=True)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
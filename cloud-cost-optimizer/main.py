@@ -1,25 +1,39 @@
 import os
 import sys
 import json
-from rich.console import Console
-from rich.prompt import Prompt
-from rich.table import Table
-from rich.panel import Panel
+import time
+import argparse
 
 # Ensure modules structure is accessible
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from modules.profile_extractor import extract_project_profile
-from modules.billing_generator import generate_synthetic_billing
-from modules.cost_analyzer import analyze_costs
-from modules.recommendation_engine import generate_recommendations
+# rich, the pipeline and the HTTP stack are imported inside the flows that
+# use them, so e.g. `main.py view` starts without loading any of them.
 
-console = Console()
+_console = None
+
+def get_console():
+    global _console
+    if _console is None:
+        from rich.console import Console
+        _console = Console()
+    return _console
+
+class LazyConsole:
+    """
+    Forwards to the rich Console, which is created on first use.
+    """
+
+    def __getattr__(self, name):
+        return getattr(get_console(), name)
+
+console = LazyConsole()
 
 DESCRIPTION_FILE = "project_description.txt"
 PROFILE_FILE = "project_profile.json"
 BILLING_FILE = "mock_billing.json"
 REPORT_FILE = "cost_optimization_report.json"
+BILLING_STORE_DIR = "billing_store"
 
 def save_json(filename, data):
     with open(filename, 'w', encoding='utf-8') as f:
@@ -32,7 +46,17 @@ def load_json(filename):
     with open(filename, 'r', encoding='utf-8') as f:
         return json.load(f)
 
+def report_pipeline_stages(pipeline):
+    output_files = {stage.name: stage.output_file for stage in pipeline.stages}
+    for name in pipeline.skipped:
+        console.print(f"[yellow]Inputs unchanged, reused {output_files[name]}[/yellow]")
+    for name in pipeline.executed:
+        console.print(f"[green]Saved {output_files[name]}[/green]")
+
 def enter_description_flow():
+    from rich.panel import Panel
+    from modules.pipeline import Pipeline, StageError, default_stages
+
     console.print(Panel("[bold blue]Enter Project Description[/bold blue]"))
     console.print("Type your description below (press Enter twice to finish):")
     
@@ -53,83 +77,215 @@ def enter_description_flow():
         f.write(description)
     console.print(f"[green]Saved description to {DESCRIPTION_FILE}[/green]")
     
-    with console.status("[bold green]Extracting Profile...[/bold green]"):
-        profile = extract_project_profile(description)
-    
-    if profile:
-        save_json(PROFILE_FILE, profile)
-        console.print(Panel(json.dumps(profile, indent=2), title="Extracted Profile"))
-    else:
+    pipeline = Pipeline(default_stages(profile_file=PROFILE_FILE))
+    try:
+        with console.status("[bold green]Extracting Profile...[/bold green]"):
+            profile = pipeline.run({"description": description}, targets=["profile"])["profile"]
+    except StageError:
         console.print("[red]Failed to extract profile. Please check your API token or description.[/red]")
+        return
+
+    report_pipeline_stages(pipeline)
+    console.print(Panel(json.dumps(profile, indent=2), title="Extracted Profile"))
+
+def stream_billing_stage(profile):
+    """
+    Billing stage that shows a running total while the LLM is still generating records.
+    """
+    from modules.billing_generator import stream_synthetic_billing
+    from modules.records import parse_number
+
+    records = []
+    # Only the running total is shown; the stage's loader validates the whole
+    # batch once (and reports rejected rows) when it is done
+    total_cost = 0.0
+    with console.status("[bold green]Generating Synthetic Billing...[/bold green]") as status:
+        for record in stream_synthetic_billing(profile):
+            records.append(record)
+            try:
+                # Coerced on the fly so an LLM cost like "1,200" cannot break the running total
+                total_cost += parse_number(record.get('cost_inr')) if isinstance(record, dict) else 0.0
+            except ValueError:
+                pass
+            status.update(f"[bold green]Generating Synthetic Billing... {len(records)} records, "
+                          f"running total {round(total_cost, 2)} INR[/bold green]")
+    return records or None
+
+def stream_recommendation_stage(profile, analysis, billing):
+    """
+    Recommendation stage that renders each recommendation as soon as it arrives.
+    """
+    from rich.live import Live
+    from modules.recommendation_engine import stream_recommendations
+
+    recommendations = []
+    table = build_recommendation_table([])
+    with Live(table, console=get_console(), refresh_per_second=8, transient=True):
+        for rec in stream_recommendations(profile, analysis, billing):
+            recommendations.append(rec)
+            add_recommendation_row(table, rec)
+    if not recommendations and os.getenv("RECOMMENDATION_SOURCE", "hybrid") == "llm":
+        return None
+    return recommendations
+
+def initial_values(profile, store_dir=BILLING_STORE_DIR):
+    """
+    Pipeline inputs for an analysis: imported billing exports take precedence
+    over synthetic billing.
+    """
+    from modules.billing_store import BillingStore
+
+    values = {"profile": profile}
+    if store_dir and BillingStore.exists(store_dir):
+        values["billing"] = BillingStore(store_dir)
+    return values
 
 def run_analysis_flow():
+    from modules.pipeline import Pipeline, StageError, default_stages
+    from modules.report import build_report
+
     profile = load_json(PROFILE_FILE)
     if not profile:
         console.print("[red]No project profile found. Please enter a description first.[/red]")
         return
 
-    with console.status("[bold green]Generating Synthetic Billing...[/bold green]"):
-        billing_data = generate_synthetic_billing(profile)
-    
-    if billing_data:
-        save_json(BILLING_FILE, billing_data)
-        
-        with console.status("[bold green]Analyzing Costs & Generating Recommendations...[/bold green]"):
-            analysis = analyze_costs(profile, billing_data)
-            recommendations = generate_recommendations(profile, analysis)
-
-            report = {
-                "project_name": profile.get('name', 'Unknown Project'),
-                "analysis": analysis,
-                "recommendations": recommendations,
-                "summary": {
-                    "total_potential_savings": sum([r.get('potential_savings', 0) for r in recommendations]),
-                    "recommendations_count": len(recommendations)
-                }
-            }
-        
-        if report:
-            save_json(REPORT_FILE, report)
-            console.print("[bold green]Analysis Complete![/bold green]")
-            display_summary(report)
-        else:
-            console.print("[red]Failed to generate report.[/red]")
-    else:
-         console.print("[red]Failed to generate billing data.[/red]")
+    # Only stages downstream of a changed input are re-executed
+    pipeline = Pipeline(default_stages(profile_file=PROFILE_FILE, billing_file=BILLING_FILE,
+                                       billing=stream_billing_stage,
+                                       recommend=stream_recommendation_stage))
+    values = initial_values(profile)
+    if "billing" in values:
+        store = values["billing"]
+        console.print(f"[cyan]Using billing store {BILLING_STORE_DIR} "
+                      f"({store.rows:,} records, months {', '.join(store.months)})[/cyan]")
+
+    try:
+        values = pipeline.run(values, targets=["billing"])
+    except StageError:
+        console.print("[red]Failed to generate billing data.[/red]")
+        return
+
+    try:
+        values = pipeline.run(values, targets=["recommendations"])
+    except StageError as e:
+        console.print(f"[red]Failed to generate report ({e.stage} stage).[/red]")
+        return
+
+    report_pipeline_stages(pipeline)
+    report = build_report(profile, values["analysis"], values["recommendations"])
+    save_json(REPORT_FILE, report)
+    console.print("[bold green]Analysis Complete![/bold green]")
+    display_summary(report)
+
+def build_recommendation_table(recs):
+    from rich.table import Table
+
+    table = Table(title="Recommendations")
+    table.add_column("Title", style="cyan")
+    table.add_column("Savings", style="green")
+    table.add_column("Type", style="magenta")
+    for r in recs:
+        add_recommendation_row(table, r)
+    return table
+
+def add_recommendation_row(table, r):
+    table.add_row(r['title'], str(r['potential_savings']), r['recommendation_type'])
 
 def display_summary(report):
+    from rich.panel import Panel
+    from modules.records import validate_recommendations
+    from modules.report import summary_lines
+
     if not report:
         report = load_json(REPORT_FILE)
         if not report:
             console.print("[red]No report found.[/red]")
             return
 
-    analysis = report.get('analysis', {})
-    console.print(Panel(f"Total Cost: {analysis.get('total_monthly_cost')} INR\n"
-                        f"Budget: {analysis.get('budget')} INR\n"
-                        f"Variance: {analysis.get('budget_variance')} INR", 
-                        title="Cost Summary", style="bold"))
+    console.print(Panel("\n".join(summary_lines(report)), title="Cost Summary", style="bold"))
     
-    recs = report.get('recommendations', [])
-    table = Table(title="Recommendations")
-    table.add_column("Title", style="cyan")
-    table.add_column("Savings", style="green")
-    table.add_column("Type", style="magenta")
-    
-    for r in recs:
-        table.add_row(r.get('title'), str(r.get('potential_savings')), r.get('recommendation_type'))
-        
-    console.print(table)
+    # Reports saved by older versions may still hold unvalidated LLM output
+    recs = validate_recommendations(report.get('recommendations') or [])
+    console.print(build_recommendation_table(recs))
+
+def load_rollup_index():
+    from modules.billing_store import BillingStore
+    from modules.rollup_index import RollupIndex
+
+    # Same precedence as the analysis flow: the billing store, then mock_billing.json
+    if BillingStore.exists(BILLING_STORE_DIR):
+        return RollupIndex.for_store(BillingStore(BILLING_STORE_DIR))
+    billing = load_json(BILLING_FILE)
+    return RollupIndex.from_billing(billing) if billing else None
+
+def parse_filters(text):
+    """
+    Parses "service=EC2|RDS, month=2025-03" into {"service": ["EC2", "RDS"], "month": ["2025-03"]}.
+    """
+    where = {}
+    for part in text.split(","):
+        if not part.strip():
+            continue
+        name, sep, values = part.partition("=")
+        if not sep:
+            raise ValueError(f"filter '{part.strip()}' is not dimension=value")
+        where[name.strip()] = [v.strip() for v in values.split("|")]
+    return where
+
+def drill_down_flow():
+    from rich.prompt import Prompt, IntPrompt
+    from rich.table import Table
+    from modules.rollup_index import DIMENSIONS
+
+    with console.status("[bold green]Building rollup index...[/bold green]"):
+        index = load_rollup_index()
+    if index is None:
+        console.print("[red]No billing data found. Run a cost analysis or import billing first.[/red]")
+        return
+
+    console.print(f"Dimensions: {', '.join(DIMENSIONS)}")
+    console.print(f"Months: {', '.join(index.values('month'))}")
+    while True:
+        group_by = Prompt.ask("Group by (comma-separated, empty to go back)", default="")
+        if not group_by.strip():
+            return
+        filters = Prompt.ask("Filter (e.g. service=EC2|RDS, month=2025-03)", default="")
+        top_n = IntPrompt.ask("Top N", default=10)
+
+        dims = [d.strip() for d in group_by.split(",") if d.strip()]
+        try:
+            where = parse_filters(filters)
+            start = time.perf_counter()
+            costs = index.query(dims, where)
+            elapsed = time.perf_counter() - start
+        except ValueError as e:
+            console.print(f"[red]{e}[/red]")
+            continue
+
+        total = sum(costs.values())
+        table = Table(title=f"Cost by {' x '.join(dims)} ({len(costs):,} groups, {elapsed * 1000:.2f} ms)")
+        for dim in dims:
+            table.add_column(dim, style="cyan")
+        table.add_column("Cost (INR)", style="green", justify="right")
+        table.add_column("Share", style="magenta", justify="right")
+        for key, cost in sorted(costs.items(), key=lambda x: x[1], reverse=True)[:top_n]:
+            values = key if isinstance(key, tuple) else (key,)
+            share = f"{cost / total:.1%}" if total else "-"
+            table.add_row(*(str(v) for v in values), f"{cost:,.2f}", share)
+        console.print(table)
 
 def main_menu():
+    from rich.prompt import Prompt
+
     while True:
         console.print("\n[bold]Cloud Cost Optimizer CLI[/bold]")
         console.print("1. Enter New Project Description")
         console.print("2. Run Complete Cost Analysis")
         console.print("3. View Recommendations")
-        console.print("4. Exit")
+        console.print("4. Drill Down Costs")
+        console.print("5. Exit")
         
-        choice = Prompt.ask("Select an option", choices=["1", "2", "3", "4"])
+        choice = Prompt.ask("Select an option", choices=["1", "2", "3", "4", "5"])
         
         if choice == "1":
             enter_description_flow()
@@ -138,8 +294,371 @@ def main_menu():
         elif choice == "3":
             display_summary(None)
         elif choice == "4":
+            drill_down_flow()
+        elif choice == "5":
             console.print("Goodbye!")
             break
 
+def batch_flow(args):
+    from rich.table import Table
+    from modules.llm_client import create_client, set_client
+    from modules.portfolio import run_portfolio
+
+    if args.llm_concurrency:
+        set_client(create_client(max_concurrency=args.llm_concurrency))
+
+    console.print(f"[bold]Running portfolio analysis from {args.source}[/bold]")
+    try:
+        portfolio = run_portfolio(args.source, args.out, workers=args.workers, force=args.force,
+                                  progress=console.print)
+    except (FileNotFoundError, ValueError) as e:
+        console.print(f"[red]{e}[/red]")
+        return
+
+    table = Table(title="Portfolio Summary")
+    table.add_column("Project", style="cyan")
+    table.add_column("Cost", style="white")
+    table.add_column("Variance", style="red")
+    table.add_column("Savings", style="green")
+    for p in portfolio["projects"]:
+        table.add_row(p["name"], str(p["total_monthly_cost"]), str(p["budget_variance"]),
+                      str(p["total_potential_savings"]))
+    console.print(table)
+
+    for failure in portfolio["failed"]:
+        console.print(f"[red]{failure['name']} failed: {failure['error']}[/red]")
+    console.print(f"[green]Portfolio report written to {os.path.join(args.out, 'portfolio_report.json')}"
+                  f" in {portfolio['elapsed_seconds']:.1f}s[/green]")
+
+def generate_billing_flow(args):
+    from modules.billing_store import BillingStore
+    from modules.synthetic_billing import (iter_local_billing_batches, round_billing_columns,
+                                           write_billing_csv)
+
+    profile = load_json(args.profile)
+    if not profile:
+        console.print(f"[red]No project profile found at {args.profile}.[/red]")
+        return
+
+    start = time.perf_counter()
+    batches = iter_local_billing_batches(
+        profile, months=args.months, resources=args.resources, start_month=args.start_month,
+        line_items_per_month=args.line_items, seed=args.seed, monthly_growth=args.growth,
+        spike_probability=args.spike_probability, region_spread=args.region_spread,
+    )
+    if args.store:
+        # Rounded like the CSV output, so a seed gives the same costs either way
+        rows = BillingStore(args.store).append(map(round_billing_columns, batches))
+        target = args.store
+    else:
+        rows = write_billing_csv(args.out, batches)
+        target = args.out
+    elapsed = time.perf_counter() - start
+    console.print(f"[green]Wrote {rows:,} billing records to {target} in {elapsed:.2f}s "
+                  f"({rows / max(elapsed, 1e-9):,.0f} rows/s)[/green]")
+
+def import_billing_flow(args):
+    from modules.billing_exports import fx_rates, import_billing_files, parse_fx_rates
+    from modules.billing_store import BillingStore
+
+    try:
+        rates = fx_rates(parse_fx_rates(",".join(args.fx)))
+    except ValueError as e:
+        console.print(f"[red]{e}[/red]")
+        return
+    store = BillingStore(args.store)
+    if args.replace_month:
+        store.drop_month(args.replace_month)
+    start = time.perf_counter()
+    try:
+        imported = import_billing_files(args.files, store, provider=args.provider,
+                                        workers=args.workers, rates=rates)
+    except ValueError as e:
+        console.print(f"[red]{e}[/red]")
+        return
+    for path, rows in imported.items():
+        console.print(f"[green]Imported {rows:,} records from {path}[/green]")
+    total = sum(imported.values())
+    console.print(f"[green]Billing store {args.store}: {store.rows:,} records, "
+                  f"months {', '.join(store.months)} ({total:,} imported in "
+                  f"{time.perf_counter() - start:.2f}s)[/green]")
+
+def view_command(args):
+    """
+    Prints a saved report as plain text (or JSON) without loading rich or the pipeline.
+    """
+    from modules.report import report_lines
+
+    report = load_json(args.report)
+    if not report:
+        print(f"No report found at {args.report}.", file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps(report, indent=4))
+    else:
+        print("\n".join(report_lines(report)))
+
+def analyze_command(args):
+    """
+    Runs billing -> analysis -> recommendations for a saved profile and
+    writes the report, printing plain text instead of the interactive UI.
+    """
+    from modules.pipeline import Pipeline, StageError, default_stages
+    from modules.report import build_report, report_lines
+
+    profile = load_json(args.profile)
+    if not profile:
+        print(f"No project profile found at {args.profile}.", file=sys.stderr)
+        return 1
+
+    pipeline = Pipeline(default_stages(profile_file=args.profile, billing_file=BILLING_FILE),
+                        force=args.force)
+    try:
+        values = pipeline.run(initial_values(profile, args.billing_store), targets=["recommendations"])
+    except StageError as e:
+        print(f"Failed to generate report ({e.stage} stage).", file=sys.stderr)
+        return 1
+
+    report = build_report(profile, values["analysis"], values["recommendations"])
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=4)
+    if args.json:
+        print(json.dumps(report, indent=4))
+    else:
+        print("\n".join(report_lines(report)))
+        print(f"Saved {args.out} (ran: {', '.join(pipeline.executed) or 'none'}; "
+              f"reused: {', '.join(pipeline.skipped) or 'none'})")
+
+def scenarios_command(args):
+    """
+    Prints the Pareto-optimal recommendation sets (savings vs. effort vs. risk)
+    of a saved report, optionally within an effort budget and risk level.
+    """
+    from modules.cost_analyzer import monthly_service_costs
+    from modules.records import validate_recommendations
+    from modules.report import scenario_lines
+    from modules.scenarios import plan_scenarios
+
+    report = load_json(args.report)
+    if not report:
+        print(f"No report found at {args.report}.", file=sys.stderr)
+        return 1
+    recommendations = validate_recommendations(report.get('recommendations') or [])
+    scenarios = plan_scenarios(recommendations, monthly_service_costs(report.get('analysis', {})),
+                               max_effort=args.max_effort, max_risk=args.max_risk)
+    if args.json:
+        print(json.dumps(scenarios, indent=4))
+    elif not scenarios:
+        print("No scenarios: the report has no recommendations with savings.")
+    else:
+        print("\n".join(scenario_lines(recommendations, scenarios)))
+
+def watch_command(args):
+    """
+    Watches a billing directory for new or appended files, printing the
+    month's spend and projection and sending budget alerts. The report is
+    rewritten whenever the recommendations are regenerated.
+    """
+    from modules.billing_exports import fx_rates, parse_fx_rates
+    from modules.budget_watch import (DEFAULT_THRESHOLDS, BillingDirectory, BudgetWatcher, FileSink,
+                                      WebhookSink, stdout_sink)
+    from modules.pipeline import write_json_atomic
+    from modules.report import build_report
+
+    profile = load_json(args.profile)
+    if not profile:
+        print(f"No project profile found at {args.profile}.", file=sys.stderr)
+        return 1
+    try:
+        rates = fx_rates(parse_fx_rates(",".join(args.fx)))
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    sinks = [stdout_sink]
+    if args.alerts_file:
+        sinks.append(FileSink(args.alerts_file))
+    if args.webhook:
+        sinks.append(WebhookSink(args.webhook))
+
+    def save_report(recommendations, analysis):
+        write_json_atomic(args.out, build_report(profile, analysis, recommendations))
+
+    watcher = BudgetWatcher(
+        profile, BillingDirectory(args.directory, provider=args.provider, rates=rates), sinks=sinks,
+        thresholds=args.threshold or DEFAULT_THRESHOLDS, on_recommendations=save_report,
+        debounce=0 if args.once else args.debounce,
+    )
+    if not args.once:
+        print(f"Watching {args.directory} every {args.interval:g}s (Ctrl+C to stop)")
+    try:
+        while True:
+            if watcher.poll() and watcher.status:
+                status = watcher.status
+                print(f"{status['month']}: ₹{status['month_spend']:,.0f} spent, "
+                      f"₹{status['projected_month_end']:,.0f} projected of ₹{status['budget']:,.0f} "
+                      f"budget ({status['records']:,} records)")
+            if args.once:
+                return 0
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+
+def display_profile(metrics):
+    from rich.table import Table
+
+    snapshot = metrics.snapshot()
+
+    timings = Table(title="Profile: Timings (seconds)")
+    timings.add_column("Metric", style="cyan", no_wrap=True)
+    for column in ("Labels", "Count", "Total", "Mean", "p95", "Max"):
+        timings.add_column(column, style="white")
+    for s in snapshot["summaries"]:
+        labels = ", ".join(f"{k}={v}" for k, v in s["labels"].items())
+        timings.add_row(s["name"], labels, str(s["count"]), f"{s['sum']:.4f}", f"{s['mean']:.4f}",
+                        f"{s['p95']:.4f}", f"{s['max']:.4f}")
+    console.print(timings)
+
+    counts = Table(title="Profile: Counters and Gauges")
+    counts.add_column("Metric", style="cyan", no_wrap=True)
+    counts.add_column("Labels", style="white")
+    counts.add_column("Value", style="green")
+    for c in snapshot["counters"] + snapshot["gauges"]:
+        labels = ", ".join(f"{k}={v}" for k, v in c["labels"].items())
+        counts.add_row(c["name"], labels, f"{c['value']:,}")
+    console.print(counts)
+
+def write_metrics(args):
+    if not (args.profile_report or args.metrics_file or args.prometheus_file):
+        return
+    from modules.metrics import get_metrics
+
+    metrics = get_metrics()
+    if args.profile_report:
+        display_profile(metrics)
+    if args.metrics_file:
+        metrics.write_json(args.metrics_file)
+        console.print(f"[green]Saved metrics to {args.metrics_file}[/green]")
+    if args.prometheus_file:
+        metrics.write_prometheus(args.prometheus_file)
+        console.print(f"[green]Saved Prometheus metrics to {args.prometheus_file}[/green]")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Cloud Cost Optimizer")
+    parser.add_argument("--profile", dest="profile_report", action="store_true",
+                        help="Print stage, LLM and analyzer timings when done")
+    parser.add_argument("--metrics-file", default=None, help="Write collected metrics as JSON")
+    parser.add_argument("--prometheus-file", default=None,
+                        help="Write collected metrics in Prometheus text format")
+    subparsers = parser.add_subparsers(dest="command")
+
+    batch = subparsers.add_parser("batch", help="Analyze a portfolio of projects non-interactively")
+    batch.add_argument("source", help="Directory of project folders or a JSON manifest")
+    batch.add_argument("--out", default="portfolio_output", help="Output directory")
+    batch.add_argument("--workers", type=int, default=4, help="Projects processed in parallel")
+    batch.add_argument("--llm-concurrency", type=int, default=None, help="Max concurrent LLM requests")
+    batch.add_argument("--force", action="store_true", help="Re-run every stage, ignoring saved state")
+
+    generate = subparsers.add_parser("generate-billing",
+                                     help="Write seeded synthetic billing without the LLM")
+    generate.add_argument("--profile", default=PROFILE_FILE, help="Project profile JSON")
+    generate.add_argument("--out", default="synthetic_billing.csv", help="Output CSV file")
+    generate.add_argument("--store", default=None, help="Append to a columnar billing store instead of CSV")
+    generate.add_argument("--months", type=int, default=12)
+    generate.add_argument("--resources", type=int, default=100)
+    generate.add_argument("--line-items", type=int, default=1, help="Records per resource per month")
+    generate.add_argument("--start-month", default="2025-01")
+    generate.add_argument("--seed", type=int, default=42)
+    generate.add_argument("--growth", type=float, default=0.0, help="Month-over-month growth, e.g. 0.05")
+    generate.add_argument("--spike-probability", type=float, default=0.02)
+    generate.add_argument("--region-spread", type=float, default=0.0)
+
+    importer = subparsers.add_parser("import-billing",
+                                     help="Import JSON/CSV billing into the columnar billing store")
+    importer.add_argument("files", nargs="+",
+                          help="mock_billing.json-style JSON, or CSV (.csv/.csv.gz) / .parquet exports")
+    importer.add_argument("--store", default=BILLING_STORE_DIR, help="Billing store directory")
+    importer.add_argument("--replace-month", default=None, help="Drop this month before importing")
+    importer.add_argument("--provider", choices=["aws", "gcp", "azure", "native"], default=None,
+                          help="Export format (detected from the header by default)")
+    importer.add_argument("--workers", type=int, default=None,
+                          help="Files parsed in parallel (default: one process per CPU)")
+    importer.add_argument("--fx", action="append", default=[], metavar="CURRENCY=RATE",
+                          help="INR per unit of a billing currency, e.g. --fx USD=83.2")
+
+    view = subparsers.add_parser("view", help="Print a saved report without the interactive UI")
+    view.add_argument("--report", default=REPORT_FILE, help="Report JSON")
+    view.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    analyze = subparsers.add_parser("analyze", help="Run the cost analysis non-interactively")
+    analyze.add_argument("--profile", default=PROFILE_FILE, help="Project profile JSON")
+    analyze.add_argument("--out", default=REPORT_FILE, help="Report JSON to write")
+    analyze.add_argument("--billing-store", default=BILLING_STORE_DIR,
+                         help="Billing store used instead of synthetic billing if it exists")
+    analyze.add_argument("--force", action="store_true", help="Re-run every stage, ignoring saved state")
+    analyze.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    scenarios = subparsers.add_parser("scenarios", help="What-if savings for combinations of recommendations")
+    scenarios.add_argument("--report", default=REPORT_FILE, help="Report JSON")
+    scenarios.add_argument("--max-effort", type=int, default=None,
+                           help="Effort budget in points (low=1, medium=2, high=3 per recommendation)")
+    scenarios.add_argument("--max-risk", choices=["low", "medium", "high"], default="high",
+                           help="Highest risk level allowed in a scenario")
+    scenarios.add_argument("--json", action="store_true", help="Print the scenarios as JSON")
+
+    watch = subparsers.add_parser("watch", help="Track spend against the budget as billing files arrive")
+    watch.add_argument("directory", help="Directory of billing CSV/JSON files or provider exports")
+    watch.add_argument("--profile", default=PROFILE_FILE, help="Project profile JSON")
+    watch.add_argument("--out", default=REPORT_FILE, help="Report JSON rewritten with new recommendations")
+    watch.add_argument("--interval", type=float, default=10.0, help="Seconds between directory scans")
+    watch.add_argument("--threshold", type=float, action="append", default=[],
+                       help="Alert when spend or projection reaches this fraction of the budget "
+                            "(repeatable; default 0.8 and 1.0)")
+    watch.add_argument("--debounce", type=float, default=30.0,
+                       help="Seconds the costs must stay put before recommendations are regenerated")
+    watch.add_argument("--alerts-file", default=None, help="Append alerts to this JSON Lines file")
+    watch.add_argument("--webhook", default=None, help="POST alerts as JSON to this URL")
+    watch.add_argument("--provider", choices=["aws", "gcp", "azure", "native"], default=None,
+                       help="Export format (detected from the header by default)")
+    watch.add_argument("--fx", action="append", default=[], metavar="CURRENCY=RATE",
+                       help="INR per unit of a billing currency, e.g. --fx USD=83.2")
+    watch.add_argument("--once", action="store_true", help="Scan once, alert and exit")
+
+    server = subparsers.add_parser("serve", help="Run the optimizer as an HTTP API service")
+    server.add_argument("--host", default="127.0.0.1")
+    server.add_argument("--port", type=int, default=8080)
+    server.add_argument("--workers", type=int, default=4, help="Tasks executed in parallel")
+    server.add_argument("--llm-concurrency", type=int, default=None, help="Max concurrent LLM requests")
+    server.add_argument("--billing-store", default=None,
+                        help="Billing store used when a request has no billing data")
+
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    main_menu()
+    args = parse_args()
+    try:
+        if args.command == "batch":
+            batch_flow(args)
+        elif args.command == "generate-billing":
+            generate_billing_flow(args)
+        elif args.command == "import-billing":
+            import_billing_flow(args)
+        elif args.command == "view":
+            sys.exit(view_command(args))
+        elif args.command == "analyze":
+            sys.exit(analyze_command(args))
+        elif args.command == "scenarios":
+            sys.exit(scenarios_command(args))
+        elif args.command == "watch":
+            sys.exit(watch_command(args))
+        elif args.command == "serve":
+            from modules.api_server import serve
+            from modules.llm_client import create_client, set_client
+
+            if args.llm_concurrency:
+                set_client(create_client(max_concurrency=args.llm_concurrency))
+            serve(args.host, args.port, workers=args.workers, billing_store=args.billing_store)
+        else:
+            main_menu()
+    finally:
+        write_metrics(args)
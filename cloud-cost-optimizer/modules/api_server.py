@@ -0,0 +1,445 @@
+import argparse
+import asyncio
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from .profile_extractor import extract_project_profile
+from .billing_generator import generate_synthetic_billing
+from .cost_analyzer import analyze_costs
+from .recommendation_engine import generate_recommendations
+from .billing_store import BillingStore
+from .records import validate_billing, validate_recommendations
+from .pipeline import fingerprint
+from .report import build_report
+from .metrics import get_metrics
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+DEFAULT_WORKERS = 4
+JOB_HISTORY = 1000
+MAX_BODY_BYTES = 64 * 1024 * 1024
+STATUS_TEXT = {
+    200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error",
+    502: "Bad Gateway",
+}
+
+
+class ApiError(Exception):
+    """
+    A request failure reported to the client with an HTTP status.
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _require(params, name, kind):
+    value = params.get(name)
+    if not isinstance(value, kind) or not value:
+        raise ApiError(400, f"'{name}' is required")
+    return value
+
+
+def _output(value, what):
+    # The pipeline functions report LLM failures by returning None
+    if value is None:
+        raise ApiError(502, f"{what} produced no output")
+    return value
+
+
+class OptimizerService:
+    """
+    The optimizer's stages as API tasks.
+
+    Tasks run on a bounded thread pool (the stage functions block on LLM
+    calls). Identical requests that are in flight at the same time are
+    coalesced onto one execution, and LLM calls are additionally coalesced
+    by llm_client. Background jobs are kept in memory for polling; only the
+    latest job_history finished jobs are retained.
+
+    Args:
+        workers: Tasks executing at once; further requests queue
+        billing_store: Optional billing store directory used when a request
+                       carries no billing data, and target of ingestion
+        job_history: Finished jobs kept for polling
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, billing_store=None, job_history=JOB_HISTORY):
+        self.executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="api-worker")
+        self.billing_store = billing_store
+        self._store = None
+        self._store_lock = threading.Lock()
+        self.job_history = job_history
+        self.jobs = OrderedDict()
+        self._inflight = {}
+        self._job_by_key = {}
+        self.tasks = {
+            "profile": self.profile_task,
+            "billing": self.billing_task,
+            "analysis": self.analysis_task,
+            "recommendations": self.recommendations_task,
+            "report": self.report_task,
+        }
+
+    # Tasks (run on the worker pool)
+
+    def _profile(self, params):
+        if isinstance(params.get("profile"), dict) and params["profile"]:
+            return params["profile"]
+        description = _require(params, "description", str)
+        return _output(extract_project_profile(description), "profile extraction")
+
+    def _billing(self, params, profile):
+        if params.get("billing"):
+            return validate_billing(params["billing"])
+        if self.billing_store and BillingStore.exists(self.billing_store):
+            return BillingStore(self.billing_store)
+        return validate_billing(_output(generate_synthetic_billing(profile), "billing generation"))
+
+    def _ingest_store(self):
+        # One instance for every ingesting worker; it serializes the commits
+        with self._store_lock:
+            if self._store is None:
+                self._store = BillingStore(self.billing_store)
+            return self._store
+
+    def _analysis(self, params, profile, billing):
+        if isinstance(params.get("analysis"), dict) and params["analysis"]:
+            return params["analysis"]
+        return _output(analyze_costs(profile, billing), "cost analysis")
+
+    def profile_task(self, params):
+        return {"profile": self._profile(params)}
+
+    def billing_task(self, params):
+        """
+        Validates posted "records" (ingestion) or generates billing for a
+        profile. With "store": true the records are appended to the billing store.
+        """
+        if "records" in params:
+            batch = validate_billing(params["records"])
+        else:
+            batch = validate_billing(_output(generate_synthetic_billing(self._profile(params)),
+                                             "billing generation"))
+        result = {"records": len(batch), "rejected": [reason for _, reason in batch.rejected]}
+        if params.get("store"):
+            if not self.billing_store:
+                raise ApiError(400, "the service has no billing store configured")
+            result["stored"] = self._ingest_store().append([batch.columns])
+        else:
+            result["billing"] = batch.to_json()
+        return result
+
+    def analysis_task(self, params):
+        profile = self._profile(params)
+        return {"analysis": self._analysis(params, profile, self._billing(params, profile))}
+
+    def recommendations_task(self, params):
+        profile = self._profile(params)
+        billing = self._billing(params, profile)
+        analysis = self._analysis(params, profile, billing)
+        recommendations = generate_recommendations(profile, analysis, billing, source=params.get("source"))
+        return {"recommendations": validate_recommendations(recommendations)}
+
+    def report_task(self, params):
+        profile = self._profile(params)
+        billing = self._billing(params, profile)
+        analysis = self._analysis(params, profile, billing)
+        recommendations = generate_recommendations(profile, analysis, billing, source=params.get("source"))
+        return {"report": build_report(profile, analysis, validate_recommendations(recommendations))}
+
+    # Scheduling
+
+    def _run(self, name, params):
+        metrics = get_metrics()
+        with metrics.timer("api_task_seconds", task=name):
+            return self.tasks[name](params)
+
+    async def run_task(self, name, params):
+        """
+        Runs a task on the worker pool, sharing the execution with any
+        identical request already in flight.
+        """
+        if name not in self.tasks:
+            raise ApiError(404, f"unknown task '{name}'")
+        key = _coalesce_key(name, params)
+        task = self._inflight.get(key) if key else None
+        if task is None:
+            loop = asyncio.get_running_loop()
+            task = loop.run_in_executor(self.executor, self._run, name, params)
+            if key:
+                self._inflight[key] = task
+                task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            get_metrics().inc("api_coalesced_total", task=name)
+        return await asyncio.shield(task)
+
+    def submit_job(self, name, params):
+        """
+        Starts a task in the background and returns its job record. A job
+        identical to one still queued or running is not started twice.
+        """
+        if name not in self.tasks:
+            raise ApiError(404, f"unknown task '{name}'")
+        key = _coalesce_key(name, params)
+        job = self._job_by_key.get(key) if key else None
+        if job is not None:
+            get_metrics().inc("api_coalesced_total", task=name)
+            return job
+
+        job = {"id": uuid.uuid4().hex, "task": name, "status": "queued",
+               "submitted_at": time.time(), "finished_at": None, "result": None, "error": None}
+        self.jobs[job["id"]] = job
+        if key:
+            self._job_by_key[key] = job
+        asyncio.get_running_loop().create_task(self._run_job(job, key, params))
+        return job
+
+    async def _run_job(self, job, key, params):
+        job["status"] = "running"
+        try:
+            job["result"] = await self.run_task(job["task"], params)
+            job["status"] = "done"
+        except ApiError as e:
+            job["status"], job["error"] = "failed", str(e)
+        except Exception as e:
+            job["status"], job["error"] = "failed", f"{type(e).__name__}: {e}"
+        job["finished_at"] = time.time()
+        self._job_by_key.pop(key, None)
+        get_metrics().inc("api_jobs_total", task=job["task"], status=job["status"])
+        self._trim_jobs()
+
+    def _trim_jobs(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job["finished_at"] is not None]
+        for job_id in finished[:max(0, len(finished) - self.job_history)]:
+            del self.jobs[job_id]
+
+    @property
+    def in_flight(self):
+        return len(self._inflight)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+
+class ApiServer:
+    """
+    Minimal asyncio HTTP/1.1 JSON server (keep-alive, Content-Length bodies)
+    in front of an OptimizerService.
+
+    Routes:
+        GET  /health                   liveness and queue state
+        GET  /metrics                  Prometheus text format
+        POST /v1/<task>                run a task and wait for the result
+                                       (profile, billing, analysis, recommendations, report)
+        POST /v1/jobs                  {"task": ..., **params} -> 202 with a job id
+        GET  /v1/jobs/<id>             poll a job
+    """
+
+    def __init__(self, service=None, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.service = service or OptimizerService()
+        self.host = host
+        self.port = port
+        self._server = None
+        self._connections = set()
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        # Port 0 picks a free port
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        # Idle keep-alive connections would otherwise outlive the server
+        for writer in list(self._connections):
+            writer.close()
+        await asyncio.sleep(0)
+        self.service.close()
+
+    async def _handle_connection(self, reader, writer):
+        self._connections.add(writer)
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, path, body, keep_alive = request
+                start = time.perf_counter()
+                status, payload = await self.dispatch(method, path, body)
+                get_metrics().observe("api_request_seconds", time.perf_counter() - start,
+                                      method=method, route=_route(path), status=status)
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ApiError as e:
+            writer.write(_response(e.status, {"error": str(e)}, False))
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def dispatch(self, method, path, body):
+        """
+        Routes one request; returns (status, JSON-serializable body or str).
+        """
+        try:
+            path = urlsplit(path).path.rstrip("/")
+            if method == "GET" and path == "/health":
+                return 200, {"status": "ok", "jobs": len(self.service.jobs),
+                             "in_flight": self.service.in_flight}
+            if method == "GET" and path == "/metrics":
+                return 200, get_metrics().to_prometheus()
+            if path == "/v1/jobs":
+                if method != "POST":
+                    raise ApiError(405, "use POST to submit a job")
+                params = _json_body(body)
+                job = self.service.submit_job(params.pop("task", None), params)
+                return 202, _job_view(job)
+            if path.startswith("/v1/jobs/"):
+                if method != "GET":
+                    raise ApiError(405, "use GET to poll a job")
+                job = self.service.jobs.get(path[len("/v1/jobs/"):])
+                if job is None:
+                    raise ApiError(404, "unknown job")
+                return 200, _job_view(job)
+            if path.startswith("/v1/"):
+                if method != "POST":
+                    raise ApiError(405, f"use POST for {path}")
+                return 200, await self.service.run_task(path[len("/v1/"):], _json_body(body))
+            raise ApiError(404, f"unknown path {path}")
+        except ApiError as e:
+            return e.status, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+
+
+def _coalesce_key(name, params):
+    # Ingesting into the store is a write: two identical posts store twice
+    if name == "billing" and params.get("store"):
+        return None
+    return fingerprint(name, params)
+
+
+def _route(path):
+    # Metric label without job ids or query strings: /v1/jobs/<id> -> /v1/jobs
+    parts = urlsplit(path).path.split("/")
+    return "/".join(parts[:3]) or "/"
+
+
+def _job_view(job):
+    view = {k: v for k, v in job.items() if k != "result" or v is not None}
+    if job["finished_at"] is not None:
+        view["seconds"] = round(job["finished_at"] - job["submitted_at"], 4)
+    return view
+
+
+def _json_body(body):
+    if not body:
+        return {}
+    try:
+        params = json.loads(body)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise ApiError(400, "request body is not valid JSON")
+    if not isinstance(params, dict):
+        raise ApiError(400, "request body must be a JSON object")
+    return params
+
+
+async def _read_request(reader):
+    """
+    Reads one request; returns None when the client closed the connection.
+    """
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, path, version = line.decode("latin-1").split()
+    except ValueError:
+        raise ApiError(400, "malformed request line")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        length = -1
+    if length < 0:
+        raise ApiError(400, "invalid Content-Length header")
+    if length > MAX_BODY_BYTES:
+        raise ApiError(413, f"request body exceeds {MAX_BODY_BYTES} bytes")
+    body = await reader.readexactly(length) if length else b""
+
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+    return method.upper(), path, body, keep_alive
+
+
+def _response(status, payload, keep_alive):
+    if isinstance(payload, str):
+        data, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4"
+    else:
+        data, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+    head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("latin-1") + data
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=DEFAULT_WORKERS, billing_store=None):
+    """
+    Runs the API server until interrupted.
+    """
+    server = ApiServer(OptimizerService(workers=workers, billing_store=billing_store), host, port)
+
+    async def main():
+        await server.start()
+        print(f"Cloud Cost Optimizer API listening on {server.url}")
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the Cloud Cost Optimizer HTTP API.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--billing-store", default=None)
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers, args.billing_store)
@@ -0,0 +1,351 @@
+import csv
+import hashlib
+import json
+import os
+import re
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from .billing_store import DEFAULT_BATCH_SIZE, _open_text, import_json, write_segments
+from .metrics import get_metrics
+from .records import validate_billing
+from .synthetic_billing import BILLING_FIELDS
+
+# Approximate INR per unit of each billing currency; override with
+# BILLING_FX_RATES="USD=83.2,EUR=90.1" or import-billing --fx
+DEFAULT_FX_RATES = {
+    "INR": 1.0, "USD": 83.0, "EUR": 90.0, "GBP": 105.0, "JPY": 0.56,
+    "SGD": 62.0, "AUD": 55.0, "CAD": 61.0, "AED": 22.6,
+}
+
+# Provider export columns -> billing record fields. Each field lists the
+# column names seen in the provider's export variants, in preference order;
+# "date" feeds the month and "currency" the conversion to INR.
+PROVIDER_COLUMNS = {
+    "native": {field: (field,) for field in BILLING_FIELDS},
+    "aws": {  # Cost and Usage Report, legacy (lineItem/...) and CUR 2.0 (line_item_...) headers
+        "date": ("lineItem/UsageStartDate", "line_item_usage_start_date", "bill/BillingPeriodStartDate"),
+        "service": ("lineItem/ProductCode", "line_item_product_code", "product/ProductName",
+                    "product_product_name"),
+        "region": ("product/region", "product/regionCode", "product_region_code", "product_region"),
+        "resource_id": ("lineItem/ResourceId", "line_item_resource_id"),
+        "usage_type": ("lineItem/UsageType", "line_item_usage_type"),
+        "usage_quantity": ("lineItem/UsageAmount", "line_item_usage_amount"),
+        "unit": ("pricing/unit", "pricing_unit"),
+        "cost_inr": ("lineItem/UnblendedCost", "line_item_unblended_cost",
+                     "lineItem/BlendedCost", "line_item_blended_cost"),
+        "currency": ("lineItem/CurrencyCode", "line_item_currency_code"),
+        "desc": ("lineItem/LineItemDescription", "line_item_line_item_description"),
+    },
+    "gcp": {  # Cloud Billing export (BigQuery table exported to CSV/Parquet)
+        "date": ("usage_start_time", "Usage start date", "invoice.month"),
+        "service": ("service.description", "service_description", "Service description"),
+        "region": ("location.region", "location_region", "Region", "location.location"),
+        "resource_id": ("resource.name", "resource_name", "project.id", "Project ID"),
+        "usage_type": ("sku.description", "sku_description", "SKU description"),
+        "usage_quantity": ("usage.amount", "usage_amount", "Usage amount"),
+        "unit": ("usage.unit", "usage_unit", "Usage unit"),
+        "cost_inr": ("cost", "Cost"),
+        "currency": ("currency", "Currency"),
+        "desc": ("sku.description", "sku_description", "SKU description"),
+    },
+    "azure": {  # Cost Management cost details (EA / MCA / pay-as-you-go column names)
+        "date": ("Date", "UsageDate", "date"),
+        "service": ("MeterCategory", "meterCategory", "ServiceName", "serviceName"),
+        "region": ("ResourceLocation", "resourceLocation", "Location"),
+        "resource_id": ("ResourceId", "resourceId", "InstanceId", "ResourceName"),
+        "usage_type": ("MeterSubCategory", "meterSubCategory", "MeterName", "meterName"),
+        "usage_quantity": ("Quantity", "quantity", "UsageQuantity"),
+        "unit": ("UnitOfMeasure", "unitOfMeasure"),
+        "cost_inr": ("CostInBillingCurrency", "costInBillingCurrency", "Cost", "PreTaxCost", "cost"),
+        "currency": ("BillingCurrency", "billingCurrency", "BillingCurrencyCode", "Currency"),
+        "desc": ("MeterName", "meterName", "ProductName", "productName"),
+    },
+}
+# Used when an export has no currency column
+DEFAULT_CURRENCY = {"native": "INR", "aws": "USD", "gcp": "USD", "azure": "USD"}
+# CUR product codes -> the short service names used everywhere else
+AWS_SERVICE_NAMES = {
+    "AmazonEC2": "EC2", "AmazonRDS": "RDS", "AmazonS3": "S3", "AmazonCloudFront": "CloudFront",
+    "AWSLambda": "Lambda", "AmazonElastiCache": "ElastiCache", "AmazonDynamoDB": "DynamoDB",
+    "AWSELB": "ELB", "AmazonDocDB": "DocumentDB", "AmazonEKS": "EKS", "AmazonECS": "ECS",
+    "AmazonVPC": "VPC", "AWSDataTransfer": "Data Transfer", "AmazonEFS": "EFS",
+    "AmazonGlacier": "Glacier", "AmazonLightsail": "Lightsail",
+}
+# EC2 bills volumes and transfer under its own product code
+_AWS_USAGE_SERVICES = (("EBS:", "EBS"), ("DataTransfer", "Data Transfer"), ("NatGateway", "NAT Gateway"))
+
+_ISO_MONTH_RE = re.compile(r"^(\d{4})[-/](\d{1,2})")
+_US_DATE_RE = re.compile(r"^(\d{1,2})/\d{1,2}/(\d{4})")
+
+
+def parse_fx_rates(text):
+    """
+    Parses "USD=83.2,EUR=90.1" into {currency: INR rate}.
+    """
+    rates = {}
+    for item in filter(None, (part.strip() for part in (text or "").split(","))):
+        currency, _, rate = item.partition("=")
+        try:
+            rates[currency.strip().upper()] = float(rate)
+        except ValueError:
+            raise ValueError(f"Invalid exchange rate '{item}', expected CURRENCY=RATE")
+    return rates
+
+
+def fx_rates(overrides=None):
+    rates = dict(DEFAULT_FX_RATES)
+    rates.update(parse_fx_rates(os.getenv("BILLING_FX_RATES")))
+    rates.update(overrides or {})
+    return rates
+
+
+def detect_provider(header):
+    """
+    Picks the provider whose service and cost columns appear in the header.
+    """
+    names = set(header)
+    for provider in ("native", "aws", "gcp", "azure"):
+        columns = PROVIDER_COLUMNS[provider]
+        if any(c in names for c in columns["service"]) and any(c in names for c in columns["cost_inr"]):
+            return provider
+    raise ValueError("Unrecognised billing export: expected AWS CUR, GCP billing export, "
+                     f"Azure cost details or the native columns (header: {', '.join(header[:8])}...)")
+
+
+def _column_plan(header, provider):
+    """
+    Header positions for each mapped field (missing optional fields are left out).
+    """
+    index = {name.strip(): i for i, name in enumerate(header)}
+    plan = {}
+    for field, candidates in PROVIDER_COLUMNS[provider].items():
+        for name in candidates:
+            if name in index:
+                plan[field] = index[name]
+                break
+    return plan
+
+
+def _month(value):
+    match = _ISO_MONTH_RE.match(value)
+    if match:
+        return f"{match.group(1)}-{int(match.group(2)):02d}"
+    match = _US_DATE_RE.match(value)
+    if match:
+        return f"{match.group(2)}-{int(match.group(1)):02d}"
+    return "Unknown"
+
+
+def _aws_service(product_code, usage_type):
+    if product_code == "AmazonEC2":
+        for marker, service in _AWS_USAGE_SERVICES:
+            if marker in usage_type:
+                return service
+    return AWS_SERVICE_NAMES.get(product_code) or re.sub(r"^(Amazon|AWS)", "", product_code) or "Other"
+
+
+class ExportMapper:
+    """
+    Turns chunks of provider export rows into validated billing batches with
+    costs in INR. Dates, currencies and service names repeat across millions
+    of rows, so each distinct value is converted once and memoized.
+    """
+
+    def __init__(self, provider, header, rates):
+        self.provider = provider
+        self.width = len(header)
+        self.plan = _column_plan(header, provider)
+        self.rates = rates
+        self.default_currency = DEFAULT_CURRENCY[provider]
+        self._months = {}
+        self._services = {}
+
+    def columns(self, rows):
+        """
+        Maps a list of parsed rows ([str] or tuples) to a list of validated
+        columnar batches, one per currency in the chunk.
+        """
+        width = self.width
+        if any(len(row) < width for row in rows):
+            # Short rows would truncate every column in the transpose below
+            rows = [row if len(row) >= width else list(row) + [""] * (width - len(row))
+                    for row in rows]
+        raw = list(zip(*rows))
+
+        def column(field):
+            i = self.plan.get(field)
+            return list(raw[i]) if i is not None and i < len(raw) else None
+
+        columns = {field: column(field) for field in BILLING_FIELDS}
+        if self.provider != "native":
+            dates = column("date")
+            if dates is not None:
+                months = self._months
+                columns["month"] = [months.get(d) or months.setdefault(d, _month(str(d)))
+                                    for d in dates]
+        if self.provider == "aws" and columns["service"] is not None:
+            usage_types = columns["usage_type"] or [""] * len(rows)
+            services = self._services
+            columns["service"] = [
+                services.get(key) or services.setdefault(key, _aws_service(*key))
+                for key in zip(columns["service"], usage_types)
+            ]
+
+        currencies = column("currency")
+        groups = {self.default_currency: None}
+        if currencies is not None:
+            distinct = set(currencies)
+            if len(distinct) > 1:
+                groups = {c: [i for i, value in enumerate(currencies) if value == c] for c in distinct}
+            elif distinct:
+                groups = {distinct.pop() or self.default_currency: None}
+
+        batches = []
+        for currency, indexes in groups.items():
+            part = {f: v for f, v in columns.items() if v is not None}
+            if indexes is not None:
+                part = {f: [v[i] for i in indexes] for f, v in part.items()}
+            batch = validate_billing(part).columns
+            rate = self.rate(currency or self.default_currency)
+            if rate != 1:
+                batch["cost_inr"] = [round(c * rate, 4) for c in batch["cost_inr"]]
+            batches.append(batch)
+        return batches
+
+    def rate(self, currency):
+        try:
+            return self.rates[currency.strip().upper()]
+        except KeyError:
+            raise ValueError(f"No exchange rate for currency '{currency}'; pass --fx {currency}=RATE "
+                             f"or set BILLING_FX_RATES")
+
+
+def _iter_csv_rows(path, batch_size):
+    with _open_text(path) as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        yield header or []
+        rows = []
+        for row in reader:
+            rows.append(row)
+            if len(rows) >= batch_size:
+                yield rows
+                rows = []
+        if rows:
+            yield rows
+
+
+def _iter_parquet_rows(path, batch_size):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError(f"Reading {path} requires pyarrow (pip install pyarrow)")
+    parquet = pq.ParquetFile(path)
+    header = parquet.schema_arrow.names
+    yield header
+    for record_batch in parquet.iter_batches(batch_size=batch_size):
+        columns = [record_batch.column(i).to_pylist() for i in range(record_batch.num_columns)]
+        yield [tuple("" if v is None else v for v in row) for row in zip(*columns)]
+
+
+def iter_export_batches(path, provider=None, batch_size=DEFAULT_BATCH_SIZE, rates=None):
+    """
+    Streams a billing export (.csv, .csv.gz or .parquet) as validated
+    columnar batches in the project's record schema, converting costs to INR.
+    Only one chunk of rows is held in memory at a time. provider is "aws",
+    "gcp", "azure" or "native"; detected from the header when None.
+    """
+    reader = _iter_parquet_rows if path.lower().endswith(".parquet") else _iter_csv_rows
+    chunks = reader(path, batch_size)
+    header = [str(name).strip().lstrip("﻿") for name in next(chunks)]
+    if not header:
+        return
+    provider = provider or detect_provider(header)
+    mapper = ExportMapper(provider, header, rates or fx_rates())
+    missing = [f for f in ("service", "cost_inr") if f not in mapper.plan]
+    if missing:
+        raise ValueError(f"{path} has no {' or '.join(missing)} column for a {provider} export")
+
+    for rows in chunks:
+        yield from mapper.columns(rows)
+
+
+class BillingExports:
+    """
+    A set of export files read lazily, file after file. Like a BillingStore
+    it exposes iter_batches(), so analyze_costs and the pipeline consume it
+    without the records ever being materialized.
+    """
+
+    def __init__(self, paths, provider=None, rates=None, batch_size=DEFAULT_BATCH_SIZE):
+        self.paths = list(paths)
+        self.provider = provider
+        self.rates = rates
+        self.batch_size = batch_size
+
+    def iter_batches(self, batch_size=None, columns=None):
+        for path in self.paths:
+            for batch in iter_export_batches(path, self.provider, batch_size or self.batch_size,
+                                             self.rates):
+                yield batch if columns is None else {c: batch[c] for c in columns}
+
+    def fingerprint(self):
+        """
+        Changes whenever a file is modified or the mapping options change.
+        """
+        stats = [(path, os.path.getsize(path), os.path.getmtime(path)) for path in self.paths]
+        payload = json.dumps([stats, self.provider, self.rates], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _ingest_file(job):
+    """
+    Worker: parses one export into staged segments of the store directory.
+    """
+    path, store_path, provider, rates, batch_size = job
+    prefix = f".staging-{uuid.uuid4().hex[:12]}"
+    batches = iter_export_batches(path, provider, batch_size, rates)
+    return write_segments(store_path, batches, prefix)
+
+
+def import_exports(paths, store, provider=None, workers=None, rates=None,
+                   batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Imports export files into a BillingStore, parsing up to `workers` files
+    in parallel processes (default: one per CPU, at most one per file). Each
+    worker writes its own segments; they are committed to the manifest in
+    the order of paths. Returns {path: rows imported}.
+    """
+    rates = rates or fx_rates()
+    jobs = [(path, store.path, provider, rates, batch_size) for path in paths]
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    with get_metrics().timer("billing_export_import_seconds"):
+        if workers <= 1:
+            staged = [_ingest_file(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                staged = list(pool.map(_ingest_file, jobs))
+    imported = {path: store.commit_segments(segments) for path, segments in zip(paths, staged)}
+    get_metrics().inc("billing_export_rows_total", sum(imported.values()))
+    return imported
+
+
+def import_billing_files(paths, store, provider=None, workers=None, rates=None):
+    """
+    Imports JSON (mock_billing.json style) and export files into the store.
+    Returns {path: rows imported}.
+    """
+    imported = {}
+    exports = []
+    for path in paths:
+        name = path.lower()
+        if name.endswith(".json"):
+            imported[path] = import_json(path, store)
+        elif name.endswith((".csv", ".csv.gz", ".parquet")):
+            exports.append(path)
+        else:
+            raise ValueError(f"Unsupported billing file type: {path}")
+    if exports:
+        imported.update(import_exports(exports, store, provider, workers, rates))
+    return imported
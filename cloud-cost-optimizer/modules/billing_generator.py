@@ -1,22 +1,17 @@
-from .llm_client import query_llm, extract_json_from_text
-import json
-import random
-
-def generate_synthetic_billing(profile):
-    """
-    Generates realistic, budget-aware synthetic cloud billing data based on the project profile.
-    """
-    if not profile:
-        return None
+from .llm_client import query_llm, query_llm_stream, extract_json_from_text, parses_as
+from .json_stream import iter_json_items
+from .synthetic_billing import generate_local_billing
+from .prompt_budget import build_prompt, log_compaction, TextField, MappingField
+import os
 
+def _billing_messages(profile):
     budget = profile.get('budget_inr_per_month', 5000)
-    tech_stack = json.dumps(profile.get('tech_stack', {}))
     
-    prompt = f"""
+    template = """
     You are a Cloud Billing Simulator.
     Generate a JSON list of 10-15 realistic cloud billing records for the following project.
     
-    Project: {profile.get('name')}
+    Project: {project_name}
     Budget: {budget} INR per month
     Tech Stack: {tech_stack}
     
@@ -29,13 +24,37 @@ def generate_synthetic_billing(profile):
     Return ONLY the JSON list.
     """
     
-    messages = [{"role": "user", "content": prompt}]
+    prompt, report = build_prompt(template, {
+        "project_name": TextField(profile.get('name')),
+        "budget": TextField(budget),
+        "tech_stack": MappingField(profile.get('tech_stack', {})),
+    }, name="billing")
+    log_compaction(report)
+    
+    return [{"role": "user", "content": prompt}]
+
+def generate_synthetic_billing(profile, source=None):
+    """
+    Generates realistic, budget-aware synthetic cloud billing data based on the project profile.
+
+    source selects the generator: "llm" (default) or "local" for the seeded,
+    LLM-free engine in synthetic_billing. Defaults to the BILLING_SOURCE
+    environment variable.
+    """
+    if not profile:
+        return None
+
+    source = source or os.getenv("BILLING_SOURCE", "llm")
+    if source == "local":
+        return generate_local_billing(profile)
+
+    messages = _billing_messages(profile)
     
     try:
-        response_text = query_llm(messages, max_tokens=3000, temperature=0.4)
+        response_text = query_llm(messages, max_tokens=3000, temperature=0.4, validate=parses_as("billing"))
         
         if response_text:
-            billing_data = extract_json_from_text(response_text)
+            billing_data = extract_json_from_text(response_text, schema="billing")
             
             if billing_data and isinstance(billing_data, list):
                 return billing_data
@@ -49,3 +68,25 @@ def generate_synthetic_billing(profile):
     except Exception as e:
         print(f"Error during billing generation: {e}")
         return None
+
+def stream_synthetic_billing(profile, source=None):
+    """
+    Streaming variant of generate_synthetic_billing: yields each billing record
+    as soon as the LLM has finished emitting it.
+    """
+    if not profile:
+        return
+
+    source = source or os.getenv("BILLING_SOURCE", "llm")
+    if source == "local":
+        yield from generate_local_billing(profile) or []
+        return
+
+    messages = _billing_messages(profile)
+
+    try:
+        yield from iter_json_items(query_llm_stream(messages, max_tokens=3000, temperature=0.4,
+                                                    validate=parses_as("billing")),
+                                   schema="billing")
+    except Exception as e:
+        print(f"Error during billing generation: {e}")
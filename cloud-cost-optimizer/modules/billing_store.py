@@ -0,0 +1,384 @@
+import csv
+import gzip
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import threading
+import uuid
+from array import array
+
+from .synthetic_billing import BILLING_FIELDS
+from .records import validate_billing
+
+MANIFEST_FILE = "manifest.json"
+DICTIONARY_FILE = "dictionaries.json"
+NUMERIC_COLUMNS = ("usage_quantity", "cost_inr")
+STRING_COLUMNS = tuple(f for f in BILLING_FIELDS if f not in NUMERIC_COLUMNS)
+DEFAULT_BATCH_SIZE = 65536
+CODE_TYPE = 'I'
+NUMBER_TYPE = 'd'
+# Same fallbacks the cost analyzer uses for missing fields
+_STRING_DEFAULTS = {
+    "month": "Unknown", "service": "Other", "resource_id": "Unknown", "region": "Unknown",
+    "usage_type": "", "unit": "", "desc": "",
+}
+
+
+# One lock per store directory, shared by every BillingStore in the process
+_STORE_LOCKS = {}
+_STORE_LOCKS_GUARD = threading.Lock()
+
+
+def _store_lock(path):
+    with _STORE_LOCKS_GUARD:
+        return _STORE_LOCKS.setdefault(os.path.realpath(path), threading.Lock())
+
+
+def _file_name(column):
+    return f"{column}.codes" if column in STRING_COLUMNS else f"{column}.f64"
+
+
+class SegmentWriter:
+    """
+    Appends rows for one month to a segment directory.
+
+    Numeric columns are written as raw float64 arrays, string columns as
+    uint32 codes into per-segment dictionaries. Rows are flushed per chunk,
+    so memory stays bounded by the dictionary sizes.
+    """
+
+    def __init__(self, path, month):
+        self.path = path
+        self.month = month
+        self.rows = 0
+        os.makedirs(path, exist_ok=True)
+        self._files = {c: open(os.path.join(path, _file_name(c)), 'wb') for c in BILLING_FIELDS}
+        self._dictionaries = {c: {} for c in STRING_COLUMNS}
+
+    def write_columns(self, columns, n):
+        for column in STRING_COLUMNS:
+            values = columns.get(column)
+            if values is None:
+                values = [_STRING_DEFAULTS[column]] * n
+            mapping = self._dictionaries[column]
+            setdefault = mapping.setdefault
+            codes = array(CODE_TYPE, [setdefault(v, len(mapping)) for v in values])
+            codes.tofile(self._files[column])
+        for column in NUMERIC_COLUMNS:
+            # Numbers were coerced by _typed_columns; arrays are written as-is
+            values = columns.get(column)
+            if values is None:
+                values = array(NUMBER_TYPE, bytes(8 * n))
+            elif not isinstance(values, array):
+                values = array(NUMBER_TYPE, values)
+            values.tofile(self._files[column])
+        self.rows += n
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        dictionaries = {c: list(mapping) for c, mapping in self._dictionaries.items()}
+        with open(os.path.join(self.path, DICTIONARY_FILE), 'w', encoding='utf-8') as f:
+            json.dump(dictionaries, f)
+
+
+class Segment:
+    """
+    Read-only, memory-mapped view of one segment.
+    """
+
+    def __init__(self, path, info):
+        self.path = path
+        self.name = info["name"]
+        self.month = info["month"]
+        self.rows = info["rows"]
+        with open(os.path.join(path, DICTIONARY_FILE), 'r', encoding='utf-8') as f:
+            self.dictionaries = json.load(f)
+
+    def _map_column(self, column):
+        file_path = os.path.join(self.path, _file_name(column))
+        with open(file_path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped).cast(CODE_TYPE if column in STRING_COLUMNS else NUMBER_TYPE)
+        return mapped, view
+
+    def iter_batches(self, batch_size=DEFAULT_BATCH_SIZE, columns=None):
+        """
+        Yields columnar batches (field -> list). String columns are decoded
+        through the segment dictionary, so repeated values share one object.
+        """
+        if not self.rows:
+            return
+        columns = columns or BILLING_FIELDS
+        maps = {c: self._map_column(c) for c in columns}
+        try:
+            for start in range(0, self.rows, batch_size):
+                end = min(start + batch_size, self.rows)
+                batch = {}
+                for column, (_, view) in maps.items():
+                    values = view[start:end].tolist()
+                    if column in STRING_COLUMNS:
+                        values = list(map(self.dictionaries[column].__getitem__, values))
+                    batch[column] = values
+                yield batch
+        finally:
+            for mapped, view in maps.values():
+                view.release()
+                mapped.close()
+
+
+class BillingStore:
+    """
+    Columnar on-disk billing store: one segment directory per appended month
+    plus a manifest.json listing segments in append order.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._lock = _store_lock(path)
+        self.manifest = self._load_manifest()
+
+    @staticmethod
+    def exists(path):
+        return os.path.exists(os.path.join(path, MANIFEST_FILE))
+
+    def _manifest_path(self):
+        return os.path.join(self.path, MANIFEST_FILE)
+
+    def _load_manifest(self):
+        manifest_path = self._manifest_path()
+        if not os.path.exists(manifest_path):
+            return {"version": 1, "next_sequence": 0, "segments": []}
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_manifest(self):
+        tmp_path = f"{self._manifest_path()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=4)
+        os.replace(tmp_path, self._manifest_path())
+
+    @property
+    def months(self):
+        return sorted({s["month"] for s in self.manifest["segments"]})
+
+    @property
+    def rows(self):
+        return sum(s["rows"] for s in self.manifest["segments"])
+
+    def fingerprint(self):
+        """
+        Changes whenever a segment is appended or dropped.
+        """
+        payload = json.dumps(self.manifest["segments"], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def append(self, batches):
+        """
+        Appends record batches (lists of dicts or columnar dicts). Rows are
+        routed into one new segment per month they belong to. Returns the
+        number of rows written. Safe to call from several threads at once.
+        """
+        staged = write_segments(self.path, batches, f".staging-{uuid.uuid4().hex[:12]}")
+        return self.commit_segments(staged)
+
+    def commit_segments(self, staged):
+        """
+        Adds segments written by write_segments() (possibly in other
+        processes) to the manifest, in the given order. Returns the rows added.
+        The manifest is re-read under the store lock, so commits through other
+        BillingStore instances of the same directory are never lost.
+        """
+        with self._lock:
+            manifest = self._load_manifest()
+            sequence = manifest.get("next_sequence", len(manifest["segments"]))
+            segments = list(manifest["segments"])
+            written = 0
+            for segment in staged:
+                name = f"{segment['month']}-{sequence:05d}"
+                sequence += 1
+                os.replace(segment["path"], os.path.join(self.path, name))
+                segments.append({
+                    "name": name,
+                    "month": segment["month"],
+                    "rows": segment["rows"],
+                })
+                written += segment["rows"]
+            # Swapped in whole, so readers iterating the old list are unaffected
+            self.manifest = {**manifest, "segments": segments, "next_sequence": sequence}
+            self._save_manifest()
+        return written
+
+    def drop_month(self, month):
+        """
+        Removes every segment of a month (e.g. before re-importing it).
+        """
+        with self._lock:
+            manifest = self._load_manifest()
+            keep = [info for info in manifest["segments"] if info["month"] != month]
+            dropped = [info for info in manifest["segments"] if info["month"] == month]
+            self.manifest = {**manifest, "segments": keep}
+            # The manifest goes first: a crash in between leaves orphaned
+            # directories, never manifest entries pointing at deleted ones
+            self._save_manifest()
+            for info in dropped:
+                shutil.rmtree(os.path.join(self.path, info["name"]), ignore_errors=True)
+
+    def segments(self, months=None):
+        for info in self.manifest["segments"]:
+            if months is None or info["month"] in months:
+                yield Segment(os.path.join(self.path, info["name"]), info)
+
+    def iter_batches(self, batch_size=DEFAULT_BATCH_SIZE, months=None, columns=None):
+        """
+        Streams columnar batches over all (or the selected months') segments.
+        """
+        for segment in self.segments(months):
+            yield from segment.iter_batches(batch_size, columns)
+
+    def read_records(self, months=None):
+        """
+        Materializes the store as a list of record dicts (small stores only).
+        """
+        records = []
+        for batch in self.iter_batches(months=months):
+            names = list(batch)
+            records.extend(dict(zip(names, row)) for row in zip(*batch.values()))
+        return records
+
+
+def write_segments(path, batches, prefix):
+    """
+    Writes batches into new segment directories under path (one per month,
+    named prefix-month) without touching the manifest; commit them with
+    BillingStore.commit_segments. Returns [{"path", "month", "rows"}].
+    """
+    writers = {}
+    try:
+        for batch in batches:
+            for month, columns, n in _split_by_month(batch):
+                writer = writers.get(month)
+                if writer is None:
+                    writer = SegmentWriter(os.path.join(path, f"{prefix}-{month}"), month)
+                    writers[month] = writer
+                writer.write_columns(columns, n)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return [{"path": w.path, "month": w.month, "rows": w.rows} for w in writers.values()]
+
+
+def _split_by_month(batch):
+    """
+    Yields (month, columns, n) groups from a list-of-dicts or columnar batch.
+    """
+    batch = _typed_columns(batch)
+    months = batch.get("month")
+    n = len(batch.get("cost_inr") or [])
+    if not n:
+        return
+    if months is None or len(set(months)) == 1:
+        yield (months[0] if months else "Unknown"), batch, n
+        return
+
+    groups = {}
+    for index, month in enumerate(months):
+        groups.setdefault(month, []).append(index)
+    for month, indexes in groups.items():
+        columns = {}
+        for field, values in batch.items():
+            columns[field] = [values[i] for i in indexes]
+        yield month, columns, len(indexes)
+
+
+def _typed_columns(batch):
+    """
+    Returns batch as columns with float64 numeric columns. Columnar batches
+    of plain numbers (generators, validated imports) pass straight through;
+    record lists and columns holding strings like "1,200" or None go through
+    validate_billing, which also drops unparseable rows.
+    """
+    if isinstance(batch, dict):
+        numbers = {}
+        try:
+            for column in NUMERIC_COLUMNS:
+                values = batch.get(column)
+                if values is not None and not isinstance(values, array):
+                    numbers[column] = array(NUMBER_TYPE, values)
+        except TypeError:
+            pass
+        else:
+            return {**batch, **numbers} if numbers else batch
+    return validate_billing(batch).columns
+
+
+def _open_text(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, 'r', encoding='utf-8', newline='')
+
+
+def iter_csv_batches(path, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Streams a CSV export with the billing record header as columnar batches.
+    """
+    with _open_text(path) as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return
+        index = {name.strip(): i for i, name in enumerate(header)}
+        missing = [c for c in ("service", "cost_inr") if c not in index]
+        if missing:
+            raise ValueError(f"CSV {path} is missing required columns: {', '.join(missing)}")
+
+        rows = []
+        for row in reader:
+            rows.append(row)
+            if len(rows) >= batch_size:
+                yield _rows_to_columns(rows, index)
+                rows = []
+        if rows:
+            yield _rows_to_columns(rows, index)
+
+
+def _rows_to_columns(rows, index):
+    columns = {}
+    for field in BILLING_FIELDS:
+        i = index.get(field)
+        if i is None:
+            continue
+        columns[field] = [row[i] if i < len(row) else "" for row in rows]
+    # Costs like "1,200" or "₹300" are parsed and names interned in one pass
+    return validate_billing(columns).columns
+
+
+def import_json(path, store):
+    """
+    Imports a mock_billing.json-style list of records. Returns rows written.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        records = json.load(f)
+    return store.append([validate_billing(records).columns])
+
+
+def import_csv(path, store, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Streams a (optionally gzipped) CSV billing export into the store.
+    """
+    return store.append(iter_csv_batches(path, batch_size))
+
+
+def import_billing_file(path, store):
+    """
+    Imports a JSON or CSV billing file, chosen by extension.
+    """
+    name = path.lower()
+    if name.endswith(".json"):
+        return import_json(path, store)
+    if name.endswith(".csv") or name.endswith(".csv.gz"):
+        return import_csv(path, store)
+    raise ValueError(f"Unsupported billing file type: {path}")
@@ -0,0 +1,403 @@
+import calendar
+import csv
+import json
+import os
+import time
+from datetime import datetime
+
+from .billing_exports import ExportMapper, detect_provider, fx_rates, iter_export_batches
+from .billing_store import DEFAULT_BATCH_SIZE
+from .cost_analyzer import TREND_DIMENSIONS, CostAggregator, summarize_aggregate
+from .metrics import get_metrics
+from .records import validate_billing
+
+# Fractions of the monthly budget that raise an alert when crossed
+DEFAULT_THRESHOLDS = (0.8, 1.0)
+# Relative change of the per-service costs that warrants new recommendations
+MATERIAL_CHANGE = 0.05
+# Recommendations wait for the billing data to stay put this long...
+DEFAULT_DEBOUNCE_SECONDS = 30.0
+# ...but never longer than this after the first material change
+MAX_WAIT_FACTOR = 10
+WATCH_SUFFIXES = (".csv", ".csv.gz", ".parquet", ".json")
+# Bytes before the read offset remembered to tell an append from a rewrite
+_MARK_BYTES = 64
+
+
+def month_end_projection(month, spend, now=None):
+    """
+    Projects a month's spend to its last day at the rate seen so far. Months
+    that are already over (or ahead of the clock) are returned as they are.
+    """
+    now = now or datetime.now()
+    year, number = int(month[:4]), int(month[5:])
+    if (year, number) != (now.year, now.month):
+        return spend
+    days = calendar.monthrange(year, number)[1]
+    elapsed = (now - datetime(year, number, 1)).total_seconds() / 86400
+    # A few hours of data would extrapolate noise; count at least one day
+    return spend * days / max(elapsed, 1.0)
+
+
+class _WatchedFile:
+    """
+    What has been read from one billing file: its size and mtime at the last
+    read, the byte offset after the last complete CSV row, the bytes just
+    before it and the file's own aggregate (to retract it if it is rewritten).
+    """
+
+    __slots__ = ("path", "size", "mtime", "offset", "mark", "mapper", "aggregator")
+
+    def __init__(self, path):
+        self.path = path
+        self.size = self.mtime = None
+        self.offset = 0
+        self.mark = b""
+        self.mapper = None
+        self.aggregator = CostAggregator(TREND_DIMENSIONS)
+
+
+class BillingDirectory:
+    """
+    Incremental reader of a directory of billing files (native CSV or
+    provider exports, see billing_exports). Plain .csv files are tailed from
+    the last complete row, so appending to a file costs only the new rows;
+    .csv.gz, .parquet and .json files, and .csv files that shrink or change
+    before the read offset, are retracted and read again.
+    """
+
+    def __init__(self, path, provider=None, rates=None, batch_size=DEFAULT_BATCH_SIZE):
+        self.path = path
+        self.provider = provider
+        self.rates = rates or fx_rates()
+        self.batch_size = batch_size
+        self.files = {}
+        # (path, message) for files the last scan could not read
+        self.errors = []
+
+    def scan(self, aggregator):
+        """
+        Applies every change since the previous scan to aggregator. Returns
+        (new rows read, files retracted).
+        """
+        try:
+            with os.scandir(self.path) as entries:
+                paths = sorted(e.path for e in entries if e.is_file() and not e.name.startswith(".")
+                               and e.name.lower().endswith(WATCH_SUFFIXES))
+        except FileNotFoundError:
+            paths = []
+
+        rows = retracted = 0
+        self.errors = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            state = self.files.get(path)
+            if state is not None and (stat.st_size, stat.st_mtime_ns) == (state.size, state.mtime):
+                continue
+            if state is not None and not self._appended(state, stat):
+                aggregator.merge(state.aggregator, -1)
+                retracted += 1
+                state = None
+            if state is None:
+                state = self.files[path] = _WatchedFile(path)
+            state.size, state.mtime = stat.st_size, stat.st_mtime_ns
+            try:
+                for batch in self._read(state):
+                    state.aggregator.update_columns(batch)
+                    aggregator.update_columns(batch)
+                    rows += len(batch["cost_inr"])
+            except (ValueError, OSError, csv.Error) as e:
+                # Stays recorded with what was read; retried once the file changes
+                self.errors.append((path, str(e)))
+
+        for path in set(self.files) - set(paths):
+            aggregator.merge(self.files.pop(path).aggregator, -1)
+            retracted += 1
+        return rows, retracted
+
+    def iter_batches(self, batch_size=None, columns=None):
+        """
+        Reads every tracked file in full, for consumers that need the rows
+        themselves (the resource-level recommendation rules).
+        """
+        for path in sorted(self.files):
+            for batch in self._read(_WatchedFile(path)):
+                yield batch if columns is None else {c: batch[c] for c in columns}
+
+    def _appended(self, state, stat):
+        if not state.path.lower().endswith(".csv") or stat.st_size < state.offset:
+            return False
+        with open(state.path, "rb") as f:
+            f.seek(state.offset - len(state.mark))
+            return f.read(len(state.mark)) == state.mark
+
+    def _read(self, state):
+        name = state.path.lower()
+        if name.endswith(".csv"):
+            return self._tail_csv(state)
+        if name.endswith(".json"):
+            return self._read_json(state.path)
+        return iter_export_batches(state.path, self.provider, self.batch_size, self.rates)
+
+    def _read_json(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            records = json.load(f)
+        if records:
+            yield from validate_billing(records).iter_batches(self.batch_size)
+
+    def _tail_csv(self, state):
+        """
+        Parses the complete lines added after state.offset. A line still being
+        written (no newline yet) is left for the next scan.
+        """
+        consumed = 0
+
+        def lines(f):
+            nonlocal consumed
+            for line in f:
+                if not line.endswith(b"\n"):
+                    return
+                consumed += len(line)
+                yield line.decode("utf-8")
+
+        with open(state.path, "rb") as f:
+            start = state.offset
+            f.seek(start)
+            reader = csv.reader(lines(f))
+            if state.mapper is None:
+                header = [name.strip().lstrip("﻿") for name in next(reader, None) or []]
+                if not header:
+                    return
+                provider = self.provider or detect_provider(header)
+                mapper = ExportMapper(provider, header, self.rates)
+                missing = [c for c in ("service", "cost_inr") if c not in mapper.plan]
+                if missing:
+                    raise ValueError(f"no {' or '.join(missing)} column for a {provider} export")
+                state.mapper, state.offset = mapper, start + consumed
+
+            rows = []
+            for row in reader:
+                if row:
+                    rows.append(row)
+                if len(rows) >= self.batch_size:
+                    yield from state.mapper.columns(rows)
+                    state.offset, rows = start + consumed, []
+            if rows:
+                yield from state.mapper.columns(rows)
+            state.offset = start + consumed
+
+            f.seek(max(state.offset - _MARK_BYTES, 0))
+            state.mark = f.read(min(state.offset, _MARK_BYTES))
+
+
+def stdout_sink(alert):
+    print(f"[{alert['severity'].upper()}] {alert['message']}")
+
+
+class FileSink:
+    """
+    Appends each alert to a JSON Lines file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def __call__(self, alert):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(alert, ensure_ascii=False) + "\n")
+
+
+class WebhookSink:
+    """
+    POSTs each alert as JSON to a URL (Slack-style incoming webhooks, a
+    local stub, ...). Delivery failures are logged and counted, never raised.
+    """
+
+    def __init__(self, url, timeout=5.0):
+        self.url = url
+        self.timeout = timeout
+
+    def __call__(self, alert):
+        import requests
+
+        try:
+            response = requests.post(self.url, json=alert, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            get_metrics().inc("budget_alert_webhook_errors_total")
+            print(f"Alert webhook failed: {e}")
+
+
+class BudgetWatcher:
+    """
+    Continuous budget tracking over a billing directory. Each poll() folds
+    only what changed on disk into a running CostAggregator, compares the
+    latest month's spend and its month-end projection with the monthly
+    budget, and sends an alert to the
+    sinks the first time a threshold is crossed (again only after dropping
+    below it). Recommendations are regenerated when the per-service costs
+    move by more than material_change since the last run, once the data has
+    been quiet for `debounce` seconds.
+    """
+
+    def __init__(self, profile, billing, sinks=(stdout_sink,), thresholds=DEFAULT_THRESHOLDS,
+                 material_change=MATERIAL_CHANGE, debounce=DEFAULT_DEBOUNCE_SECONDS,
+                 on_recommendations=None, recommend=None, clock=time.monotonic, now=datetime.now):
+        self.profile = profile
+        self.budget = profile.get("budget_inr_per_month", 0) or 0
+        self.billing = billing if hasattr(billing, "scan") else BillingDirectory(billing)
+        self.sinks = list(sinks)
+        self.thresholds = sorted(thresholds)
+        self.material_change = material_change
+        self.debounce = debounce
+        self.on_recommendations = on_recommendations
+        self.recommend = recommend
+        self.clock = clock
+        self.now = now
+        self.aggregator = CostAggregator(TREND_DIMENSIONS)
+        self.analysis = None
+        self.status = None
+        self.recommendations = None
+        self._crossed = set()
+        self._baseline = None
+        self._pending_since = None
+        self._last_change = None
+
+    def poll(self):
+        """
+        One watch step. Returns True when new billing data was applied.
+        """
+        metrics = get_metrics()
+        with metrics.timer("budget_watch_poll_seconds"):
+            rows, retracted = self.billing.scan(self.aggregator)
+            changed = bool(rows or retracted)
+            alerts = [self._alert("file_error", "warning", f"Skipping {path}: {error}", path=path)
+                      for path, error in getattr(self.billing, "errors", ())]
+            if changed:
+                metrics.inc("budget_watch_rows_total", rows)
+                self.analysis = (summarize_aggregate(self.profile, self.aggregator)
+                                 if self.aggregator.record_count else None)
+                self.status = self._status()
+                alerts += self._check_thresholds()
+                if self._material():
+                    self._pending_since = self._pending_since or self.clock()
+                    self._last_change = self.clock()
+        for alert in alerts:
+            self.emit(alert)
+        if self._due():
+            self._recommend()
+        return changed
+
+    def emit(self, alert):
+        get_metrics().inc("budget_alerts_total", type=alert["type"])
+        for sink in self.sinks:
+            sink(alert)
+
+    def _status(self):
+        if self.analysis is None:
+            return None
+        # The budget is monthly: compare it with the latest month, not with
+        # the analysis total over every month in the directory
+        monthly = self.analysis.get("monthly_costs") or {}
+        month = max(monthly) if monthly else None
+        spend = monthly.get(month, 0.0)
+        return {
+            "month": month,
+            "month_spend": round(spend, 2),
+            "projected_month_end": round(month_end_projection(month, spend, self.now()), 2)
+                                   if month else None,
+            "budget": self.budget,
+            "budget_variance": round(spend - self.budget, 2),
+            "is_over_budget": spend > self.budget,
+            "records": self.aggregator.record_count,
+        }
+
+    def _alert(self, kind, severity, message, **fields):
+        return {"type": kind, "severity": severity, "message": message,
+                "time": self.now().isoformat(timespec="seconds"), **fields}
+
+    def _check_thresholds(self):
+        status = self.status
+        if status is None:
+            self._crossed.clear()
+            return []
+        month, budget = status["month"], self.budget
+        if not (budget and month):
+            return []
+        spend, projected = status["month_spend"], status["projected_month_end"]
+        # Going over the budget itself is always checked and takes the 100% slot
+        spend_checks = [(t, ("spend", month, t), spend >= t * budget) for t in self.thresholds if t != 1]
+        spend_checks.append((1.0, ("over_budget", month, 1.0), status["is_over_budget"]))
+        checks = [(key, crossed) for _, key, crossed in sorted(spend_checks)]
+        checks += [(("projected", month, t), projected >= t * budget) for t in self.thresholds]
+
+        # Thresholds ascend, so a jump across several reports only the highest
+        newly_crossed = {}
+        for key, crossed in checks:
+            if not crossed:
+                self._crossed.discard(key)
+            elif key not in self._crossed:
+                self._crossed.add(key)
+                newly_crossed["projected" if key[0] == "projected" else "spend"] = key
+        return [self._threshold_alert(key) for key in newly_crossed.values()]
+
+    def _threshold_alert(self, key):
+        status, budget = self.status, self.budget
+        kind, month, threshold = key
+        severity = "critical" if threshold >= 1 else "warning"
+        if kind == "over_budget":
+            value = status["month_spend"]
+            message = (f"{month} spend ₹{value:,.0f} is over the ₹{budget:,.0f} budget "
+                       f"by ₹{status['budget_variance']:,.0f}")
+        elif kind == "spend":
+            value = status["month_spend"]
+            message = f"{month} spend ₹{value:,.0f} reached {threshold:.0%} of the ₹{budget:,.0f} budget"
+        else:
+            value = status["projected_month_end"]
+            message = (f"{month} is projected to end at ₹{value:,.0f}, {value / budget:.0%} of the "
+                       f"₹{budget:,.0f} budget (alert at {threshold:.0%})")
+        return self._alert(kind, severity, message, month=month, threshold=threshold,
+                           value=value, budget=budget)
+
+    def _material(self):
+        """
+        Whether the per-service costs (what the recommendation rules work
+        from) or the over-budget state moved enough since the last run.
+        """
+        if self.analysis is None:
+            return False
+        if self._baseline is None:
+            return True
+        costs, over_budget = self._baseline
+        if over_budget != self.status["is_over_budget"]:
+            return True
+        current = self.analysis["service_costs"]
+        base_total = sum(costs.values())
+        moved = sum(abs(current.get(s, 0) - costs.get(s, 0)) for s in costs.keys() | current.keys())
+        return moved > self.material_change * max(base_total, 1e-9)
+
+    def _due(self):
+        if self._pending_since is None:
+            return False
+        now = self.clock()
+        return (now - self._last_change >= self.debounce
+                or now - self._pending_since >= self.debounce * MAX_WAIT_FACTOR)
+
+    def _recommend(self):
+        self._pending_since = self._last_change = None
+        self._baseline = (dict(self.analysis["service_costs"]), self.status["is_over_budget"])
+        recommend = self.recommend
+        if recommend is None:
+            from .recommendation_engine import generate_recommendations as recommend
+        with get_metrics().timer("budget_watch_recommend_seconds"):
+            self.recommendations = recommend(self.profile, self.analysis, self.billing)
+        get_metrics().inc("budget_watch_recommendations_total")
+        if self.on_recommendations is not None:
+            self.on_recommendations(self.recommendations, self.analysis)
+        self.emit(self._alert(
+            "recommendations", "info",
+            f"Cost picture changed: {len(self.recommendations)} recommendations regenerated",
+            count=len(self.recommendations)))
@@ -1,42 +1,309 @@
+import heapq
+import time
+from itertools import islice
+from operator import itemgetter
 
+from .cost_trends import analyze_trends
+from .metrics import get_metrics
+from .records import validate_billing
 
+DEFAULT_BATCH_SIZE = 50000
+ALL_DIMENSIONS = ("service", "region", "resource", "month")
+# What the monthly trends, anomalies and forecast roll up over
+TREND_DIMENSIONS = ("service", "month")
 
-def analyze_costs(profile, billing_data):
+
+class CostAggregator:
     """
-    Analyzes costs against budget.
+    Single-pass, bounded-memory cost aggregator.
+
+    Billing records are fed in chunks (lists of record dicts or columnar
+    batches, i.e. a dict mapping field name -> list of values). The total
+    and the per-service costs are always kept. Costs are also accumulated
+    per cell of the tracked `dimensions` (any of "service", "region",
+    "resource", "month"), so memory grows with the number of distinct
+    cells, not with the number of line items, and the other rollups are
+    derived from the cells on demand. With no dimensions beyond "service"
+    (the fast path) no cell keys are built at all.
     """
-    if not profile or not billing_data:
-        print("Missing profile or billing data for analysis.")
-        return None
 
-    project_name = profile.get('name', 'Unknown Project')
+    def __init__(self, dimensions=ALL_DIMENSIONS):
+        self.total_cost = 0
+        self.record_count = 0
+        self.service_costs = {}
+        self.cells = {}
+        self.dimensions = tuple(dimensions)
+        self._fields = [_DIMENSION_FIELDS[d] for d in self.dimensions]
+        self._cell_getter = (itemgetter(*(field for field, _ in self._fields))
+                             if len(self._fields) > 1 else None)
+
+    def update(self, records):
+        """
+        Adds a chunk of record dicts to the running totals.
+        """
+        if not isinstance(records, list):
+            records = list(records)
+        cell_getter = self._cell_getter
+        try:
+            services = list(map(_service_getter, records))
+            costs = list(map(_cost_getter, records))
+            keys = list(map(cell_getter, records)) if cell_getter else None
+        except KeyError:
+            # Slow path for records with missing fields
+            services = [record.get('service', 'Other') for record in records]
+            costs = [record.get('cost_inr', 0) for record in records]
+            keys = None
+            if cell_getter:
+                keys = [tuple(record.get(field, default) for field, default in self._fields)
+                        for record in records]
+        self._add(services, costs, keys)
+
+    def update_columns(self, columns):
+        """
+        Adds a columnar batch ({"service": [...], "cost_inr": [...], ...}).
+        Missing columns fall back to the same defaults as update().
+        """
+        costs = columns.get('cost_inr')
+        if not costs:
+            return
+        n = len(costs)
+        services = columns.get('service') or ['Other'] * n
+        keys = None
+        if self._cell_getter:
+            keys = list(zip(*[columns.get(field) or [default] * n for field, default in self._fields]))
+        self._add(services, costs, keys)
+
+    def update_batch(self, batch):
+        """
+        Dispatches a batch to update() or update_columns() based on its shape.
+        """
+        if isinstance(batch, dict):
+            self.update_columns(batch)
+        else:
+            self.update(batch)
+
+    def _add(self, services, costs, keys):
+        total_cost = self.total_cost
+        for cost in costs:
+            total_cost += cost
+        self.total_cost = total_cost
+        self.record_count += len(costs)
+
+        service_costs = self.service_costs
+        service_get = service_costs.get
+        for service, cost in zip(services, costs):
+            service_costs[service] = service_get(service, 0) + cost
+
+        if keys is not None:
+            cells = self.cells
+            cell_get = cells.get
+            for key, cost in zip(keys, costs):
+                cells[key] = cell_get(key, 0) + cost
+
+    def merge(self, other, sign=1):
+        """
+        Adds another aggregator's totals, or removes them with sign=-1 (e.g.
+        to retract a billing file that was rewritten). Both must track the
+        same dimensions. Cells and services that drop to zero on removal
+        are deleted.
+        """
+        if other.dimensions != self.dimensions:
+            raise ValueError(f"Cannot merge an aggregator over {other.dimensions} "
+                             f"into one over {self.dimensions}")
+        self.total_cost += sign * other.total_cost
+        self.record_count += sign * other.record_count
+        for totals, costs in ((self.service_costs, other.service_costs), (self.cells, other.cells)):
+            get = totals.get
+            for key, cost in costs.items():
+                value = get(key, 0) + sign * cost
+                if sign < 0 and abs(value) < 1e-6:
+                    totals.pop(key, None)
+                else:
+                    totals[key] = value
+
+    def tracks(self, *dimensions):
+        """
+        Whether costs_by() can roll up over these dimensions.
+        """
+        if dimensions == ("service",):
+            return True
+        return self._cell_getter is not None and all(d in self.dimensions for d in dimensions)
+
+    def costs_by(self, *dimensions):
+        """
+        Returns the rollup for one dimension ("service", "region", "resource", "month"),
+        or keyed by tuples when several dimensions are given.
+        """
+        if dimensions == ("service",):
+            return self.service_costs
+        if not self.tracks(*dimensions):
+            raise ValueError(f"Aggregator does not track {', '.join(dimensions)} "
+                             f"(tracked: {', '.join(self.dimensions) or 'service only'})")
+        rollup = {}
+        get = rollup.get
+        if len(dimensions) == 1:
+            index = self.dimensions.index(dimensions[0])
+            for key, cost in self.cells.items():
+                value = key[index]
+                rollup[value] = get(value, 0) + cost
+        else:
+            project = itemgetter(*(self.dimensions.index(d) for d in dimensions))
+            for key, cost in self.cells.items():
+                value = project(key)
+                rollup[value] = get(value, 0) + cost
+        return rollup
+
+    def top(self, dimension, n=3):
+        """
+        Returns the top-n entries of a rollup as an ordered dict, highest cost first.
+        """
+        costs = self.costs_by(dimension)
+        return dict(heapq.nlargest(n, costs.items(), key=lambda x: x[1]))
+
+    def rollups(self, top_n=10):
+        """
+        Returns all rollups plus their top-n entries (all dimensions must be tracked).
+        """
+        return {
+            "record_count": self.record_count,
+            "total_cost": self.total_cost,
+            "service_costs": self.service_costs,
+            "region_costs": self.costs_by("region"),
+            "resource_costs": self.costs_by("resource"),
+            "month_costs": self.costs_by("month"),
+            "top_services": self.top("service", top_n),
+            "top_regions": self.top("region", top_n),
+            "top_resources": self.top("resource", top_n),
+        }
+
+
+# Record field and default for each dimension an aggregator can track
+_DIMENSION_FIELDS = {
+    "service": ('service', 'Other'),
+    "region": ('region', 'Unknown'),
+    "resource": ('resource_id', 'Unknown'),
+    "month": ('month', 'Unknown'),
+}
+_service_getter = itemgetter('service')
+_cost_getter = itemgetter('cost_inr')
+
+
+def iter_record_batches(records, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Splits any iterable of record dicts into lists of at most batch_size records.
+    """
+    iterator = iter(records)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def aggregate_billing(batches, dimensions=ALL_DIMENSIONS):
+    """
+    Runs a CostAggregator over an iterable of batches and returns it.
+    """
+    aggregator = CostAggregator(dimensions)
+    for batch in batches:
+        aggregator.update_batch(batch)
+    return aggregator
+
+
+def summarize_aggregate(profile, aggregator):
+    """
+    Builds the analysis summary dict from a populated CostAggregator.
+
+    The budget is monthly, so when months are tracked it is judged on the
+    latest month: total_monthly_cost is that month's spend, and total_cost
+    the sum over every month (service_costs covers every month too, see
+    monthly_service_costs()). Without month tracking the billing is
+    treated as a single month.
+    """
     budget = profile.get('budget_inr_per_month', 0)
-    
-    # 1. Perform Manual Analysis
-    total_cost = 0
-    service_costs = {}
-    
-    for record in billing_data:
-        cost = record.get('cost_inr', 0)
-        service = record.get('service', 'Other')
-        
-        total_cost += cost
-        service_costs[service] = service_costs.get(service, 0) + cost
-        
-    budget_variance = total_cost - budget
-    is_over_budget = total_cost > budget
-    
+    total_cost = aggregator.total_cost
+    service_costs = aggregator.service_costs
+
+    trends = analyze_trends(aggregator, budget) if aggregator.tracks(*TREND_DIMENSIONS) else {}
+    monthly_costs = trends.get("monthly_costs")
+    budget_month = max(monthly_costs) if monthly_costs else None
+    month_cost = monthly_costs[budget_month] if budget_month else total_cost
+
     # Sort services by cost
-    sorted_services = sorted(service_costs.items(), key=lambda x: x[1], reverse=True)
-    high_cost_services = {k: v for k, v in sorted_services[:3]} # Top 3
-    
+    high_cost_services = aggregator.top("service", 3) # Top 3
+
     analysis_summary = {
-        "total_monthly_cost": total_cost,
+        "total_monthly_cost": round(month_cost, 2),
         "budget": budget,
-        "budget_variance": budget_variance,
+        "budget_variance": round(month_cost - budget, 2),
         "service_costs": service_costs,
         "high_cost_services": high_cost_services,
-        "is_over_budget": is_over_budget
+        "is_over_budget": month_cost > budget,
+        "budget_month": budget_month,
+        "total_cost": round(total_cost, 2),
+        "months_count": len(monthly_costs) if monthly_costs else 1,
     }
-    
+
+    # Month-over-month deltas, trends, anomalies and forecast
+    analysis_summary.update(trends)
+
     return analysis_summary
+
+
+def monthly_service_costs(analysis_summary):
+    """
+    Per-service cost of an average month: service_costs divided by the
+    number of billed months (older reports without months_count fall back
+    to their monthly_costs).
+    """
+    months = (analysis_summary.get('months_count')
+              or len(analysis_summary.get('monthly_costs') or {}) or 1)
+    return {
+        service: round(cost / months, 2)
+        for service, cost in (analysis_summary.get('service_costs') or {}).items()
+    }
+
+
+def analyze_costs(profile, billing_data, trends=True):
+    """
+    Analyzes costs against budget. With trends=False only the totals and
+    per-service costs are computed (no monthly trends, anomalies or forecast),
+    which skips building a cell key per record.
+    """
+    if not profile or not billing_data:
+        print("Missing profile or billing data for analysis.")
+        return None
+
+    # Record lists are validated into a typed columnar batch once; batches and
+    # billing stores are then streamed without per-field checks
+    billing_data = validate_billing(billing_data)
+    return analyze_cost_batches(profile, billing_data.iter_batches(), trends=trends)
+
+
+def analyze_cost_batches(profile, batches, trends=True):
+    """
+    Analyzes costs against budget from a stream of record batches
+    (e.g. a chunked billing export) without materializing all records.
+    """
+    if not profile:
+        print("Missing profile or billing data for analysis.")
+        return None
+
+    start = time.perf_counter()
+    aggregator = aggregate_billing(batches, TREND_DIMENSIONS if trends else ())
+    if not aggregator.record_count:
+        print("Missing profile or billing data for analysis.")
+        return None
+    _record_throughput(aggregator, start)
+
+    with get_metrics().timer("analyzer_seconds", phase="summarize"):
+        return summarize_aggregate(profile, aggregator)
+
+
+def _record_throughput(aggregator, start):
+    elapsed = time.perf_counter() - start
+    metrics = get_metrics()
+    metrics.observe("analyzer_seconds", elapsed, phase="aggregate")
+    metrics.inc("analyzer_records_total", aggregator.record_count)
+    if elapsed > 0:
+        metrics.set_gauge("analyzer_records_per_second", round(aggregator.record_count / elapsed))
@@ -0,0 +1,222 @@
+ROLLING_WINDOW = 3
+ANOMALY_THRESHOLD = 3.5
+MIN_MONTHS_FOR_ANOMALIES = 4
+FORECAST_HORIZON = 6
+FLAT_TREND_PCT = 2.0
+MIN_ANOMALY_SCALE_PCT = 1.0  # spread floor, as % of the median, so tiny wobbles are not anomalies
+
+
+def _is_month(value):
+    return isinstance(value, str) and len(value) == 7 and value[4] == '-' and value[:4].isdigit()
+
+
+def _next_months(last_month, count):
+    year, month = int(last_month[:4]), int(last_month[5:])
+    labels = []
+    for _ in range(count):
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+        labels.append(f"{year:04d}-{month:02d}")
+    return labels
+
+
+def _month_number(month):
+    return int(month[:4]) * 12 + int(month[5:]) - 1
+
+
+def _fill_gaps(months, values):
+    """
+    Spreads values over every calendar month from months[0] to months[-1],
+    linearly interpolating the months with no billing, so fits see the
+    real spacing between months.
+    """
+    if len(months) < 2:
+        return list(values)
+    start = _month_number(months[0])
+    filled = [None] * (_month_number(months[-1]) - start + 1)
+    positions = [_month_number(month) - start for month in months]
+    for x, value in zip(positions, values):
+        filled[x] = value
+    for (x0, y0), (x1, y1) in zip(zip(positions, values), zip(positions[1:], values[1:])):
+        for x in range(x0 + 1, x1):
+            filled[x] = y0 + (y1 - y0) * (x - x0) / (x1 - x0)
+    return filled
+
+
+def _linear_fit(values):
+    """
+    Least-squares slope and intercept of values over x = 0..n-1.
+    """
+    n = len(values)
+    if n < 2:
+        return 0.0, (values[0] if values else 0.0)
+    mean_x = (n - 1) / 2
+    mean_y = sum(values) / n
+    sxx = sum((x - mean_x) ** 2 for x in range(n))
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in zip(range(n), values))
+    slope = sxy / sxx
+    return slope, mean_y - slope * mean_x
+
+
+def _rolling_mean(values, window):
+    out = []
+    running = 0.0
+    for i, value in enumerate(values):
+        running += value
+        if i >= window:
+            running -= values[i - window]
+        out.append(running / min(i + 1, window))
+    return out
+
+
+def _median(values):
+    ordered = sorted(values)
+    mid = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[mid]
+    return (ordered[mid - 1] + ordered[mid]) / 2
+
+
+def build_month_matrix(aggregator):
+    """
+    Returns (months, services, matrix) where matrix[s][m] is the cost of
+    service s in month m. Records without a YYYY-MM month are left out.
+    """
+    service_month = aggregator.costs_by("service", "month")
+    months = sorted({month for _, month in service_month if _is_month(month)})
+    month_index = {month: i for i, month in enumerate(months)}
+    services = []
+    rows = {}
+    for (service, month), cost in service_month.items():
+        i = month_index.get(month)
+        if i is None:
+            continue
+        row = rows.get(service)
+        if row is None:
+            row = rows[service] = [0.0] * len(months)
+            services.append(service)
+        row[i] += cost
+    return months, services, [rows[s] for s in services]
+
+
+def detect_anomalies(months, services, matrix, threshold=ANOMALY_THRESHOLD):
+    """
+    Flags service-months whose cost is far from the service's typical month,
+    using the robust z-score (x - median) / (1.4826 * MAD). When more than
+    half the months cost the same (MAD = 0) the mean absolute deviation is
+    used instead (scaled by 1.2533), and the spread never drops below
+    MIN_ANOMALY_SCALE_PCT of the median.
+    """
+    anomalies = []
+    if len(months) < MIN_MONTHS_FOR_ANOMALIES:
+        return anomalies
+    for service, row in zip(services, matrix):
+        median = _median(row)
+        deviations = [abs(v - median) for v in row]
+        mad = _median(deviations)
+        scale = 1.4826 * mad if mad else 1.2533 * sum(deviations) / len(deviations)
+        scale = max(scale, abs(median) * MIN_ANOMALY_SCALE_PCT / 100)
+        if not scale:
+            continue
+        for month, value in zip(months, row):
+            score = (value - median) / scale
+            if abs(score) >= threshold:
+                anomalies.append({
+                    "service": service,
+                    "month": month,
+                    "cost": round(value, 2),
+                    "expected": round(median, 2),
+                    "score": round(score, 2),
+                    "type": "spike" if score > 0 else "drop",
+                })
+    anomalies.sort(key=lambda a: abs(a["score"]), reverse=True)
+    return anomalies
+
+
+def service_trends(months, services, matrix):
+    """
+    Linear trend per service: slope per month, relative change and direction.
+    """
+    trends = {}
+    for service, row in zip(services, matrix):
+        slope, _ = _linear_fit(_fill_gaps(months, row))
+        mean = sum(row) / len(row) if row else 0.0
+        slope_pct = (slope / mean * 100) if mean else 0.0
+        if slope_pct > FLAT_TREND_PCT:
+            direction = "rising"
+        elif slope_pct < -FLAT_TREND_PCT:
+            direction = "falling"
+        else:
+            direction = "flat"
+        trends[service] = {
+            "slope_per_month": round(slope, 2),
+            "slope_pct": round(slope_pct, 2),
+            "direction": direction,
+            "latest": round(row[-1], 2) if row else 0,
+        }
+    return trends
+
+
+def forecast_costs(months, totals, budget, horizon=FORECAST_HORIZON):
+    """
+    Projects monthly totals with a linear fit (months without billing are
+    interpolated) and reports when the monthly spend is expected to exceed
+    the budget.
+    """
+    if not months:
+        return None
+    series = _fill_gaps(months, totals)
+    slope, intercept = _linear_fit(series)
+    n = len(series)
+    future = _next_months(months[-1], horizon)
+    projections = {
+        month: round(max(0.0, intercept + slope * (n + i)), 2) for i, month in enumerate(future)
+    }
+
+    over_month, months_until = None, None
+    if budget and totals[-1] > budget:
+        over_month, months_until = months[-1], 0
+    elif budget:
+        for i, (month, cost) in enumerate(projections.items(), start=1):
+            if cost > budget:
+                over_month, months_until = month, i
+                break
+
+    return {
+        "method": "linear",
+        "slope_per_month": round(slope, 2),
+        "next_months": projections,
+        "projected_over_budget_month": over_month,
+        "months_until_over_budget": months_until,
+    }
+
+
+def analyze_trends(aggregator, budget):
+    """
+    Time-series view of a populated CostAggregator, returned as extra keys
+    for the analysis summary.
+    """
+    months, services, matrix = build_month_matrix(aggregator)
+    totals = [sum(column) for column in zip(*matrix)] if matrix else []
+
+    month_over_month = []
+    for i, (month, cost) in enumerate(zip(months, totals)):
+        delta = cost - totals[i - 1] if i else 0.0
+        delta_pct = (delta / totals[i - 1] * 100) if i and totals[i - 1] else 0.0
+        month_over_month.append({
+            "month": month,
+            "cost": round(cost, 2),
+            "delta": round(delta, 2),
+            "delta_pct": round(delta_pct, 2),
+        })
+
+    rolling = _rolling_mean(totals, ROLLING_WINDOW)
+    return {
+        "monthly_costs": {m: round(c, 2) for m, c in zip(months, totals)},
+        "month_over_month": month_over_month,
+        "rolling_average": {m: round(c, 2) for m, c in zip(months, rolling)},
+        "service_trends": service_trends(months, services, matrix),
+        "anomalies": detect_anomalies(months, services, matrix),
+        "forecast": forecast_costs(months, totals, budget),
+    }
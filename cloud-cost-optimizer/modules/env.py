@@ -0,0 +1,26 @@
+import os
+
+_loaded = False
+
+
+def load_env():
+    """
+    Loads the nearest .env file (searching up from this package, as
+    load_dotenv() did from llm_client) into os.environ, once. python-dotenv
+    is only imported when such a file exists.
+    """
+    global _loaded
+    if _loaded:
+        return
+    _loaded = True
+    directory = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        path = os.path.join(directory, ".env")
+        if os.path.isfile(path):
+            from dotenv import load_dotenv
+            load_dotenv(path)
+            return
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return
+        directory = parent
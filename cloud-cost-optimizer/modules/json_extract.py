@@ -0,0 +1,464 @@
+import json
+import re
+
+_CLOSERS = {'{': '}', '[': ']'}
+_OPENER_RE = re.compile(r"[\[{]")
+_STRUCTURAL_RE = re.compile(r'[\[\]{}"]')
+_STRING_END_RE = re.compile(r'["\\]')
+_CUT_RE = re.compile(r'[\[\]{}",]')
+_REPAIR_SPECIAL_RE = re.compile(r"[\"'{}\[\],/A-Za-z_]")
+_STRING_SPECIAL_RE = {
+    '"': re.compile(r'["\\\n]'),
+    "'": re.compile(r"['\"\\\n]"),
+}
+_FENCE = "```"
+MAX_RESTARTS = 8
+_decoder = json.JSONDecoder()
+
+# Expected shapes of the LLM responses. "unwrap" names the key preferred when
+# the model wraps the expected list in an object.
+SCHEMAS = {
+    "profile": {"type": dict, "required": ("name",)},
+    "billing": {"type": list, "items": {"type": dict, "required": ("service", "cost_inr")}},
+    "recommendations": {
+        "type": list,
+        "items": {"type": dict, "required": ("title",)},
+        "unwrap": "recommendations",
+    },
+    "enrichment": {
+        "type": list,
+        "items": {"type": dict, "required": ("id",)},
+        "unwrap": "recommendations",
+    },
+}
+
+_LITERALS = {
+    "True": "true", "False": "false", "None": "null",
+    "true": "true", "false": "false", "null": "null",
+    "NaN": "null", "Infinity": "null",
+}
+
+
+def _match_span(text, start):
+    """
+    Follows the {...} or [...] opened at start. Returns (end, status) where
+    status is "closed", "truncated" (still open at the end of the text) or
+    "broken" (a mismatched closer, i.e. the opener was prose).
+    """
+    stack = [_CLOSERS[text[start]]]
+    i = start + 1
+    while stack:
+        match = _STRUCTURAL_RE.search(text, i)
+        if match is None:
+            return len(text), "truncated"
+        ch = match.group()
+        i = match.end()
+        if ch == '"':
+            i = _skip_string(text, i)
+        elif ch in _CLOSERS:
+            stack.append(_CLOSERS[ch])
+        elif ch == stack[-1]:
+            stack.pop()
+        else:
+            return i, "broken"
+    return i, "closed"
+
+
+def scan_json_spans(text):
+    """
+    Yields (start, end, truncated) for every balanced top-level {...} or
+    [...] in text, left to right. Strings are skipped with their escapes, so
+    braces inside values do not count. A candidate still open at the end of
+    the text is yielded with truncated=True.
+
+    The scan jumps between structural characters with compiled regexes and
+    is linear in the text length; a candidate that turns out to be prose
+    (mismatched closer, never closed) is rescanned from its next character
+    at most MAX_RESTARTS times.
+    """
+    pos = 0
+    restarts = 0
+    while True:
+        match = _OPENER_RE.search(text, pos)
+        if match is None:
+            return
+        start = match.start()
+        end, status = _match_span(text, start)
+        if status == "closed":
+            yield start, end, False
+            pos = end
+            continue
+        if status == "truncated":
+            yield start, end, True
+        if restarts < MAX_RESTARTS:
+            restarts += 1
+            pos = start + 1
+        else:
+            pos = end
+
+
+def _skip_string(text, i):
+    # i is just past the opening quote; returns the index past the closing one
+    while True:
+        match = _STRING_END_RE.search(text, i)
+        if match is None:
+            return len(text)
+        if match.group() == '\\':
+            i = match.end() + 1
+            continue
+        return match.end()
+
+
+def _fenced_blocks(text):
+    """
+    Contents of ``` fenced blocks (language tag dropped); an unclosed final
+    fence runs to the end of the text.
+    """
+    blocks = []
+    pos = text.find(_FENCE)
+    while pos != -1:
+        body_start = pos + len(_FENCE)
+        newline = text.find("\n", body_start)
+        tag_end = newline if newline != -1 else len(text)
+        # "```json\n" -> skip the language tag, "```{...}```" -> keep everything
+        if text[body_start:tag_end].strip().isalnum():
+            body_start = tag_end
+        end = text.find(_FENCE, body_start)
+        blocks.append(text[body_start:end if end != -1 else len(text)])
+        if end == -1:
+            break
+        pos = text.find(_FENCE, end + len(_FENCE))
+    return blocks
+
+
+def repair_json(text):
+    """
+    Best-effort fix of common LLM JSON defects in a single pass: trailing
+    commas, single-quoted strings, Python literals (True/False/None),
+    unquoted keys, // and /* */ comments, and truncation. A truncated
+    document is cut back to its last complete element and closed.
+    Returns the repaired text; it may still be invalid JSON.
+    """
+    out = []
+    stack = []
+    safe = (0, [])
+    i, n = 0, len(text)
+    truncated = False
+
+    while i < n:
+        # Numbers, whitespace and colons are copied through in one slice
+        match = _REPAIR_SPECIAL_RE.search(text, i)
+        if match is None:
+            out.append(text[i:])
+            break
+        if match.start() > i:
+            out.append(text[i:match.start()])
+            i = match.start()
+        ch = text[i]
+        if ch == '"' or ch == "'":
+            end, value, closed = _read_string(text, i)
+            out.append(value)
+            truncated = truncated or not closed
+            i = end
+        elif ch in _CLOSERS:
+            stack.append(_CLOSERS[ch])
+            out.append(ch)
+            safe = (len(out), list(stack))
+            i += 1
+        elif ch == '}' or ch == ']':
+            _strip_trailing_comma(out)
+            if not stack or stack[-1] != ch:
+                # Stray closer: keep it and let json.loads report the problem
+                out.append(ch)
+                i += 1
+                continue
+            stack.pop()
+            out.append(ch)
+            safe = (len(out), list(stack))
+            i += 1
+        elif ch == ',':
+            safe = (len(out), list(stack))
+            out.append(ch)
+            i += 1
+        elif ch == '/' and text.startswith('//', i):
+            newline = text.find('\n', i)
+            i = n if newline == -1 else newline
+        elif ch == '/' and text.startswith('/*', i):
+            close = text.find('*/', i + 2)
+            i = n if close == -1 else close + 2
+        elif ch.isalpha() or ch == '_':
+            j = i + 1
+            while j < n and (text[j].isalnum() or text[j] == '_'):
+                j += 1
+            word = text[i:j]
+            k = j
+            while k < n and text[k] in ' \t\r\n':
+                k += 1
+            if k < n and text[k] == ':':
+                out.append(json.dumps(word))  # unquoted key
+            else:
+                out.append(_LITERALS.get(word, word))
+            i = j
+        else:
+            out.append(ch)
+            i += 1
+
+    if stack or truncated:
+        length, open_stack = safe
+        out = out[:length]
+        _strip_trailing_comma(out)
+        out.extend(reversed(open_stack))
+    return "".join(out)
+
+
+def _read_string(text, i):
+    """
+    Reads a single- or double-quoted string starting at i. Returns
+    (end index, double-quoted JSON string, closed).
+    """
+    quote = text[i]
+    special = _STRING_SPECIAL_RE[quote]
+    n = len(text)
+    j = i + 1
+    parts = []
+    while j < n:
+        match = special.search(text, j)
+        if match is None:
+            parts.append(text[j:])
+            break
+        k = match.start()
+        if k > j:
+            parts.append(text[j:k])
+        ch = text[k]
+        if ch == quote:
+            return k + 1, '"' + "".join(parts) + '"', True
+        if ch == '\\':
+            escaped = text[k + 1:k + 2]
+            # \' is not a JSON escape
+            parts.append("'" if escaped == "'" else text[k:k + 2])
+            j = k + 2
+            continue
+        parts.append('\\"' if ch == '"' else '\\n')
+        j = k + 1
+    return n, '"' + "".join(parts) + '"', False
+
+
+def _close_truncated(text):
+    """
+    Cheap fix for a response that was only cut off: drops everything after
+    the last complete element and appends the missing closers. Tried before
+    the full repair_json pass.
+
+    An element is complete once its closer, its closing quote (for a value,
+    not a key) or the following comma has been seen; a scalar at the very
+    end is kept if it parses. An array item that is still open is cut back
+    inside only when it is the first item; after a complete sibling it is
+    dropped whole, so '[{"a":1}, {"b":2' becomes '[{"a":1}]' rather than
+    '[{"a":1}, {}]'.
+    """
+    stack = []
+    filled = []  # per open container: whether it already holds a complete element
+    partial = None  # depth of a container opened after a complete sibling
+    cut, cut_depth = 0, 0
+    prev = None  # last structural character; '"' right after a key means a value follows
+    # stack[:cut_depth] is never popped while cut stands, so only the depth is kept
+    i = 0
+    while True:
+        match = _CUT_RE.search(text, i)
+        if match is None:
+            break
+        ch = match.group()
+        i = match.end()
+        if ch == '"':
+            start = i
+            i = _skip_string(text, i)
+            if not _string_closed(text, start, i):
+                # Cut off inside a string
+                return text[:cut] + "".join(reversed(stack[:cut_depth]))
+            is_value = stack and (stack[-1] == ']' or prev == '"')
+            if is_value and partial is None:
+                cut, cut_depth = i, len(stack)
+            # After a value the next string is a key again
+            prev = ',' if is_value and stack[-1] == '}' else ch
+            continue
+        if ch == ',':
+            if filled:
+                filled[-1] = True
+            if partial is None:
+                cut, cut_depth = match.start(), len(stack)
+        elif ch in _CLOSERS:
+            if partial is None and filled and filled[-1] and stack[-1] == ']':
+                # Kept only if it closes; '[{"a":1}, {"b"' must not become '[{"a":1}, {}]'
+                partial = len(stack) + 1
+            stack.append(_CLOSERS[ch])
+            if partial is None:
+                cut, cut_depth = i, len(stack)
+            filled.append(False)
+        elif stack and ch == stack[-1]:
+            stack.pop()
+            filled.pop()
+            if partial is not None and len(stack) < partial:
+                partial = None
+            if partial is None:
+                cut, cut_depth = i, len(stack)
+        else:
+            return text
+        prev = ch
+
+    # A number or literal after the last structural character
+    tail = text[i:].strip() if partial is None else ""
+    if stack and stack[-1] == '}' and prev == '"':
+        tail = tail[1:].strip() if tail.startswith(':') else ""
+    elif not (stack and stack[-1] == ']' and prev in ('[', ',')):
+        tail = ""
+    if tail:
+        try:
+            json.loads(tail)
+        except json.JSONDecodeError:
+            pass
+        else:
+            cut, cut_depth = len(text.rstrip()), len(stack)
+    return text[:cut] + "".join(reversed(stack[:cut_depth]))
+
+
+def _string_closed(text, start, end):
+    # _skip_string returns len(text) both for a closing quote at the very end
+    # and for an unterminated string
+    if end <= start or text[end - 1] != '"':
+        return False
+    k = end - 2
+    while k >= start and text[k] == '\\':
+        k -= 1
+    return (end - 2 - k) % 2 == 0
+
+
+def _strip_trailing_comma(out):
+    k = len(out)
+    while k and out[k - 1].isspace():
+        k -= 1
+    if k and out[k - 1] == ',':
+        del out[k - 1:]
+
+
+def _parse(candidate, truncated, repair):
+    try:
+        return json.loads(_close_truncated(candidate) if truncated else candidate), True
+    except json.JSONDecodeError:
+        pass
+    if repair:
+        try:
+            return json.loads(repair_json(candidate)), True
+        except json.JSONDecodeError:
+            pass
+    return None, False
+
+
+def iter_json_values(text, repair=True):
+    """
+    Yields every JSON object/array that can be parsed (or repaired) from
+    text: fenced ``` blocks first, then the rest of the text.
+
+    Each candidate is first handed to the C decoder (raw_decode stops at the
+    end of the value, so trailing prose is fine); only when that fails is
+    the span located with the scanner and, if enabled, repaired.
+    """
+    if not text:
+        return
+    seen = set()
+    for source in _fenced_blocks(text) + [text]:
+        pos = 0
+        restarts = 0
+        while True:
+            match = _OPENER_RE.search(source, pos)
+            if match is None:
+                break
+            start = match.start()
+            try:
+                value, end = _decoder.raw_decode(source, start)
+            except json.JSONDecodeError as e:
+                rest = source[e.pos:]
+                if not rest.strip() or (rest[0] == '"' and '"' not in rest[1:]):
+                    # The decoder ran out of text: a truncated response
+                    end, status = len(source), "truncated"
+                else:
+                    end, status = _match_span(source, start)
+            else:
+                status = None
+                if source[start:end] not in seen:
+                    seen.add(source[start:end])
+                    yield value
+                pos = end
+                continue
+
+            if status != "broken":
+                candidate = source[start:end]
+                if candidate not in seen:
+                    seen.add(candidate)
+                    value, ok = _parse(candidate, status == "truncated", repair)
+                    if ok:
+                        yield value
+                if status == "closed":
+                    pos = end
+                    continue
+            if restarts < MAX_RESTARTS:
+                restarts += 1
+                pos = start + 1
+            else:
+                pos = end
+
+
+def validate_json(value, schema):
+    """
+    Checks a parsed value against a schema (a SCHEMAS name or dict). List
+    items missing required keys are dropped. Returns the (possibly
+    unwrapped or filtered) value, or None if it does not match.
+    """
+    if isinstance(schema, str):
+        schema = SCHEMAS[schema]
+    if isinstance(value, dict) and schema["type"] is list:
+        # {"recommendations": [...]} / {"records": [...]}: use the named key,
+        # else the first list value
+        unwrap = schema.get("unwrap")
+        lists = [v for v in value.values() if isinstance(v, list)]
+        value = value[unwrap] if unwrap in value else (lists[0] if lists else value)
+    if not isinstance(value, schema["type"]):
+        return None
+
+    required = schema.get("required", ())
+    if isinstance(value, dict):
+        return value if all(key in value for key in required) else None
+
+    item_schema = schema.get("items")
+    if item_schema is None:
+        return value
+    items = [item for item in value if validate_json(item, item_schema) is not None]
+    return items or None
+
+
+def extract_json(text, schema=None, repair=True):
+    """
+    Returns the first JSON object/array in text that parses (after repair,
+    if enabled) and matches schema when one is given, else None.
+    """
+    for value in iter_json_values(text, repair):
+        if schema is None:
+            return value
+        valid = validate_json(value, schema)
+        if valid is not None:
+            return valid
+    return None
+
+
+def extract_json_candidates(text, schema=None, repair=True):
+    """
+    Returns every parseable JSON object/array in text, in order, keeping
+    only those that match schema when one is given.
+    """
+    values = []
+    for value in iter_json_values(text, repair):
+        if schema is not None:
+            value = validate_json(value, schema)
+            if value is None:
+                continue
+        values.append(value)
+    return values
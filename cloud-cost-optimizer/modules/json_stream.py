@@ -0,0 +1,160 @@
+import json
+
+from .json_extract import SCHEMAS, extract_json, repair_json
+
+_OPENERS = {'{': '}', '[': ']'}
+_CLOSERS = {'}', ']'}
+
+
+class JSONStreamParser:
+    """
+    Incremental parser that yields the items of a JSON array as soon as each
+    one closes, while the rest of the document is still being received.
+
+    The array is either the top-level value (`[{...}, {...}]`) or an array
+    directly inside a top-level object (`{"recommendations": [{...}, ...]}`):
+    the one under `key` when given, else the first array with object items.
+    Text before the document (prose, a ```json fence) is skipped, and so is
+    any bracketed value that closes without object/array items (e.g. "[1]"
+    in prose, or `"providers": ["aws"]`). Items with trailing commas, single
+    quotes and similar defects are repaired; items that still fail to parse
+    are counted in `errors` and dropped.
+
+    Usage:
+        parser = JSONStreamParser(key="recommendations")
+        for chunk in chunks:
+            for item in parser.feed(chunk):
+                ...
+    """
+
+    def __init__(self, key=None):
+        self.key = key
+        self._buf = ""
+        self._pos = 0
+        self._stack = []
+        self._quote = None
+        self._escape = False
+        self._key_start = None
+        self._last_key = None
+        self._item_depth = None
+        self._item_start = None
+        self._array_items = 0
+        self.done = False
+        self.items_count = 0
+        self.errors = 0
+
+    def feed(self, chunk):
+        """
+        Consumes a text chunk and returns the list of items completed by it.
+        """
+        if self.done or not chunk:
+            return []
+        self._buf += chunk
+        items = []
+        buf = self._buf
+        i = self._pos
+        n = len(buf)
+        stack = self._stack
+
+        while i < n:
+            ch = buf[i]
+
+            if self._quote:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == self._quote:
+                    self._quote = None
+                    if self._key_start is not None:
+                        self._last_key = buf[self._key_start:i]
+                        self._key_start = None
+                i += 1
+                continue
+
+            if not stack:
+                # Waiting for the root value
+                if ch in _OPENERS:
+                    stack.append(_OPENERS[ch])
+                    if ch == '[':
+                        self._item_depth = 1
+                i += 1
+                continue
+
+            if ch == '"' or (ch == "'" and self._item_start is not None):
+                # Single quotes only delimit strings inside an item; in prose
+                # they are apostrophes
+                self._quote = ch
+                if len(stack) == 1 and stack[0] == '}':
+                    self._key_start = i + 1
+            elif ch in _OPENERS:
+                if (self._item_depth is None and ch == '[' and len(stack) == 1
+                        and (self.key is None or self._last_key == self.key)):
+                    # An array inside the root object holds the items
+                    self._item_depth = 2
+                elif len(stack) == self._item_depth and self._item_start is None:
+                    self._item_start = i
+                stack.append(_OPENERS[ch])
+            elif ch in _CLOSERS:
+                stack.pop()
+                if self._item_start is not None and len(stack) == self._item_depth:
+                    item = self._decode(buf[self._item_start:i + 1])
+                    if item is not None:
+                        items.append(item)
+                        self._array_items += 1
+                    self._item_start = None
+                    # Everything before i is consumed
+                    buf = buf[i + 1:]
+                    n = len(buf)
+                    i = 0
+                    continue
+                if self._item_depth is not None and len(stack) < self._item_depth:
+                    if self._array_items:
+                        self.done = True
+                        break
+                    # No items in it: keep looking for the next candidate array
+                    self._item_depth = None
+                if not stack:
+                    self._last_key = None
+            i += 1
+
+        if self._item_start is None and not self._quote:
+            buf = buf[i:]
+            i = 0
+        self._buf = buf
+        self._pos = i
+        return items
+
+    def _decode(self, text):
+        try:
+            item = json.loads(text)
+        except json.JSONDecodeError:
+            try:
+                item = json.loads(repair_json(text))
+            except json.JSONDecodeError:
+                self.errors += 1
+                return None
+        self.items_count += 1
+        return item
+
+
+def iter_json_items(chunks, schema=None):
+    """
+    Yields the array items from an iterable of text chunks as they complete.
+
+    schema names a json_extract.SCHEMAS entry: its "unwrap" key picks the
+    array inside a root object, and if the stream yielded no items the full
+    text is handed to extract_json() instead.
+    """
+    key = SCHEMAS[schema].get("unwrap") if schema else None
+    parser = JSONStreamParser(key=key)
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        # Keep draining after the array closed so the producer can finish
+        # (e.g. store the complete response in the cache).
+        yield from parser.feed(chunk)
+    if not parser.items_count:
+        value = extract_json("".join(parts), schema=schema)
+        if isinstance(value, list):
+            yield from (item for item in value if isinstance(item, (dict, list)))
@@ -0,0 +1,219 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from .metrics import get_metrics
+
+DEFAULT_CACHE_PATH = ".llm_cache.sqlite"
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+
+def make_cache_key(model, messages, max_tokens, temperature, endpoint=None):
+    """
+    Content-addressed key for an LLM request: sha256 over the canonical JSON
+    of everything that influences the response. endpoint (the API URL, or
+    "offline") keeps replies from a stub or another router apart; it is
+    left out when None, as in the endpoint-independent replay keys of
+    llm_offline.
+    """
+    request = {
+        "model": model,
+        "messages": messages,
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+    }
+    if endpoint is not None:
+        request["endpoint"] = endpoint
+    payload = json.dumps(
+        request,
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Persistent SQLite cache for LLM responses.
+
+    Entries expire after ttl_seconds. When the stored responses exceed
+    max_bytes, the least recently used entries are evicted.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 max_bytes=DEFAULT_MAX_BYTES, enabled=True):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._bytes = 0
+
+    def _connect(self):
+        if self._conn is None:
+            import sqlite3  # on first use, so commands without LLM calls skip it
+
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " response TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_created_at ON responses (created_at)"
+            )
+            self._conn.commit()
+            # Running total of stored bytes, kept up to date by set/delete/evict
+            self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        return self._conn
+
+    def get(self, key):
+        """
+        Returns the cached response for key, or None on a miss or expired entry.
+        """
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                get_metrics().inc("llm_cache_requests_total", result="miss")
+                return None
+            response, created_at = row
+            if self.ttl_seconds and now - created_at > self.ttl_seconds:
+                self._delete(conn, key)
+                conn.commit()
+                self.misses += 1
+                get_metrics().inc("llm_cache_requests_total", result="expired")
+                return None
+            conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.hits += 1
+            get_metrics().inc("llm_cache_requests_total", result="hit")
+            return response
+
+    def set(self, key, response):
+        """
+        Stores a response and evicts least recently used entries if over max_bytes.
+        """
+        if not self.enabled or response is None:
+            return
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            conn = self._connect()
+            self._delete(conn, key)
+            conn.execute(
+                "INSERT INTO responses (key, response, size, created_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now),
+            )
+            self._bytes += size
+            self._evict(conn)
+            conn.commit()
+
+    def delete(self, key):
+        """
+        Removes one cached response (e.g. a reply that turned out to be unusable).
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            conn = self._connect()
+            self._delete(conn, key)
+            conn.commit()
+
+    def _delete(self, conn, key):
+        row = conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._bytes -= row[0]
+
+    def _evict(self, conn):
+        if self.ttl_seconds:
+            cutoff = time.time() - self.ttl_seconds
+            # Both statements use the created_at index, so this is cheap when nothing expired
+            expired = conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM responses WHERE created_at < ?", (cutoff,)
+            ).fetchone()[0]
+            if expired:
+                conn.execute("DELETE FROM responses WHERE created_at < ?", (cutoff,))
+                self._bytes -= expired
+        if not self.max_bytes or self._bytes <= self.max_bytes:
+            return
+        rows = conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC")
+        stale = []
+        total = self._bytes
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        rows.close()
+        conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+        self._bytes = total
+
+    def clear(self):
+        """
+        Removes every cached response.
+        """
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        Returns hit/miss counters for this process plus current entry count and size.
+        """
+        entries, size = 0, 0
+        if self.enabled:
+            with self._lock:
+                entries, size = self._connect().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+                ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+_default_cache = None
+
+
+def get_cache():
+    """
+    Returns the process-wide cache configured from environment variables:
+    LLM_CACHE_PATH, LLM_CACHE_TTL (seconds), LLM_CACHE_MAX_MB and
+    LLM_CACHE_BYPASS (set to 1 to disable the cache).
+    """
+    global _default_cache
+    if _default_cache is None:
+        bypass = os.getenv("LLM_CACHE_BYPASS", "").lower() in ("1", "true", "yes")
+        _default_cache = LLMCache(
+            path=os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH),
+            ttl_seconds=float(os.getenv("LLM_CACHE_TTL", DEFAULT_TTL_SECONDS)),
+            max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", DEFAULT_MAX_BYTES / (1024 * 1024))) * 1024 * 1024),
+            enabled=not bypass,
+        )
+    return _default_cache
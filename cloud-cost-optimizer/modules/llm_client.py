@@ -1,115 +1,583 @@
 import os
-import requests
 import json
-import re
-from dotenv import load_dotenv
+import time
+import random
+import threading
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from .llm_cache import get_cache, make_cache_key
+from .metrics import get_metrics
+from .json_extract import extract_json
+from .env import load_env
 
-load_dotenv()
+# .env must be loaded before the settings below are read. requests and
+# asyncio are imported on first use: they dominate CLI startup and most
+# commands never reach the network.
+load_env()
 
 HF_API_TOKEN = os.getenv("HF_API_TOKEN")
 # Switching to Zephyr-7b-beta which is highly reliable on free tier
 # Using OpenAI-compatible endpoint on Hugging Face Router
-API_URL = "https://router.huggingface.co/v1/chat/completions"
+API_URL = os.getenv("LLM_API_URL", "https://router.huggingface.co/v1/chat/completions")
 MODEL_ID = "meta-llama/Meta-Llama-3-8B-Instruct"
 
-def query_llm(messages, max_tokens=1000, temperature=0.1, retries=3):
+DEFAULT_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 120))
+DEFAULT_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", 4))
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class RetryableLLMError(Exception):
+    """
+    A failed attempt that is worth retrying (rate limit, 5xx, network error).
+    """
+
+    def __init__(self, message, retry_after=None, response_text=None, reason="network"):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.response_text = response_text
+        self.reason = reason
+
+
+class LLMClient:
+    """
+    Chat completion client for an OpenAI-compatible endpoint.
+
+    Holds a keep-alive pooled requests.Session, applies per-request timeouts,
+    retries with exponential backoff and jitter (honouring Retry-After on 429)
+    and limits the number of in-flight requests for both the sync and the
+    asyncio entry points.
+    """
+
+    def __init__(self, api_url=None, api_token=None, model=MODEL_ID,
+                 timeout=DEFAULT_TIMEOUT, retries=3, backoff_base=1.0,
+                 backoff_max=30.0, max_concurrency=DEFAULT_CONCURRENCY,
+                 pool_size=None):
+        self.api_url = api_url or API_URL
+        self.api_token = api_token if api_token is not None else HF_API_TOKEN
+        self.model = model
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_concurrency = max_concurrency
+
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        pool_size = pool_size or max(max_concurrency, 10)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._sync_limit = threading.BoundedSemaphore(max_concurrency)
+        self._async_limits = weakref.WeakKeyDictionary()
+        self._executor = None
+
+    def build_payload(self, messages, max_tokens, temperature, stream=False):
+        return {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": stream,
+            **({"stream_options": {"include_usage": True}} if stream else {})
+        }
+
+    def _headers(self):
+        if not self.api_token:
+            raise ValueError("HF_API_TOKEN not found in environment variables.")
+        return {
+            "Authorization": f"Bearer {self.api_token}",
+            "Content-Type": "application/json"
+        }
+
+    def backoff_delay(self, attempt, retry_after=None):
+        """
+        Seconds to wait before the next attempt: the server's Retry-After if it
+        sent one, otherwise exponential backoff with full jitter.
+        """
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        cap = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, cap)
+
+    def _post(self, payload, timeout):
+        """
+        Performs a single HTTP attempt and returns the assistant message content.
+        """
+        import requests
+
+        start = time.perf_counter()
+        try:
+            response = self.session.post(
+                self.api_url, headers=self._headers(), json=payload, timeout=timeout
+            )
+        except requests.exceptions.RequestException as e:
+            _observe_request("complete", start, "network_error")
+            raise RetryableLLMError(str(e))
+        _observe_request("complete", start, response.status_code)
+
+        if response.status_code in RETRYABLE_STATUS:
+            raise RetryableLLMError(
+                f"HTTP {response.status_code}",
+                retry_after=_parse_retry_after(response.headers.get("Retry-After")),
+                response_text=response.text,
+                reason=f"http_{response.status_code}",
+            )
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            raise RuntimeError(f"LLM request failed: {e}\nResponse Body: {response.text}")
+
+        data = response.json()
+        _record_usage(data.get("usage"))
+
+        # OpenAI format extraction
+        if "choices" in data and len(data["choices"]) > 0:
+            return data["choices"][0]["message"]["content"]
+        raise ValueError(f"Unexpected response format: {data}")
+
+    def complete(self, messages, max_tokens=1000, temperature=0.1, retries=None, timeout=None):
+        """
+        Blocking chat completion with retries. Returns the generated text.
+        """
+        retries = retries or self.retries
+        timeout = timeout or self.timeout
+        payload = self.build_payload(messages, max_tokens, temperature)
+
+        for attempt in range(retries):
+            try:
+                with self._sync_limit:
+                    return self._post(payload, timeout)
+            except RetryableLLMError as e:
+                if attempt == retries - 1:
+                    get_metrics().inc("llm_failures_total", mode="complete", reason=e.reason)
+                    raise RuntimeError(_failure_message(retries, e))
+                get_metrics().inc("llm_retries_total", mode="complete", reason=e.reason)
+                time.sleep(self.backoff_delay(attempt, e.retry_after))
+
+    def _async_limit(self):
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        limit = self._async_limits.get(loop)
+        if limit is None:
+            limit = asyncio.Semaphore(self.max_concurrency)
+            self._async_limits[loop] = limit
+        return limit
+
+    def _open_stream(self, payload, timeout):
+        """
+        Opens a streaming request; returns the response once headers arrived.
+        """
+        import requests
+
+        start = time.perf_counter()
+        try:
+            response = self.session.post(
+                self.api_url, headers=self._headers(), json=payload, timeout=timeout, stream=True
+            )
+        except requests.exceptions.RequestException as e:
+            _observe_request("stream", start, "network_error")
+            raise RetryableLLMError(str(e))
+        _observe_request("stream", start, response.status_code)
+
+        if response.status_code in RETRYABLE_STATUS:
+            response.close()
+            raise RetryableLLMError(
+                f"HTTP {response.status_code}",
+                retry_after=_parse_retry_after(response.headers.get("Retry-After")),
+                response_text=response.text,
+                reason=f"http_{response.status_code}",
+            )
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            raise RuntimeError(f"LLM request failed: {e}\nResponse Body: {response.text}")
+        return response
+
+    def stream(self, messages, max_tokens=1000, temperature=0.1, retries=None, timeout=None):
+        """
+        Streaming chat completion. Yields text deltas as server-sent events
+        arrive. Connection errors are retried only before the first delta.
+        Servers that ignore "stream" and answer with a plain JSON completion
+        are handled by yielding the whole content once.
+
+        The request counts against max_concurrency until the generator is
+        exhausted or closed, not just while the stream is being opened.
+        """
+        retries = retries or self.retries
+        timeout = timeout or self.timeout
+        payload = self.build_payload(messages, max_tokens, temperature, stream=True)
+
+        start = time.perf_counter()
+        for attempt in range(retries):
+            self._sync_limit.acquire()
+            try:
+                response = self._open_stream(payload, timeout)
+            except RetryableLLMError as e:
+                error = e
+            except BaseException:
+                self._sync_limit.release()
+                raise
+            else:
+                break
+            # Not held while backing off
+            self._sync_limit.release()
+            if attempt == retries - 1:
+                get_metrics().inc("llm_failures_total", mode="stream", reason=error.reason)
+                raise RuntimeError(_failure_message(retries, error))
+            get_metrics().inc("llm_retries_total", mode="stream", reason=error.reason)
+            time.sleep(self.backoff_delay(attempt, error.retry_after))
+
+        try:
+            yield from self._read_stream(response, start)
+        finally:
+            self._sync_limit.release()
+
+    def _read_stream(self, response, start):
+        metrics = get_metrics()
+        first_delta = True
+        with response:
+            if "text/event-stream" not in response.headers.get("Content-Type", ""):
+                data = response.json()
+                _record_usage(data.get("usage"))
+                if "choices" in data and len(data["choices"]) > 0:
+                    yield data["choices"][0]["message"]["content"]
+                    return
+                raise ValueError(f"Unexpected response format: {data}")
+
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                event = json.loads(data)
+                # Sent as a final event when stream_options.include_usage is honoured
+                _record_usage(event.get("usage"))
+                choices = event.get("choices") or []
+                if choices:
+                    delta = choices[0].get("delta", {}).get("content")
+                    if delta:
+                        if first_delta:
+                            metrics.observe("llm_first_token_seconds", time.perf_counter() - start)
+                            first_delta = False
+                        yield delta
+        metrics.observe("llm_stream_seconds", time.perf_counter() - start)
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency, thread_name_prefix="llm-client"
+            )
+        return self._executor
+
+    async def acomplete(self, messages, max_tokens=1000, temperature=0.1, retries=None, timeout=None):
+        """
+        asyncio variant of complete(). At most max_concurrency requests run at
+        once per event loop; the pooled session is driven from worker threads.
+        """
+        import asyncio
+
+        retries = retries or self.retries
+        timeout = timeout or self.timeout
+        payload = self.build_payload(messages, max_tokens, temperature)
+
+        for attempt in range(retries):
+            try:
+                async with self._async_limit():
+                    loop = asyncio.get_running_loop()
+                    return await asyncio.wait_for(
+                        loop.run_in_executor(self._get_executor(), self._post, payload, timeout),
+                        timeout + 1
+                    )
+            except asyncio.TimeoutError:
+                error = RetryableLLMError(f"Request timed out after {timeout}s", reason="timeout")
+            except RetryableLLMError as e:
+                error = e
+            if attempt == retries - 1:
+                get_metrics().inc("llm_failures_total", mode="async", reason=error.reason)
+                raise RuntimeError(_failure_message(retries, error))
+            get_metrics().inc("llm_retries_total", mode="async", reason=error.reason)
+            await asyncio.sleep(self.backoff_delay(attempt, error.retry_after))
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self.session.close()
+
+
+def _parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def _observe_request(mode, start, status):
+    get_metrics().observe("llm_request_seconds", time.perf_counter() - start,
+                          mode=mode, status=status)
+
+
+def _record_usage(usage):
+    """
+    Adds the token counts of a response's `usage` block to the metrics.
+    """
+    if not isinstance(usage, dict):
+        return
+    metrics = get_metrics()
+    for field, kind in (("prompt_tokens", "prompt"), ("completion_tokens", "completion")):
+        tokens = usage.get(field)
+        if isinstance(tokens, int):
+            metrics.inc("llm_tokens_total", tokens, type=kind)
+
+
+def _failure_message(retries, error):
+    error_msg = f"Failed to query LLM after {retries} attempts: {error}"
+    if getattr(error, "response_text", None):
+        error_msg += f"\nResponse Body: {error.response_text}"
+    return error_msg
+
+
+class RequestCoalescer:
+    """
+    Single-flight for identical in-flight requests: the first caller for a
+    key performs the request, callers arriving while it runs wait for the
+    same result (or exception) instead of sending their own.
+
+    run() serves threads, arun() asyncio tasks (coalesced per event loop).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._tasks = weakref.WeakKeyDictionary()
+
+    def run(self, key, func, mode="complete"):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            get_metrics().inc("llm_coalesced_total", mode=mode)
+            return future.result()
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    async def arun(self, key, coro_func, mode="async"):
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        tasks = self._tasks.get(loop)
+        if tasks is None:
+            tasks = self._tasks[loop] = {}
+        task = tasks.get(key)
+        if task is None:
+            task = tasks[key] = loop.create_task(coro_func())
+            task.add_done_callback(lambda _: tasks.pop(key, None))
+        else:
+            get_metrics().inc("llm_coalesced_total", mode=mode)
+        # Shielded so one cancelled caller does not cancel the others' request
+        return await asyncio.shield(task)
+
+
+_coalescer = RequestCoalescer()
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def create_client(**options):
+    """
+    Builds the client selected by LLM_BACKEND: "http" (default, LLMClient
+    with options) or "offline" (llm_offline.OfflineLLM, no network). With
+    LLM_RECORD=path, HTTP requests and replies are also appended to path
+    for later offline replay.
+    """
+    backend = os.getenv("LLM_BACKEND", "http")
+    if backend == "offline":
+        from .llm_offline import OfflineLLM
+        return OfflineLLM.from_env()
+    if backend != "http":
+        raise ValueError(f"Unknown LLM_BACKEND '{backend}', expected 'http' or 'offline'.")
+
+    client = LLMClient(**options)
+    if os.getenv("LLM_RECORD"):
+        from .llm_offline import RecordingLLM
+        client = RecordingLLM(client, os.getenv("LLM_RECORD"))
+    return client
+
+
+def get_client():
+    """
+    Returns the shared client used by query_llm / aquery_llm (see create_client).
+    """
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = create_client()
+        return _default_client
+
+
+def client_identity():
+    """
+    (model, endpoint) of the shared client, part of every cache key, without
+    building the client: a cache hit then needs no HTTP session.
+    """
+    client = _default_client
+    if client is not None:
+        return client.model, client.api_url
+    if os.getenv("LLM_BACKEND", "http") == "offline":
+        from .llm_offline import OFFLINE_MODEL_ID, OfflineLLM
+        return OFFLINE_MODEL_ID, OfflineLLM.api_url
+    return MODEL_ID, API_URL
+
+
+def _request_key(messages, max_tokens, temperature):
+    model, endpoint = client_identity()
+    return make_cache_key(model, messages, max_tokens, temperature, endpoint=endpoint)
+
+
+def set_client(client):
+    """
+    Replaces the shared client (e.g. an LLMClient pointed at a local stub
+    server, or an llm_offline.OfflineLLM).
+    """
+    global _default_client
+    with _default_client_lock:
+        _default_client = client
+
+
+def parses_as(schema=None):
+    """
+    Returns a validate= callable for query_llm and friends: the reply must
+    contain JSON (matching the json_extract schema, if given).
+    """
+    return lambda text: extract_json(text, schema=schema) is not None
+
+
+def _cached_reply(cache, cache_key, validate):
+    if cache is None or not cache.enabled:
+        return None
+    cached = cache.get(cache_key)
+    if cached is not None and validate is not None and not validate(cached):
+        # Stored before it was known to be unusable; drop it and ask again
+        cache.delete(cache_key)
+        return None
+    return cached
+
+
+def _store_reply(cache, cache_key, content, validate):
+    if cache is None or not cache.enabled:
+        return
+    if validate is not None and not validate(content):
+        get_metrics().inc("llm_cache_rejected_total")
+        return
+    cache.set(cache_key, content)
+
+
+def query_llm(messages, max_tokens=1000, temperature=0.1, retries=3, use_cache=True, validate=None):
     """
     Sends a chat completion request to the Hugging Face Router.
+    Concurrent calls with identical arguments are coalesced into one request.
     Args:
         messages: List of dicts, e.g. [{"role": "user", "content": "..."}]
         max_tokens: Max tokens to generate
         temperature: Creativity (0.0 - 1.0)
         retries: Number of retries on failure
+        use_cache: Look up / store the response in the on-disk cache
+        validate: Optional callable(text) -> bool (e.g. parses_as("profile"));
+            only replies it accepts are cached, and a cached reply it
+            rejects is evicted and requested again
         
     Returns:
         str: The generated text content from the assistant.
     """
-    if not HF_API_TOKEN:
-        raise ValueError("HF_API_TOKEN not found in environment variables.")
-
-    headers = {
-        "Authorization": f"Bearer {HF_API_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
-    payload = {
-        "model": MODEL_ID,
-        "messages": messages,
-        "max_tokens": max_tokens,
-        "temperature": temperature,
-        "stream": False
-    }
-    
-    for attempt in range(retries):
-        try:
-            response = requests.post(API_URL, headers=headers, json=payload)
-            response.raise_for_status()
-            data = response.json()
-            
-            # OpenAI format extraction
-            if "choices" in data and len(data["choices"]) > 0:
-                content = data["choices"][0]["message"]["content"]
-                return content
-            else:
-                raise ValueError(f"Unexpected response format: {data}")
-                
-        except requests.exceptions.RequestException as e:
-            if attempt == retries - 1:
-                error_msg = f"Failed to query LLM after {retries} attempts: {e}"
-                if 'response' in locals() and response is not None:
-                     error_msg += f"\nResponse Body: {response.text}"
-                raise RuntimeError(error_msg)
-            import time
-            time.sleep(2) # Wait before retry
+    cache = get_cache() if use_cache else None
+    cache_key = _request_key(messages, max_tokens, temperature)
+    cached = _cached_reply(cache, cache_key, validate)
+    if cached is not None:
+        return cached
+
+    client = get_client()
+
+    # Identical requests already in flight (e.g. concurrent API calls) share one upstream call
+    content = _coalescer.run(cache_key, lambda: client.complete(
+        messages, max_tokens=max_tokens, temperature=temperature, retries=retries))
+    _store_reply(cache, cache_key, content, validate)
+    return content
+
 
-def extract_json_from_text(text):
+def query_llm_stream(messages, max_tokens=1000, temperature=0.1, retries=3, use_cache=True,
+                     validate=None):
     """
-    Extracts a JSON object from a string that might contain other text.
-    Handles markdown code blocks.
-    """
-    # Try to find JSON inside markdown blocks (with or without 'json' language identifier)
-    match = re.search(r"```(?:json)?\s*(.*?)\s*```", text, re.DOTALL)
-    if match:
-        json_str = match.group(1)
-    else:
-        # If no markdown, try to find the first '{' or '[' and last '}' or ']'
-        # Find start indices
-        start_obj = text.find('{')
-        start_list = text.find('[')
-        
-        # Determine strict start index
-        start = -1
-        if start_obj != -1 and start_list != -1:
-            start = min(start_obj, start_list)
-        elif start_obj != -1:
-            start = start_obj
-        elif start_list != -1:
-            start = start_list
-            
-        if start == -1:
-            return None
-            
-        # Find end indices (search from right)
-        end_obj = text.rfind('}')
-        end_list = text.rfind(']')
-        
-        end = -1
-        if end_obj != -1 and end_list != -1:
-            end = max(end_obj, end_list)
-        elif end_obj != -1:
-            end = end_obj
-        elif end_list != -1:
-            end = end_list
-            
-        if end == -1 or end < start:
-            return None
-            
-        json_str = text[start:end+1]
+    Streaming variant of query_llm: yields text chunks as they are generated.
+    Shares the response cache with query_llm; a cache hit yields the whole
+    response at once, and a completed stream is stored for later runs if
+    validate (see query_llm) accepts it.
+    """
+    cache = get_cache() if use_cache else None
+    cache_key = _request_key(messages, max_tokens, temperature)
+    cached = _cached_reply(cache, cache_key, validate)
+    if cached is not None:
+        yield cached
+        return
 
-    try:
-        return json.loads(json_str)
-    except json.JSONDecodeError:
-        return None
+    client = get_client()
+
+    parts = []
+    for delta in client.stream(messages, max_tokens=max_tokens, temperature=temperature, retries=retries):
+        parts.append(delta)
+        yield delta
+    _store_reply(cache, cache_key, "".join(parts), validate)
+
+
+async def aquery_llm(messages, max_tokens=1000, temperature=0.1, retries=3, use_cache=True,
+                     validate=None):
+    """
+    asyncio variant of query_llm. Concurrency is bounded by the shared
+    client's max_concurrency (LLM_CONCURRENCY).
+    """
+    cache = get_cache() if use_cache else None
+    cache_key = _request_key(messages, max_tokens, temperature)
+    cached = _cached_reply(cache, cache_key, validate)
+    if cached is not None:
+        return cached
+
+    client = get_client()
+
+    content = await _coalescer.arun(cache_key, lambda: client.acomplete(
+        messages, max_tokens=max_tokens, temperature=temperature, retries=retries))
+    _store_reply(cache, cache_key, content, validate)
+    return content
+
+def extract_json_from_text(text, schema=None):
+    """
+    Extracts a JSON object from a string that might contain other text.
+    Handles markdown code blocks, repairs common defects (trailing commas,
+    single quotes, truncation) and, given a schema name from
+    json_extract.SCHEMAS ("profile", "billing", "recommendations"), skips
+    candidates that do not match it.
+    """
+    metrics = get_metrics()
+    with metrics.timer("json_extract_seconds"):
+        result = extract_json(text, schema=schema)
+    metrics.inc("json_extract_total", result="failed" if result is None else "ok")
+    return result
 
 if __name__ == "__main__":
     # Test block
@@ -0,0 +1,389 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+
+from .llm_cache import make_cache_key
+from .llm_client import (MODEL_ID, RetryableLLMError, _failure_message, _observe_request,
+                         _record_usage)
+from .metrics import get_metrics
+
+OFFLINE_MODEL_ID = "offline-fixtures"
+
+# (tech_stack key, technologies recognised in a project description)
+TECH_KEYWORDS = (
+    ("frontend", ("React", "Angular", "Vue", "Next.js", "Svelte")),
+    ("backend", ("Node.js", "Express", "Django", "Flask", "FastAPI", "Spring Boot", "Ruby on Rails")),
+    ("database", ("PostgreSQL", "MySQL", "MongoDB", "DynamoDB", "Cassandra")),
+    ("cache", ("Redis", "Memcached")),
+    ("storage", ("S3", "Blob Storage", "Cloud Storage")),
+    ("proxy", ("Nginx", "HAProxy", "Traefik")),
+    ("cdn", ("CloudFront", "Cloudflare")),
+    ("hosting", ("AWS", "Azure", "GCP", "DigitalOcean", "Kubernetes")),
+)
+DEFAULT_TECH_STACK = {"backend": "Node.js", "database": "PostgreSQL", "hosting": "AWS"}
+REQUIREMENT_KEYWORDS = (
+    ("availab", "high availability"), ("latency", "low latency"), ("scal", "scalability"),
+    ("secur", "security"), ("complian", "compliance"), ("real-time", "real-time updates"),
+)
+DEFAULT_BUDGET = 5000
+
+_BUDGET_RE = re.compile(r"(?:₹|INR|Rs\.?)\s*([\d,]+)|([\d,]+)\s*(?:INR|rupees)", re.IGNORECASE)
+
+
+def _field(prompt, label):
+    """
+    The rest of the first prompt line starting with "label:".
+    """
+    match = re.search(rf"^\s*{re.escape(label)}:\s*(.*)$", prompt, re.MULTILINE)
+    return match.group(1).strip() if match else ""
+
+
+def _json_field(prompt, label, default):
+    try:
+        return json.loads(_field(prompt, label))
+    except ValueError:
+        return default
+
+
+def _number(text, default=0):
+    try:
+        return float(str(text).split()[0].replace(",", ""))
+    except (ValueError, IndexError):
+        return default
+
+
+def profile_fixture(prompt, rng):
+    match = re.search(r'Description:\s*"(.*?)"\s*\n\s*Output must', prompt, re.DOTALL)
+    description = match.group(1).strip() if match else ""
+    lowered = description.lower()
+
+    tech_stack = {}
+    for role, names in TECH_KEYWORDS:
+        for name in names:
+            if name.lower() in lowered:
+                tech_stack.setdefault(role, name)
+    budget = DEFAULT_BUDGET
+    budget_match = _BUDGET_RE.search(description)
+    if budget_match:
+        budget = int((budget_match.group(1) or budget_match.group(2)).replace(",", ""))
+    words = re.findall(r"[A-Za-z][\w.-]*", description)[:4]
+
+    profile = {
+        "name": " ".join(w.capitalize() for w in words) or "Untitled Project",
+        "budget_inr_per_month": budget,
+        "description": description,
+        "tech_stack": tech_stack or dict(DEFAULT_TECH_STACK),
+        "non_functional_requirements": [req for keyword, req in REQUIREMENT_KEYWORDS
+                                        if keyword in lowered],
+    }
+    return f"```json\n{json.dumps(profile, indent=2)}\n```"
+
+
+def billing_fixture(prompt, rng, months=3, resources=5):
+    from .synthetic_billing import generate_local_billing
+
+    profile = {
+        "name": _field(prompt, "Project"),
+        "budget_inr_per_month": _number(_field(prompt, "Budget"), DEFAULT_BUDGET),
+        "tech_stack": _json_field(prompt, "Tech Stack", {}) or dict(DEFAULT_TECH_STACK),
+    }
+    records = generate_local_billing(profile, months=months, resources=resources,
+                                     seed=rng.randrange(2 ** 32)) or []
+    return json.dumps(records)
+
+
+def recommendations_fixture(prompt, rng):
+    from .recommendation_rules import evaluate_rules
+
+    profile = {"name": _field(prompt, "Project"),
+               "tech_stack": _json_field(prompt, "Tech Stack", {})}
+    # Folded long-tail entries ("Other (N services)") are not real services
+    service_costs = {service: cost for service, cost
+                     in _json_field(prompt, "Service Costs", {}).items()
+                     if not service.startswith("Other (")}
+    analysis = {"service_costs": service_costs,
+                "total_monthly_cost": _number(_field(prompt, "Total Cost")),
+                "budget": _number(_field(prompt, "Budget"))}
+    return json.dumps(evaluate_rules(profile, analysis))
+
+
+def enrichment_fixture(prompt, rng):
+    candidates = _json_field(prompt, "Recommendations", [])
+    items = [{
+        "id": c.get("id"),
+        "description": f"{c.get('description', '')} Verified against the project's tech stack.".strip(),
+        "implementation_effort": c.get("implementation_effort", "medium"),
+        "risk_level": c.get("risk_level", "medium"),
+        "steps": list(c.get("steps") or []) + ["Track the savings in the next billing cycle"],
+    } for c in candidates if isinstance(c, dict)]
+    # Deterministic re-ranking: lowest risk first, then the original order
+    items.sort(key=lambda item: ("low", "medium", "high").index(item["risk_level"])
+               if item["risk_level"] in ("low", "medium", "high") else 1)
+    return json.dumps(items)
+
+
+def default_fixture(prompt, rng):
+    return json.dumps({"status": "ok", "working": True})
+
+
+# (marker in the prompt, fixture) in match order; the last entry is the fallback
+FIXTURES = (
+    ("You are a Cloud Architect Helper", profile_fixture),
+    ("You are a Cloud Billing Simulator", billing_fixture),
+    ("A rules engine produced", enrichment_fixture),
+    ("provide 6-10 cost optimization recommendations", recommendations_fixture),
+    ("", default_fixture),
+)
+
+
+def _malform(text):
+    """
+    Damages a JSON reply the way models do (prose around it, trailing comma)
+    to exercise json_extract's repairs.
+    """
+    body = text.strip().strip("`").removeprefix("json").strip()
+    if body[-1:] in "]}" and len(body) > 2:
+        body = f"{body[:-1].rstrip()},{body[-1]}"
+    return f"Sure! Here is the JSON you asked for:\n{body}\nLet me know if you need anything else."
+
+
+def load_recordings(path):
+    """
+    Reads a JSONL file written by RecordingLLM into {cache key: content}.
+    """
+    recordings = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                recordings[entry["key"]] = entry["content"]
+    return recordings
+
+
+class OfflineLLM:
+    """
+    Network-free stand-in for LLMClient, for CI, benchmarks and air-gapped hosts.
+
+    Replays responses recorded by RecordingLLM when a request matches one,
+    and otherwise answers with deterministic, schema-valid fixtures chosen
+    from the prompt (profile, billing, recommendations, enrichment). The
+    fixtures reuse the local billing generator and the rules engine, so the
+    whole pipeline runs end to end.
+
+    Args:
+        recordings: JSONL file from RecordingLLM, or a {key: content} dict
+        fixtures: Answer unrecorded requests with fixtures (False raises instead)
+        latency: Seconds per request, plus up to jitter seconds at random
+        error_rate: Probability that an attempt fails with a retryable error
+        malformed_rate: Probability that a reply is wrapped in prose with a trailing comma
+        billing_months, billing_resources: Size of the billing fixture
+        chunk_size, chunk_delay: Streaming granularity
+        seed: Seed for jitter, error injection and fixture data
+        replay_model: Model the recordings were made with (part of their keys)
+    """
+
+    # Endpoint part of response-cache keys (LLMClient uses its URL)
+    api_url = "offline"
+
+    def __init__(self, recordings=None, fixtures=True, latency=0.0, jitter=0.0,
+                 error_rate=0.0, malformed_rate=0.0, billing_months=3, billing_resources=5,
+                 chunk_size=64, chunk_delay=0.0, seed=42, retries=3, backoff_base=0.01,
+                 replay_model=MODEL_ID, model=OFFLINE_MODEL_ID):
+        if isinstance(recordings, str):
+            recordings = load_recordings(recordings)
+        self.recordings = recordings or {}
+        self.fixtures = fixtures
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.billing_months = billing_months
+        self.billing_resources = billing_resources
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.seed = seed
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.replay_model = replay_model
+        # Distinct from the live model so offline replies never land in the
+        # response cache under keys a live run would read
+        self.model = model
+        self.request_count = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, **options):
+        """
+        Builds the stand-in from LLM_OFFLINE_* environment variables.
+        """
+        env = {
+            "recordings": os.getenv("LLM_OFFLINE_RECORDINGS"),
+            "latency": float(os.getenv("LLM_OFFLINE_LATENCY", 0)),
+            "error_rate": float(os.getenv("LLM_OFFLINE_ERROR_RATE", 0)),
+            "malformed_rate": float(os.getenv("LLM_OFFLINE_MALFORMED_RATE", 0)),
+            "seed": int(os.getenv("LLM_OFFLINE_SEED", 42)),
+        }
+        env.update(options)
+        return cls(**env)
+
+    def backoff_delay(self, attempt, retry_after=None):
+        return self.backoff_base * (2 ** attempt)
+
+    def respond(self, messages, max_tokens=1000, temperature=0.1):
+        """
+        The reply for a request, without latency or injected errors.
+        """
+        key = make_cache_key(self.replay_model, messages, max_tokens, temperature)
+        if key in self.recordings:
+            get_metrics().inc("llm_offline_responses_total", source="replay")
+            return self.recordings[key]
+        if not self.fixtures:
+            raise RuntimeError("No recorded response for this request (offline LLM, fixtures disabled).")
+
+        prompt = messages[-1].get("content", "") if messages else ""
+        # Seeded per request so a reply does not depend on the order of calls
+        rng = random.Random(f"{self.seed}:{key}")
+        for marker, fixture in FIXTURES:
+            if marker in prompt:
+                break
+        if fixture is billing_fixture:
+            content = fixture(prompt, rng, self.billing_months, self.billing_resources)
+        else:
+            content = fixture(prompt, rng)
+        get_metrics().inc("llm_offline_responses_total", source=fixture.__name__.removesuffix("_fixture"))
+        return content
+
+    def _attempt(self, messages, max_tokens, temperature):
+        """
+        Draws this attempt's delay and outcome. Returns (delay, content) or
+        (delay, RetryableLLMError).
+        """
+        with self._lock:
+            self.request_count += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+            failed = self._random.random() < self.error_rate
+            malformed = self._random.random() < self.malformed_rate
+        if failed:
+            return delay, RetryableLLMError("Injected offline LLM error", reason="injected")
+        content = self.respond(messages, max_tokens, temperature)
+        if malformed:
+            content = _malform(content)
+        return delay, content
+
+    def _finish(self, mode, start, messages, result):
+        if isinstance(result, RetryableLLMError):
+            _observe_request(mode, start, "injected_error")
+            raise result
+        _observe_request(mode, start, 200)
+        prompt_chars = sum(len(m.get("content", "")) for m in messages)
+        _record_usage({"prompt_tokens": prompt_chars // 4, "completion_tokens": len(result) // 4})
+        return result
+
+    def complete(self, messages, max_tokens=1000, temperature=0.1, retries=None, timeout=None):
+        retries = retries or self.retries
+        for attempt in range(retries):
+            start = time.perf_counter()
+            delay, result = self._attempt(messages, max_tokens, temperature)
+            if delay:
+                time.sleep(delay)
+            try:
+                return self._finish("complete", start, messages, result)
+            except RetryableLLMError as e:
+                if attempt == retries - 1:
+                    get_metrics().inc("llm_failures_total", mode="complete", reason=e.reason)
+                    raise RuntimeError(_failure_message(retries, e))
+                get_metrics().inc("llm_retries_total", mode="complete", reason=e.reason)
+                time.sleep(self.backoff_delay(attempt))
+
+    def stream(self, messages, max_tokens=1000, temperature=0.1, retries=None, timeout=None):
+        start = time.perf_counter()
+        content = self.complete(messages, max_tokens, temperature, retries, timeout)
+        get_metrics().observe("llm_first_token_seconds", time.perf_counter() - start)
+        size = max(1, self.chunk_size)
+        for offset in range(0, len(content), size):
+            if offset and self.chunk_delay:
+                time.sleep(self.chunk_delay)
+            yield content[offset:offset + size]
+        get_metrics().observe("llm_stream_seconds", time.perf_counter() - start)
+
+    async def acomplete(self, messages, max_tokens=1000, temperature=0.1, retries=None, timeout=None):
+        import asyncio
+
+        retries = retries or self.retries
+        for attempt in range(retries):
+            start = time.perf_counter()
+            delay, result = self._attempt(messages, max_tokens, temperature)
+            if delay:
+                await asyncio.sleep(delay)
+            try:
+                return self._finish("async", start, messages, result)
+            except RetryableLLMError as e:
+                if attempt == retries - 1:
+                    get_metrics().inc("llm_failures_total", mode="async", reason=e.reason)
+                    raise RuntimeError(_failure_message(retries, e))
+                get_metrics().inc("llm_retries_total", mode="async", reason=e.reason)
+                await asyncio.sleep(self.backoff_delay(attempt))
+
+    def close(self):
+        pass
+
+
+class RecordingLLM:
+    """
+    Wraps a client and appends every completed request and reply to a JSONL
+    file that OfflineLLM can replay (LLM_RECORD=path).
+    """
+
+    def __init__(self, client, path):
+        self.client = client
+        self.path = path
+        self.model = client.model
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def _record(self, messages, max_tokens, temperature, content):
+        entry = {
+            "key": make_cache_key(self.model, messages, max_tokens, temperature),
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "content": content,
+        }
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def complete(self, messages, max_tokens=1000, temperature=0.1, retries=None, timeout=None):
+        content = self.client.complete(messages, max_tokens, temperature, retries, timeout)
+        self._record(messages, max_tokens, temperature, content)
+        return content
+
+    def stream(self, messages, max_tokens=1000, temperature=0.1, retries=None, timeout=None):
+        parts = []
+        for delta in self.client.stream(messages, max_tokens, temperature, retries, timeout):
+            parts.append(delta)
+            yield delta
+        self._record(messages, max_tokens, temperature, "".join(parts))
+
+    async def acomplete(self, messages, max_tokens=1000, temperature=0.1, retries=None, timeout=None):
+        content = await self.client.acomplete(messages, max_tokens, temperature, retries, timeout)
+        self._record(messages, max_tokens, temperature, content)
+        return content
+
+    def close(self):
+        self.client.close()
+
+
+def fixture_responder(payload):
+    """
+    StubLLMServer responder serving the offline fixtures over HTTP.
+    """
+    messages = payload.get("messages", [])
+    return OfflineLLM().respond(messages, payload.get("max_tokens", 1000),
+                                payload.get("temperature", 0.1))
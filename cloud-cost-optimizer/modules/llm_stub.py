@@ -0,0 +1,203 @@
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COMPLETIONS_PATH = "/v1/chat/completions"
+
+
+def default_responder(payload):
+    """
+    Returns a fixed JSON document as the assistant message.
+    """
+    return json.dumps({"status": "ok", "working": True})
+
+
+def _usage(payload, content):
+    # Rough 4-characters-per-token estimate, enough to exercise usage accounting
+    prompt_chars = sum(len(m.get("content", "")) for m in payload.get("messages", []))
+    prompt_tokens = prompt_chars // 4
+    completion_tokens = len(content) // 4
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+class StubLLMServer:
+    """
+    Local HTTP server speaking the OpenAI-compatible /v1/chat/completions shape.
+
+    Args:
+        responder: Callable(payload) -> str producing the assistant content
+        latency: Seconds to sleep before answering each request
+        rate_limit_every: Answer every n-th request with 429 + Retry-After (0 = never)
+        retry_after: Value sent in the Retry-After header
+        chunk_size: Characters per server-sent event for "stream": true requests
+        chunk_delay: Seconds to sleep between streamed events
+        host, port: Bind address (port 0 picks a free port)
+    """
+
+    def __init__(self, responder=None, latency=0.0, rate_limit_every=0,
+                 retry_after=0.1, chunk_size=16, chunk_delay=0.0, host="127.0.0.1", port=0):
+        self.responder = responder or default_responder
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.request_count = 0
+        self.rate_limited_count = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}{COMPLETIONS_PATH}"
+
+    def _next_request(self):
+        with self._lock:
+            self.request_count += 1
+            limited = bool(self.rate_limit_every) and self.request_count % self.rate_limit_every == 0
+            if limited:
+                self.rate_limited_count += 1
+            return limited
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status, body, headers=None):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_stream(self, payload, content):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                chunk_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+                size = max(1, server.chunk_size)
+                for start in range(0, len(content), size):
+                    event = {
+                        "id": chunk_id,
+                        "object": "chat.completion.chunk",
+                        "model": payload.get("model"),
+                        "choices": [{
+                            "index": 0,
+                            "delta": {"content": content[start:start + size]},
+                            "finish_reason": None,
+                        }],
+                    }
+                    self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                    if server.chunk_delay:
+                        time.sleep(server.chunk_delay)
+                if (payload.get("stream_options") or {}).get("include_usage"):
+                    event = {
+                        "id": chunk_id,
+                        "object": "chat.completion.chunk",
+                        "model": payload.get("model"),
+                        "choices": [],
+                        "usage": _usage(payload, content),
+                    }
+                    self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                raw = self.rfile.read(length) if length else b"{}"
+                if self.path != COMPLETIONS_PATH:
+                    self._send_json(404, {"error": f"unknown path {self.path}"})
+                    return
+                try:
+                    payload = json.loads(raw)
+                except json.JSONDecodeError:
+                    self._send_json(400, {"error": "invalid JSON body"})
+                    return
+
+                if server._next_request():
+                    self._send_json(429, {"error": "rate limited"},
+                                    {"Retry-After": str(server.retry_after)})
+                    return
+                if server.latency:
+                    time.sleep(server.latency)
+
+                content = server.responder(payload)
+                if payload.get("stream"):
+                    self._send_stream(payload, content)
+                    return
+                self._send_json(200, {
+                    "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": payload.get("model"),
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": _usage(payload, content),
+                })
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local stub LLM server.")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--rate-limit-every", type=int, default=0)
+    parser.add_argument("--fixtures", action="store_true",
+                        help="Answer with the offline LLM's schema-valid fixtures (llm_offline)")
+    args = parser.parse_args()
+
+    responder = None
+    if args.fixtures:
+        from modules.llm_offline import fixture_responder
+        responder = fixture_responder
+
+    stub = StubLLMServer(responder=responder, latency=args.latency,
+                         rate_limit_every=args.rate_limit_every, port=args.port)
+    print(f"Stub LLM listening on {stub.url}")
+    try:
+        stub._httpd.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
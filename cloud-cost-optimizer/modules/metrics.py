@@ -0,0 +1,228 @@
+import json
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+MAX_SAMPLES = 2048
+QUANTILES = (0.5, 0.95, 0.99)
+PROMETHEUS_PREFIX = "cloud_cost_optimizer_"
+# Upper bounds (seconds) of the histogram buckets kept for *_seconds metrics,
+# which Prometheus can aggregate across processes, unlike quantiles
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+class Summary:
+    """
+    Count, sum, min and max of observed values, plus a bounded reservoir
+    sample for quantiles and, with buckets, a count per histogram bucket.
+    """
+
+    def __init__(self, buckets=None):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.samples = []
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets) if buckets else None
+
+    def observe(self, value):
+        if self.buckets:
+            # Counted in the first bucket whose upper bound is >= value
+            i = bisect_left(self.buckets, value)
+            if i < len(self.buckets):
+                self.bucket_counts[i] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(value)
+        else:
+            # Reservoir sampling keeps every observation equally likely
+            index = random.randrange(self.count)
+            if index < MAX_SAMPLES:
+                self.samples[index] = value
+
+    def quantile(self, q):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def to_dict(self):
+        data = {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "min": self.min,
+            "max": self.max,
+            "mean": round(self.total / self.count, 6) if self.count else None,
+            **{f"p{int(q * 100)}": self.quantile(q) for q in QUANTILES},
+        }
+        if self.buckets:
+            # Cumulative, as in Prometheus: observations <= each upper bound
+            cumulative = 0
+            data["buckets"] = []
+            for bound, count in zip(self.buckets, self.bucket_counts):
+                cumulative += count
+                data["buckets"].append([bound, cumulative])
+        return data
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class MetricsRegistry:
+    """
+    Thread-safe in-process metrics: counters, gauges and summaries, each
+    identified by a name and a set of labels.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.summaries = {}
+        self.started_at = time.time()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self.gauges[(name, _label_key(labels))] = value
+
+    def observe(self, name, value, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            summary = self.summaries.get(key)
+            if summary is None:
+                buckets = LATENCY_BUCKETS if name.endswith("_seconds") else None
+                summary = self.summaries[key] = Summary(buckets)
+            summary.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """
+        Observes the wall time of the with-block in seconds.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.summaries.clear()
+            self.started_at = time.time()
+
+    def snapshot(self):
+        """
+        JSON-serializable view of every metric.
+        """
+        with self._lock:
+            return {
+                "started_at": self.started_at,
+                "collected_at": time.time(),
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self.counters.items())
+                ],
+                "gauges": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self.gauges.items())
+                ],
+                "summaries": [
+                    {"name": name, "labels": dict(labels), **summary.to_dict()}
+                    for (name, labels), summary in sorted(self.summaries.items(), key=lambda x: x[0])
+                ],
+            }
+
+    def to_prometheus(self, prefix=PROMETHEUS_PREFIX):
+        """
+        Renders the metrics in the Prometheus text exposition format. Counter
+        names always end in _total; *_seconds metrics are histograms, other
+        observed values summaries with quantiles.
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        def emit(kind, entries, render, suffix=""):
+            seen = set()
+            for entry in entries:
+                name = prefix + entry["name"]
+                if suffix and not name.endswith(suffix):
+                    name += suffix
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# TYPE {name} {kind}")
+                render(name, entry)
+
+        emit("counter", snapshot["counters"],
+             lambda name, e: lines.append(f"{name}{_format_labels(e['labels'])} {e['value']}"),
+             suffix="_total")
+        emit("gauge", snapshot["gauges"],
+             lambda name, e: lines.append(f"{name}{_format_labels(e['labels'])} {e['value']}"))
+
+        def render_histogram(name, entry):
+            for bound, count in entry["buckets"] + [["+Inf", entry["count"]]]:
+                labels = dict(entry["labels"], le=str(bound))
+                lines.append(f"{name}_bucket{_format_labels(labels)} {count}")
+            labels = _format_labels(entry["labels"])
+            lines.append(f"{name}_sum{labels} {entry['sum']}")
+            lines.append(f"{name}_count{labels} {entry['count']}")
+
+        emit("histogram", [e for e in snapshot["summaries"] if "buckets" in e], render_histogram)
+
+        def render_summary(name, entry):
+            for q in QUANTILES:
+                value = entry[f"p{int(q * 100)}"]
+                if value is not None:
+                    labels = dict(entry["labels"], quantile=str(q))
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+            labels = _format_labels(entry["labels"])
+            lines.append(f"{name}_sum{labels} {entry['sum']}")
+            lines.append(f"{name}_count{labels} {entry['count']}")
+
+        emit("summary", [e for e in snapshot["summaries"] if "buckets" not in e], render_summary)
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=4)
+
+    def write_prometheus(self, path):
+        # Written via rename so a node_exporter textfile collector never reads a partial file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    parts = []
+    for key, value in sorted(labels.items()):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+_default_registry = MetricsRegistry()
+
+
+def get_metrics():
+    """
+    Returns the process-wide MetricsRegistry the pipeline reports to.
+    """
+    return _default_registry
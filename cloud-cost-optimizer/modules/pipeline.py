@@ -0,0 +1,242 @@
+import hashlib
+import json
+import os
+import time
+
+from .profile_extractor import extract_project_profile
+from .billing_generator import generate_synthetic_billing
+from .cost_analyzer import analyze_costs
+from .recommendation_engine import generate_recommendations
+from .metrics import get_metrics
+from .records import validate_billing, validate_recommendations
+
+STATE_FILE = "pipeline_state.json"
+PROFILE_FILE = "project_profile.json"
+BILLING_FILE = "mock_billing.json"
+ANALYSIS_FILE = "cost_analysis.json"
+RECOMMENDATIONS_FILE = "recommendations.json"
+
+
+class StageError(RuntimeError):
+    """
+    Raised when a pipeline stage produces no output.
+    """
+
+    def __init__(self, stage):
+        super().__init__(f"stage '{stage}' produced no output")
+        self.stage = stage
+
+
+def fingerprint(*parts):
+    """
+    Stable sha256 over JSON-serializable stage inputs.
+    """
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def write_json_atomic(path, data):
+    """
+    Writes JSON via a temp file + rename so a crash never leaves a half-written file.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+def read_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class Stage:
+    """
+    A pipeline node.
+
+    Args:
+        name: Stage name used in the state file
+        func: Callable taking the input values in order and returning the output
+        inputs: Names of the pipeline values the stage consumes
+        output: Name of the value the stage produces
+        output_file: JSON file the output is stored in
+        key: Optional callable(*inputs) returning only the parts of the inputs
+             that matter for this stage; defaults to the inputs themselves
+        version: Bump when the stage's output format changes to invalidate
+                 previously stored outputs
+        load: Optional callable applied to the output (fresh, reloaded from
+              output_file or passed in directly) before later stages see it,
+              e.g. to validate and type it once
+    """
+
+    def __init__(self, name, func, inputs, output, output_file, key=None, version=1, load=None):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.output = output
+        self.output_file = output_file
+        self.key = key or (lambda *values: values)
+        self.version = version
+        self.load = load
+
+    def fingerprint(self, values):
+        return fingerprint(self.name, self.version, self.key(*values))
+
+
+class Pipeline:
+    """
+    Runs stages in order, re-executing only those whose input fingerprint
+    changed since the last run (or whose stored output is missing).
+
+    Fingerprints and timings are kept in pipeline_state.json inside workdir,
+    next to the stage output files.
+    """
+
+    def __init__(self, stages, workdir=".", state_file=STATE_FILE, force=False):
+        self.stages = list(stages)
+        self.workdir = workdir
+        self.state_path = os.path.join(workdir, state_file)
+        self.force = force
+        self.timings = {}
+        self.executed = []
+        self.skipped = []
+
+    def _load_state(self):
+        return read_json(self.state_path) or {"stages": {}}
+
+    def _needed_stages(self, values, targets):
+        producers = {stage.output: stage for stage in self.stages}
+        needed = set()
+        pending = list(targets)
+        while pending:
+            name = pending.pop()
+            stage = producers.get(name)
+            if stage is None or name in values or stage.name in needed:
+                continue
+            needed.add(stage.name)
+            pending.extend(stage.inputs)
+        return needed
+
+    def run(self, values, targets=None):
+        """
+        Computes the target values (default: every stage output) from the
+        given initial values and returns the full value dict. Values passed in
+        directly only go through their stage's load and the stage is not run.
+        """
+        values = dict(values)
+        targets = targets or [stage.output for stage in self.stages]
+        needed = self._needed_stages(values, targets)
+        for stage in self.stages:
+            if stage.load and stage.output in values:
+                values[stage.output] = stage.load(values[stage.output])
+
+        os.makedirs(self.workdir, exist_ok=True)
+        state = self._load_state()
+        metrics = get_metrics()
+
+        for stage in self.stages:
+            if stage.name not in needed:
+                continue
+            inputs = [values[name] for name in stage.inputs]
+            inputs_fp = stage.fingerprint(inputs)
+            output_path = os.path.join(self.workdir, stage.output_file)
+
+            previous = state["stages"].get(stage.name)
+            if not self.force and previous and previous.get("fingerprint") == inputs_fp:
+                output = read_json(output_path)
+                if output is not None:
+                    values[stage.output] = stage.load(output) if stage.load else output
+                    self.skipped.append(stage.name)
+                    self.timings[stage.name] = 0.0
+                    metrics.inc("pipeline_stages_total", stage=stage.name, result="skipped")
+                    continue
+
+            start = time.perf_counter()
+            output = stage.func(*inputs)
+            elapsed = time.perf_counter() - start
+            self.timings[stage.name] = round(elapsed, 4)
+            metrics.observe("pipeline_stage_seconds", elapsed, stage=stage.name)
+            if output is None:
+                metrics.inc("pipeline_stages_total", stage=stage.name, result="failed")
+                raise StageError(stage.name)
+            metrics.inc("pipeline_stages_total", stage=stage.name, result="executed")
+
+            write_json_atomic(output_path, output)
+            state["stages"][stage.name] = {
+                "fingerprint": inputs_fp,
+                "seconds": self.timings[stage.name],
+                "completed_at": time.time(),
+            }
+            write_json_atomic(self.state_path, state)
+            values[stage.output] = stage.load(output) if stage.load else output
+            self.executed.append(stage.name)
+
+        return values
+
+
+def _billing_key(profile):
+    # LLM billing depends on what is deployed, not on the budget: a budget
+    # change must not regenerate (and re-randomize) it. The local generator
+    # is seeded and scales its costs to the budget, so there the budget is
+    # part of the key.
+    source = os.getenv("BILLING_SOURCE", "llm")
+    key = (profile.get('name'), profile.get('tech_stack', {}), source)
+    if source == "local":
+        key += (profile.get('budget_inr_per_month'),)
+    return key
+
+
+def _billing_identity(billing_data):
+    # A BillingStore is identified by its segment manifest, not its contents
+    if hasattr(billing_data, 'fingerprint'):
+        return billing_data.fingerprint()
+    return billing_data
+
+
+def _analysis_key(profile, billing_data):
+    return profile.get('budget_inr_per_month', 0), _billing_identity(billing_data)
+
+
+def _recommendation_key(profile, analysis, billing_data):
+    # Billing is included because the resource-level rules read usage, which
+    # the analysis summary does not cover.
+    return (
+        profile.get('name'),
+        profile.get('tech_stack', {}),
+        profile.get('non_functional_requirements', []),
+        analysis,
+        _billing_identity(billing_data),
+        os.getenv("RECOMMENDATION_SOURCE", "hybrid"),
+    )
+
+
+def _recommend(profile, analysis, billing_data):
+    recommendations = generate_recommendations(profile, analysis, billing_data)
+    # An empty LLM-only result means the call failed; treat it as no output so
+    # the stage is retried on the next run instead of being cached.
+    if not recommendations and os.getenv("RECOMMENDATION_SOURCE", "hybrid") == "llm":
+        return None
+    return recommendations
+
+
+def default_stages(profile_file=PROFILE_FILE, billing_file=BILLING_FILE,
+                   analysis_file=ANALYSIS_FILE, recommendations_file=RECOMMENDATIONS_FILE,
+                   billing=None, recommend=None):
+    """
+    The extract -> billing -> analyze -> recommend stage graph.
+
+    billing / recommend optionally replace the stage functions (e.g. with
+    streaming variants that render progress) without changing fingerprints.
+    """
+    return [
+        Stage("extract", extract_project_profile, ["description"], "profile", profile_file),
+        Stage("billing", billing or generate_synthetic_billing, ["profile"], "billing",
+              billing_file, key=_billing_key, load=validate_billing),
+        Stage("analyze", analyze_costs, ["profile", "billing"], "analysis", analysis_file,
+              key=_analysis_key, version=3),
+        Stage("recommend", recommend or _recommend, ["profile", "analysis", "billing"],
+              "recommendations", recommendations_file, key=_recommendation_key, version=2,
+              load=validate_recommendations),
+    ]
@@ -0,0 +1,207 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .pipeline import (
+    Pipeline, default_stages, read_json, write_json_atomic, PROFILE_FILE, BILLING_FILE
+)
+from .report import build_report
+
+DESCRIPTION_FILE = "project_description.txt"
+REPORT_FILE = "cost_optimization_report.json"
+PORTFOLIO_REPORT_FILE = "portfolio_report.json"
+STAGES = ("extract", "billing", "analyze", "recommend")
+
+
+def discover_projects(source):
+    """
+    Returns a list of {"name", "path"} project entries.
+
+    source is either a directory whose subdirectories each hold a
+    project_description.txt (or a ready project_profile.json), or a JSON
+    manifest listing project directories as strings or {"name", "path"}
+    objects (paths relative to the manifest). Names default to the
+    directory name; entries that would share a name (and so an output
+    directory) get their 1-based manifest position appended, e.g. "api-2",
+    or a further counter if another entry already uses that name. A name
+    is used as a directory under the output directory, so names with path
+    separators, "." or ".." raise ValueError.
+    """
+    if os.path.isdir(source):
+        projects = []
+        for entry in sorted(os.listdir(source)):
+            path = os.path.join(source, entry)
+            if not os.path.isdir(path):
+                continue
+            if os.path.exists(os.path.join(path, DESCRIPTION_FILE)) or \
+                    os.path.exists(os.path.join(path, PROFILE_FILE)):
+                projects.append({"name": entry, "path": path})
+        return projects
+
+    manifest = read_json(source)
+    if manifest is None:
+        raise FileNotFoundError(f"No project directory or manifest at {source}")
+    if isinstance(manifest, dict):
+        manifest = manifest.get("projects", [])
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    projects = []
+    for item in manifest:
+        if isinstance(item, str):
+            item = {"path": item}
+        path = os.path.join(base_dir, item["path"])
+        name = item.get("name") or os.path.basename(os.path.normpath(path))
+        projects.append({"name": _check_name(name), "path": path})
+
+    counts = {}
+    for project in projects:
+        counts[project["name"]] = counts.get(project["name"], 0) + 1
+    # Renamed entries must not collide with any name that is kept
+    taken = {name for name, count in counts.items() if count == 1}
+    for position, project in enumerate(projects, start=1):
+        name = project["name"]
+        if counts[name] > 1:
+            candidate = f"{name}-{position}"
+            suffix = 2
+            while candidate in taken:
+                candidate = f"{name}-{position}-{suffix}"
+                suffix += 1
+            project["name"] = candidate
+            taken.add(candidate)
+    return projects
+
+
+def _check_name(name):
+    name = str(name)
+    separators = {"/", "\\", os.sep, os.altsep} - {None}
+    if name in ("", ".", "..") or any(sep in name for sep in separators):
+        raise ValueError(f"Invalid project name '{name}' in manifest: names are used as "
+                         f"output directories and cannot contain path separators")
+    return name
+
+
+class ProjectRunner:
+    """
+    Runs extract -> billing -> analyze -> recommend for one project.
+
+    Stage outputs and fingerprints live in the project's output directory
+    (see modules.pipeline), so unchanged stages are skipped and an
+    interrupted run resumes from the last completed stage.
+    """
+
+    def __init__(self, project, out_dir, force=False):
+        self.name = project["name"]
+        self.path = project["path"]
+        self.out_dir = os.path.join(out_dir, self.name)
+        self.pipeline = Pipeline(default_stages(), workdir=self.out_dir, force=force)
+
+    @property
+    def timings(self):
+        return self.pipeline.timings
+
+    @property
+    def skipped(self):
+        return self.pipeline.skipped
+
+    def run(self):
+        # A project folder may provide its own profile and/or billing export;
+        # otherwise they are extracted / generated.
+        values = {}
+        provided_profile = read_json(os.path.join(self.path, PROFILE_FILE))
+        if provided_profile:
+            values["profile"] = provided_profile
+        else:
+            with open(os.path.join(self.path, DESCRIPTION_FILE), 'r', encoding='utf-8') as f:
+                values["description"] = f.read()
+        provided_billing = read_json(os.path.join(self.path, BILLING_FILE))
+        if provided_billing:
+            values["billing"] = provided_billing
+
+        values = self.pipeline.run(values)
+
+        report = build_report(values["profile"], values["analysis"], values["recommendations"])
+        report["timings"] = self.timings
+        write_json_atomic(os.path.join(self.out_dir, REPORT_FILE), report)
+        return report
+
+
+def build_portfolio_report(results):
+    """
+    Rolls per-project reports up into a portfolio summary.
+    """
+    projects = []
+    stage_seconds = {stage: 0.0 for stage in STAGES}
+    for result in results:
+        if result["status"] != "ok":
+            continue
+        report = result["report"]
+        analysis = report.get("analysis") or {}
+        projects.append({
+            "name": result["name"],
+            "project_name": report.get("project_name"),
+            "total_monthly_cost": analysis.get("total_monthly_cost", 0),
+            "budget": analysis.get("budget", 0),
+            "budget_variance": analysis.get("budget_variance", 0),
+            "is_over_budget": analysis.get("is_over_budget", False),
+            "total_potential_savings": report["summary"]["total_potential_savings"],
+            "skipped_stages": result["skipped"],
+        })
+        for stage, seconds in result["timings"].items():
+            stage_seconds[stage] = round(stage_seconds.get(stage, 0.0) + seconds, 4)
+
+    projects.sort(key=lambda p: p["budget_variance"], reverse=True)
+    return {
+        "projects_count": len(results),
+        "succeeded": len(projects),
+        "failed": [
+            {"name": r["name"], "error": r["error"]} for r in results if r["status"] != "ok"
+        ],
+        "total_monthly_cost": sum(p["total_monthly_cost"] for p in projects),
+        "total_budget": sum(p["budget"] for p in projects),
+        "over_budget_count": sum(1 for p in projects if p["is_over_budget"]),
+        "total_potential_savings": sum(p["total_potential_savings"] for p in projects),
+        "stage_seconds": stage_seconds,
+        "projects": projects,
+    }
+
+
+def run_portfolio(source, out_dir, workers=4, force=False, progress=print):
+    """
+    Analyzes every project from a directory or manifest with a worker pool.
+
+    LLM concurrency is bounded separately by the shared LLM client
+    (LLM_CONCURRENCY / set_client). Writes per-project reports under
+    out_dir/<project>/ and the rollup to out_dir/portfolio_report.json.
+    """
+    projects = discover_projects(source)
+    os.makedirs(out_dir, exist_ok=True)
+
+    results = []
+    done = 0
+    start = time.perf_counter()
+
+    def run_one(project):
+        runner = ProjectRunner(project, out_dir, force=force)
+        try:
+            report = runner.run()
+            return {"name": runner.name, "status": "ok", "report": report,
+                    "timings": runner.timings, "skipped": runner.skipped}
+        except Exception as e:
+            return {"name": runner.name, "status": "failed", "error": str(e),
+                    "timings": runner.timings, "skipped": runner.skipped}
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(run_one, project) for project in projects]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            done += 1
+            timing = ", ".join(f"{k} {v:.2f}s" for k, v in result["timings"].items())
+            status = "ok" if result["status"] == "ok" else f"FAILED ({result['error']})"
+            progress(f"({done}/{len(projects)}) {result['name']}: {status} - {timing or 'no stages run'}")
+
+    results.sort(key=lambda r: r["name"])
+    portfolio = build_portfolio_report(results)
+    portfolio["elapsed_seconds"] = round(time.perf_counter() - start, 4)
+    write_json_atomic(os.path.join(out_dir, PORTFOLIO_REPORT_FILE), portfolio)
+    return portfolio
@@ -1,11 +1,9 @@
-from .llm_client import query_llm, extract_json_from_text
+from .llm_client import query_llm, aquery_llm, extract_json_from_text, parses_as
+from .prompt_budget import build_prompt, log_compaction, TextField
 import json
 
-def extract_project_profile(description):
-    """
-    Extracts structured project profile from a plain text description using LLM.
-    """
-    prompt = f"""
+def _profile_messages(description):
+    template = """
     You are a Cloud Architect Helper. 
     Analyze the following project description and extract a structured JSON profile.
     
@@ -22,28 +20,63 @@ def extract_project_profile(description):
     Return ONLY the JSON object. Do not include any explanation or markdown formatting other than ```json blocks.
     """
     
-    messages = [{"role": "user", "content": prompt}]
+    prompt, report = build_prompt(template, {"description": TextField(description)}, name="profile")
+    log_compaction(report)
     
-    try:
-        response_text = query_llm(messages, max_tokens=500, temperature=0.1)
-        
-        if response_text:
-            profile = extract_json_from_text(response_text)
-            if profile:
-                # Ensure budget is an integer
-                if 'budget_inr_per_month' in profile:
-                    try:
-                        profile['budget_inr_per_month'] = int(profile['budget_inr_per_month'])
-                    except:
-                         profile['budget_inr_per_month'] = 5000 
-                return profile
-            else:
-                print(f"Failed to parse JSON from LLM response: {response_text}")
-                return None
+    return [{"role": "user", "content": prompt}]
+
+def _parse_profile(response_text):
+    if response_text:
+        profile = extract_json_from_text(response_text, schema="profile")
+        if profile:
+            # Ensure budget is an integer
+            if 'budget_inr_per_month' in profile:
+                try:
+                    profile['budget_inr_per_month'] = int(profile['budget_inr_per_month'])
+                except:
+                     profile['budget_inr_per_month'] = 5000 
+            return profile
         else:
-             print(f"LLM returned no response.")
-             return None
+            print(f"Failed to parse JSON from LLM response: {response_text}")
+            return None
+    else:
+         print(f"LLM returned no response.")
+         return None
+
+def extract_project_profile(description):
+    """
+    Extracts structured project profile from a plain text description using LLM.
+    """
+    messages = _profile_messages(description)
+    
+    try:
+        response_text = query_llm(messages, max_tokens=500, temperature=0.1, validate=parses_as("profile"))
+        return _parse_profile(response_text)
 
     except Exception as e:
         print(f"Error during profile extraction: {e}")
         return None
+
+async def aextract_project_profile(description):
+    """
+    asyncio variant of extract_project_profile.
+    """
+    messages = _profile_messages(description)
+    
+    try:
+        response_text = await aquery_llm(messages, max_tokens=500, temperature=0.1,
+                                         validate=parses_as("profile"))
+        return _parse_profile(response_text)
+
+    except Exception as e:
+        print(f"Error during profile extraction: {e}")
+        return None
+
+async def aextract_project_profiles(descriptions):
+    """
+    Extracts profiles for many descriptions concurrently (bounded by the
+    LLM client's concurrency limit). Results keep the input order.
+    """
+    import asyncio
+
+    return await asyncio.gather(*(aextract_project_profile(d) for d in descriptions))
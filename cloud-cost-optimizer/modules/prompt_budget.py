@@ -0,0 +1,213 @@
+import json
+import os
+import re
+
+from .metrics import get_metrics
+
+DEFAULT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", 1500))
+OTHER_LABEL = "Other"
+
+_WORD_RE = re.compile(r"\w+")
+_SYMBOL_RE = re.compile(r"[^\w\s]")
+
+
+def estimate_tokens(text):
+    """
+    Local, tokenizer-free token estimate: one token per word plus one per
+    further 6 characters of long words, and one per punctuation symbol.
+    Errs on the high side for JSON, which is what the prompts mostly carry.
+    """
+    if not text:
+        return 0
+    words = _WORD_RE.findall(text)
+    return len(words) + sum(len(w) // 6 for w in words if len(w) > 6) + len(_SYMBOL_RE.findall(text))
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _truncate(text, max_chars):
+    if max_chars is None or len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars].rstrip()}... (+{len(text) - max_chars} chars)"
+
+
+class CostsField:
+    """
+    A {name: cost} mapping rendered highest cost first. Level 0 keeps every
+    entry and its exact value; later levels round the values and fold the
+    long tail (entries below min_share of the total, or beyond max_items)
+    into a single "Other (N services)" entry.
+    """
+
+    # (max_items, min_share) per compaction level; None keeps everything as-is
+    levels = (None, (25, 0.005), (15, 0.01), (8, 0.02), (5, 0.05), (3, 0.1))
+
+    def __init__(self, costs, label="services"):
+        self.costs = costs or {}
+        self.label = label
+
+    def raw(self):
+        return json.dumps(self.costs)
+
+    def render(self, level):
+        ordered = sorted(self.costs.items(), key=lambda x: x[1] or 0, reverse=True)
+        if self.levels[level] is None:
+            return _dumps(dict(ordered))
+        max_items, min_share = self.levels[level]
+        total = sum(cost or 0 for _, cost in ordered)
+        kept, tail_cost, tail_count = {}, 0, 0
+        for name, cost in ordered:
+            cost = cost or 0
+            if len(kept) < max_items and (not total or cost >= total * min_share):
+                kept[name] = round(cost)
+            else:
+                tail_cost += cost
+                tail_count += 1
+        if tail_count:
+            kept[f"{OTHER_LABEL} ({tail_count} {self.label})"] = round(tail_cost)
+        return _dumps(kept)
+
+
+class TextField:
+    """
+    Free text, truncated to fewer characters at each compaction level.
+    """
+
+    levels = (None, 2000, 800, 300, 120)
+
+    def __init__(self, text):
+        self.text = "" if text is None else str(text)
+
+    def raw(self):
+        return self.text
+
+    def render(self, level):
+        return _truncate(self.text, self.levels[level])
+
+
+class MappingField:
+    """
+    A small dict (e.g. tech_stack) rendered as compact JSON; long values are
+    truncated and extra keys dropped as the level increases.
+    """
+
+    # (max_keys, max_value_chars) per compaction level
+    levels = ((None, None), (30, 200), (20, 100), (12, 50), (8, 25))
+
+    def __init__(self, mapping):
+        self.mapping = mapping or {}
+
+    def raw(self):
+        return json.dumps(self.mapping)
+
+    def render(self, level):
+        if not isinstance(self.mapping, dict):
+            return _truncate(_dumps(self.mapping), self.levels[level][1])
+        max_keys, max_chars = self.levels[level]
+        items = list(self.mapping.items())
+        kept = items if max_keys is None else items[:max_keys]
+        out = {}
+        for key, value in kept:
+            if isinstance(value, str):
+                out[key] = _truncate(value, max_chars)
+            elif max_chars is None:
+                out[key] = value
+            else:
+                out[key] = _truncate(_dumps(value), max_chars)
+        if len(kept) < len(items):
+            out["..."] = f"+{len(items) - len(kept)} more"
+        return _dumps(out)
+
+
+class ListField:
+    """
+    A list of short strings (e.g. non-functional requirements).
+    """
+
+    # (max_items, max_item_chars) per compaction level
+    levels = ((None, None), (20, 120), (10, 80), (6, 60), (3, 40))
+
+    def __init__(self, items):
+        self.items = items or []
+
+    def raw(self):
+        return json.dumps(self.items)
+
+    def render(self, level):
+        if not isinstance(self.items, list):
+            return _truncate(_dumps(self.items), self.levels[level][1])
+        max_items, max_chars = self.levels[level]
+        kept = self.items if max_items is None else self.items[:max_items]
+        out = [_truncate(v, max_chars) if isinstance(v, str) else v for v in kept]
+        if len(kept) < len(self.items):
+            out.append(f"+{len(self.items) - len(kept)} more")
+        return _dumps(out)
+
+
+def describe_compaction(report):
+    """
+    One line describing what build_prompt() shortened, or None when every
+    field was sent in full.
+    """
+    compacted = [key for key, level in report["levels"].items() if level]
+    if not compacted:
+        return None
+    status = "" if report["within_budget"] else ", still over budget"
+    return (f"Prompt '{report['name']}' shortened to fit {report['budget']} tokens: "
+            f"~{report['original_tokens']} -> ~{report['tokens']} estimated tokens{status} "
+            f"(compacted: {', '.join(compacted)}).")
+
+
+def log_compaction(report):
+    """
+    Prints describe_compaction(report) if the prompt lost detail.
+    """
+    message = describe_compaction(report)
+    if message:
+        print(message)
+
+
+def build_prompt(template, fields, budget=None, name="prompt"):
+    """
+    Fills template's {placeholders} from fields (name -> *Field) and compacts
+    the largest field one level at a time until the estimated prompt size
+    fits the token budget (or nothing can shrink further).
+
+    Returns (prompt, report) where report holds the original (uncompacted)
+    and final token estimates and the tokens saved.
+    """
+    budget = budget or DEFAULT_TOKEN_BUDGET
+    template_tokens = estimate_tokens(template.format(**{key: "" for key in fields}))
+    original_tokens = template_tokens + sum(estimate_tokens(f.raw()) for f in fields.values())
+
+    levels = {key: 0 for key in fields}
+    rendered = {key: f.render(0) for key, f in fields.items()}
+    sizes = {key: estimate_tokens(text) for key, text in rendered.items()}
+    tokens = template_tokens + sum(sizes.values())
+
+    while tokens > budget:
+        shrinkable = [key for key in fields if levels[key] < len(fields[key].levels) - 1]
+        if not shrinkable:
+            break
+        key = max(shrinkable, key=sizes.get)
+        levels[key] += 1
+        rendered[key] = fields[key].render(levels[key])
+        tokens -= sizes[key]
+        sizes[key] = estimate_tokens(rendered[key])
+        tokens += sizes[key]
+
+    report = {
+        "name": name,
+        "budget": budget,
+        "original_tokens": original_tokens,
+        "tokens": tokens,
+        "saved_tokens": max(0, original_tokens - tokens),
+        "within_budget": tokens <= budget,
+        "levels": levels,
+    }
+    metrics = get_metrics()
+    metrics.observe("prompt_tokens_estimated", tokens, prompt=name)
+    metrics.inc("prompt_tokens_saved_total", report["saved_tokens"], prompt=name)
+    return template.format(**rendered), report
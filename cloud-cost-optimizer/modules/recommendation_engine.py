@@ -1,34 +1,34 @@
-from .llm_client import query_llm, extract_json_from_text
+from .llm_client import query_llm, query_llm_stream, extract_json_from_text, parses_as
+from .json_stream import iter_json_items
+from .cost_analyzer import monthly_service_costs
+from .recommendation_rules import evaluate_rules
+from .metrics import get_metrics
+from .prompt_budget import build_prompt, log_compaction, TextField, MappingField, ListField, CostsField
+from .records import Recommendation, validate_recommendations, LEVELS
 import json
+import os
 
-def generate_recommendations(profile, analysis_summary):
-    """
-    Generates cost optimization recommendations using LLM based on profile and cost analysis.
-    """
-    if not profile or not analysis_summary:
-        print("Missing profile or analysis summary for recommendations.")
-        return []
+ENRICH_TOP_N = 5
+ENRICHED_FIELDS = ("description", "steps", "implementation_effort", "risk_level")
 
-    project_name = profile.get('name', 'Unknown Project')
-    
+def _recommendation_messages(profile, analysis_summary):
     total_cost = analysis_summary.get('total_monthly_cost', 0)
     budget = analysis_summary.get('budget', 0)
     budget_variance = analysis_summary.get('budget_variance', 0)
-    service_costs = analysis_summary.get('service_costs', {})
 
-    prompt = f"""
+    template = """
     You are a Cloud FinOps Expert.
     Based on the following project profile and cost analysis, provide 6-10 cost optimization recommendations.
     
     Project: {project_name}
-    Tech Stack: {json.dumps(profile.get('tech_stack', {}))}
-    Non-Functional Reqs: {json.dumps(profile.get('non_functional_requirements', []))}
+    Tech Stack: {tech_stack}
+    Non-Functional Reqs: {requirements}
     
     Cost Analysis:
     Total Cost: {total_cost} INR
     Budget: {budget} INR
     Variance: {budget_variance} INR
-    Service Costs: {json.dumps(service_costs)}
+    Service Costs: {service_costs}
     
     Task:
     Generate a JSON list of recommendations. 
@@ -49,21 +49,192 @@ def generate_recommendations(profile, analysis_summary):
     Return ONLY the list of recommendations as a valid JSON array.
     """
     
-    messages = [{"role": "user", "content": prompt}]
+    prompt, report = build_prompt(template, {
+        "project_name": TextField(profile.get('name', 'Unknown Project')),
+        "tech_stack": MappingField(profile.get('tech_stack', {})),
+        "requirements": ListField(profile.get('non_functional_requirements', [])),
+        "total_cost": TextField(round(total_cost, 2)),
+        "budget": TextField(budget),
+        "budget_variance": TextField(round(budget_variance, 2)),
+        "service_costs": CostsField(monthly_service_costs(analysis_summary)),
+    }, name="recommendations")
+    log_compaction(report)
+    
+    return [{"role": "user", "content": prompt}]
+
+def _llm_recommendations(profile, analysis_summary):
+    """
+    Asks the LLM for the whole recommendation list (RECOMMENDATION_SOURCE=llm).
+    """
+    if not profile or not analysis_summary:
+        print("Missing profile or analysis summary for recommendations.")
+        return []
+
+    messages = _recommendation_messages(profile, analysis_summary)
     
     recommendations = []
     try:
-        response_text = query_llm(messages, max_tokens=2000, temperature=0.3)
+        response_text = query_llm(messages, max_tokens=2000, temperature=0.3,
+                                  validate=parses_as("recommendations"))
         
         if response_text:
-            extracted = extract_json_from_text(response_text)
-            if isinstance(extracted, list):
-                recommendations = extracted
-            elif isinstance(extracted, dict) and 'recommendations' in extracted:
-                recommendations = extracted['recommendations']
+            extracted = extract_json_from_text(response_text, schema="recommendations")
+            if extracted:
+                recommendations = validate_recommendations(extracted)
             else:
                  print(f"Failed to parse recommendations JSON. Raw text might be useful for debugging.")
     except Exception as e:
         print(f"Error getting recommendations: {e}")
         
     return recommendations
+
+def _enrichment_messages(profile, recommendations):
+    candidates = [dict(rec, id=i) for i, rec in enumerate(recommendations)]
+
+    prompt = f"""
+    You are a Cloud FinOps Expert.
+    A rules engine produced the following cost optimization recommendations for this project.
+    
+    Project: {profile.get('name', 'Unknown Project')}
+    Tech Stack: {json.dumps(profile.get('tech_stack', {}))}
+    Non-Functional Reqs: {json.dumps(profile.get('non_functional_requirements', []))}
+    
+    Recommendations: {json.dumps(candidates)}
+    
+    Task:
+    Re-rank the recommendations by priority for this project and its non-functional requirements,
+    and make description and steps specific to its tech stack.
+    Do not change service, current_cost or potential_savings.
+    Each item must include:
+    - id (unchanged)
+    - description
+    - implementation_effort ("low", "medium", "high")
+    - risk_level ("low", "medium", "high")
+    - steps (list of strings)
+    
+    Return ONLY a JSON array of the items, highest priority first.
+    """
+    
+    return [{"role": "user", "content": prompt}]
+
+def _enrich(recommendation, item):
+    enriched = dict(recommendation)
+    for field in ENRICHED_FIELDS:
+        value = item.get(field)
+        if field == "steps":
+            valid = isinstance(value, list) and value and all(isinstance(s, str) for s in value)
+        elif field in ("implementation_effort", "risk_level"):
+            valid = value in LEVELS
+        else:
+            valid = isinstance(value, str) and value.strip()
+        if valid:
+            enriched[field] = value
+    return enriched
+
+def _merge_enrichment(recommendations, items, top_n):
+    """
+    Yields the top_n recommendations in the LLM's order with its text applied,
+    then whatever it left out, then the rest in rule order. Numbers always
+    come from the rules.
+    """
+    pending = dict(enumerate(recommendations[:top_n]))
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        try:
+            index = int(item.get('id'))
+        except (TypeError, ValueError):
+            continue
+        recommendation = pending.pop(index, None)
+        if recommendation is not None:
+            yield _enrich(recommendation, item)
+    yield from pending.values()
+    yield from recommendations[top_n:]
+
+def _safe_items(items):
+    # A failing LLM only ends the enrichment; the rule results are still used
+    try:
+        yield from items
+    except Exception as e:
+        print(f"Error enriching recommendations: {e}")
+
+def enrich_recommendations(profile, recommendations, top_n=ENRICH_TOP_N):
+    """
+    Asks the LLM to re-rank the top_n rule-based recommendations and rewrite
+    their text for the project. Returns the rule results unchanged on failure.
+    """
+    if not recommendations:
+        return recommendations
+
+    messages = _enrichment_messages(profile, recommendations[:top_n])
+    items = []
+    try:
+        response_text = query_llm(messages, max_tokens=1200, temperature=0.2,
+                                  validate=parses_as("enrichment"))
+        extracted = extract_json_from_text(response_text, schema="enrichment") if response_text else None
+        if extracted:
+            items = extracted
+        else:
+            print("Failed to parse enrichment JSON, keeping rule-based recommendations.")
+    except Exception as e:
+        print(f"Error enriching recommendations: {e}")
+
+    return list(_merge_enrichment(recommendations, items, top_n))
+
+def generate_recommendations(profile, analysis_summary, billing_data=None, source=None):
+    """
+    Generates cost optimization recommendations for the profile and cost analysis.
+
+    source selects the engine: "hybrid" (default) runs the local rules and
+    lets the LLM enrich and re-rank the top results, "rules" skips the LLM
+    and "llm" asks the LLM for the whole list. Defaults to the
+    RECOMMENDATION_SOURCE environment variable.
+    """
+    if not profile or not analysis_summary:
+        print("Missing profile or analysis summary for recommendations.")
+        return []
+
+    source = source or os.getenv("RECOMMENDATION_SOURCE", "hybrid")
+    if source == "llm":
+        return _llm_recommendations(profile, analysis_summary)
+
+    with get_metrics().timer("recommendation_rules_seconds"):
+        recommendations = evaluate_rules(profile, analysis_summary, billing_data)
+    if source == "hybrid":
+        recommendations = enrich_recommendations(profile, recommendations)
+    return recommendations
+
+def stream_recommendations(profile, analysis_summary, billing_data=None, source=None):
+    """
+    Streaming variant of generate_recommendations: yields each recommendation
+    as soon as the LLM has finished emitting (or enriching) it.
+    """
+    if not profile or not analysis_summary:
+        print("Missing profile or analysis summary for recommendations.")
+        return
+
+    source = source or os.getenv("RECOMMENDATION_SOURCE", "hybrid")
+    if source != "llm":
+        with get_metrics().timer("recommendation_rules_seconds"):
+            recommendations = evaluate_rules(profile, analysis_summary, billing_data)
+        if source != "hybrid" or not recommendations:
+            yield from recommendations
+            return
+        messages = _enrichment_messages(profile, recommendations[:ENRICH_TOP_N])
+        items = _safe_items(iter_json_items(query_llm_stream(
+            messages, max_tokens=1200, temperature=0.2, validate=parses_as("enrichment")),
+            schema="enrichment"))
+        yield from _merge_enrichment(recommendations, items, ENRICH_TOP_N)
+        return
+
+    messages = _recommendation_messages(profile, analysis_summary)
+
+    try:
+        for item in iter_json_items(query_llm_stream(
+                messages, max_tokens=2000, temperature=0.3, validate=parses_as("recommendations")),
+                schema="recommendations"):
+            recommendation = Recommendation.from_dict(item) if isinstance(item, dict) else None
+            if recommendation is not None:
+                yield recommendation.to_dict()
+    except Exception as e:
+        print(f"Error getting recommendations: {e}")
@@ -0,0 +1,421 @@
+from .cost_analyzer import monthly_service_costs
+from .records import validate_billing
+from .synthetic_billing import PROVIDER_SERVICES, TECH_KEYWORDS, detect_provider
+
+MAX_RECOMMENDATIONS = 10
+MIN_SAVINGS_INR = 10
+IDLE_USAGE_RATIO = 0.1      # latest usage below 10% of the resource's peak...
+IDLE_COST_RATIO = 0.5       # ...while still paying at least half the peak-month cost
+OVERSIZE_FACTOR = 2.0       # resource costs more than 2x its service's median resource
+OVERSIZE_MIN_RESOURCES = 3
+RIGHT_SIZE_SAVINGS = 0.5    # one instance size down roughly halves the price
+DOMINANT_SHARE = 0.4        # service-level right-sizing when one service is 40%+ of spend
+DOMINANT_SAVINGS = 0.3
+PROVISIONED_KINDS = ("compute", "sql", "nosql", "cache")
+RESOURCE_FIELDS = ["month", "service", "resource_id", "region", "usage_quantity", "unit",
+                   "cost_inr", "desc"]
+
+PROVIDER_NAMES = {"aws": "AWS", "gcp": "GCP", "azure": "Azure"}
+
+# Billing service names outside the provider templates -> service kind
+SERVICE_ALIASES = {
+    "DynamoDB": "nosql", "Aurora": "sql", "Fargate": "compute", "ECS": "compute",
+    "EKS": "compute", "Lightsail": "compute", "GKE": "compute", "Cloud Run": "compute",
+    "App Service": "compute", "AKS": "compute", "Glacier": "storage", "EFS": "storage",
+    "NAT Gateway": "network", "Bigtable": "nosql",
+}
+
+# (kind -> (savings ratio, cheaper tier)) per provider
+STORAGE_TIERS = {
+    "aws": {"storage": (0.4, "S3 Standard-IA / Glacier Instant Retrieval"),
+            "block_storage": (0.2, "gp3 volumes and snapshot cleanup")},
+    "gcp": {"storage": (0.4, "Nearline / Coldline storage classes"),
+            "block_storage": (0.2, "standard persistent disks for cold volumes")},
+    "azure": {"storage": (0.4, "Cool / Cold access tiers"),
+              "block_storage": (0.2, "Standard SSD managed disks")},
+}
+
+# Monthly always-free allowances, (kind -> (approx value in INR, what is free)) per provider
+FREE_TIERS = {
+    "aws": {"serverless": (550, "1M Lambda requests and 400,000 GB-seconds"),
+            "cdn": (7000, "1 TB of CloudFront data transfer")},
+    "gcp": {"serverless": (400, "2M Cloud Functions invocations"),
+            "nosql": (900, "Firestore's daily free reads, writes and 1 GiB storage"),
+            "compute": (600, "one e2-micro instance in a US region")},
+    "azure": {"serverless": (400, "1M Functions executions"),
+              "nosql": (4500, "1000 RU/s and 25 GB of Cosmos DB")},
+}
+
+# Open-source / free substitutes, looked up by tech_stack keyword
+TECH_SUBSTITUTES = [
+    {
+        "keywords": ("mongo",),
+        "ratios": {"nosql": 0.5},
+        "type": "open_source",
+        "title": "Self-host MongoDB Community Edition instead of {service}",
+        "alternative": "MongoDB Community Edition on a VM with a replica set and scheduled backups",
+        "effort": "medium",
+        "risk": "medium",
+        "providers": ["DigitalOcean", "Hetzner"],
+    },
+    {
+        "keywords": ("postgres", "mysql", "maria"),
+        "ratios": {"sql": 0.4},
+        "type": "open_source",
+        "title": "Run the database on a self-managed VM instead of {service}",
+        "alternative": "self-managed PostgreSQL/MySQL on a VM with automated backups",
+        "effort": "medium",
+        "risk": "high",
+        "providers": ["DigitalOcean", "Hetzner"],
+    },
+    {
+        "keywords": ("redis", "memcache"),
+        "ratios": {"cache": 0.6},
+        "type": "open_source",
+        "title": "Replace {service} with Valkey/Redis on an existing instance",
+        "alternative": "Valkey or Redis running next to the application",
+        "effort": "low",
+        "risk": "medium",
+        "providers": [],
+    },
+    {
+        "keywords": ("nginx", "haproxy", "traefik"),
+        "ratios": {"load_balancer": 0.7},
+        "type": "open_source",
+        "title": "Terminate traffic on the existing reverse proxy instead of {service}",
+        "alternative": "the Nginx/HAProxy/Traefik reverse proxy already in the stack",
+        "effort": "medium",
+        "risk": "medium",
+        "providers": [],
+    },
+    {
+        "keywords": ("react", "vue", "angular", "static"),
+        "ratios": {"cdn": 1.0, "storage": 0.25},
+        "type": "free_tier",
+        "title": "Host the frontend on a free static hosting tier instead of {service}",
+        "alternative": "Cloudflare Pages, Netlify or GitHub Pages free plans",
+        "effort": "low",
+        "risk": "low",
+        "providers": ["Cloudflare", "Netlify", "GitHub Pages"],
+    },
+]
+
+
+def _build_service_kinds():
+    kinds = {}
+    for provider in PROVIDER_SERVICES.values():
+        for kind, template in provider.items():
+            if isinstance(template, tuple):
+                kinds[template[0]] = kind
+    kinds.update(SERVICE_ALIASES)
+    return kinds
+
+
+def _build_tech_index():
+    index = {}
+    for entry in TECH_SUBSTITUTES:
+        for keyword in entry["keywords"]:
+            index.setdefault(keyword, []).append(entry)
+    return index
+
+
+_SERVICE_KINDS = _build_service_kinds()
+_TECH_INDEX = _build_tech_index()
+
+
+def service_kind(service):
+    """
+    Maps a billing service name ("EC2", "Cloud SQL", "MongoDB") to a service
+    kind ("compute", "sql", "nosql", ...), or "other".
+    """
+    kind = _SERVICE_KINDS.get(service)
+    if kind:
+        return kind
+    text = str(service).lower()
+    for keyword, implied in TECH_KEYWORDS.items():
+        if keyword in text:
+            return implied[0]
+    return "other"
+
+
+def _iter_resource_columns(billing_data):
+    # Record lists are validated once into a typed batch; stores pass through
+    yield from validate_billing(billing_data).iter_batches(columns=RESOURCE_FIELDS)
+
+
+def build_resource_index(billing_data):
+    """
+    Per-resource monthly cost and usage from billing records or a BillingStore:
+    resource_id -> {"service", "region", "unit", "desc", "months": {month: [cost, usage]}}.
+    Records without a resource_id are left out.
+    """
+    index = {}
+    if not billing_data:
+        return index
+    for batch in _iter_resource_columns(billing_data):
+        rows = zip(batch["resource_id"], batch["month"], batch["cost_inr"], batch["usage_quantity"],
+                   batch["service"], batch["region"], batch["unit"], batch["desc"])
+        for resource_id, month, cost, usage, service, region, unit, desc in rows:
+            if resource_id == 'Unknown':
+                continue
+            entry = index.get(resource_id)
+            if entry is None:
+                entry = index[resource_id] = {
+                    "service": service, "region": region, "unit": unit, "desc": desc, "months": {},
+                }
+            totals = entry["months"].get(month)
+            if totals is None:
+                entry["months"][month] = [cost, usage]
+            else:
+                totals[0] += cost
+                totals[1] += usage
+    return index
+
+
+class RuleContext:
+    """
+    What the rules evaluate against: the profile, the average monthly cost per
+    service (from the analysis summary) and the optional resource index.
+    """
+
+    def __init__(self, profile, analysis_summary, resources=None):
+        self.profile = profile
+        self.analysis = analysis_summary
+        self.tech_stack = profile.get('tech_stack', {}) or {}
+        self.provider = detect_provider(self.tech_stack)
+        self.provider_name = PROVIDER_NAMES[self.provider]
+        self.budget = analysis_summary.get('budget', 0) or 0
+
+        # Multi-month analyses are judged on the average month, not the sum
+        monthly_costs = analysis_summary.get('monthly_costs') or {}
+        self.latest_month = max(monthly_costs) if monthly_costs else None
+        self.service_costs = monthly_service_costs(analysis_summary)
+        self.monthly_cost = sum(self.service_costs.values())
+
+        self.resources_by_service = {}
+        for resource_id, entry in (resources or {}).items():
+            self.resources_by_service.setdefault(entry["service"], []).append((resource_id, entry))
+        if self.latest_month is None and resources:
+            self.latest_month = max(m for entry in resources.values() for m in entry["months"])
+
+    @property
+    def over_budget(self):
+        return bool(self.budget) and self.monthly_cost > self.budget
+
+    def latest_resources(self, service):
+        """
+        (resource_id, entry, latest [cost, usage]) for resources billed in the latest month.
+        """
+        for resource_id, entry in self.resources_by_service.get(service, ()):
+            latest = entry["months"].get(self.latest_month)
+            if latest and latest[0] > 0:
+                yield resource_id, entry, latest
+
+    def tech_substitutes(self):
+        """
+        Substitute catalog entries matched by the tech_stack, by service kind.
+        """
+        values = self.tech_stack.values() if isinstance(self.tech_stack, dict) else [self.tech_stack]
+        matched = []
+        for value in values:
+            text = str(value).lower()
+            for keyword, entries in _TECH_INDEX.items():
+                if keyword in text:
+                    matched.extend(e for e in entries if e not in matched)
+        by_kind = {}
+        for entry in matched:
+            for kind in entry["ratios"]:
+                by_kind.setdefault(kind, []).append(entry)
+        return by_kind
+
+
+def _recommendation(title, service, current_cost, savings, rec_type, description,
+                    effort, risk, steps, providers):
+    return {
+        "title": title,
+        "service": service,
+        "current_cost": round(current_cost, 2),
+        "potential_savings": round(savings, 2),
+        "recommendation_type": rec_type,
+        "description": description,
+        "implementation_effort": effort,
+        "risk_level": risk,
+        "steps": steps,
+        "cloud_providers": providers,
+    }
+
+
+def idle_resources_rule(ctx, service, kind, cost):
+    """
+    Resources still billed in the latest month whose usage dropped to zero,
+    or collapsed while the cost did not. Only resources with positive usage
+    in an earlier month qualify: exports without usage quantities (validated
+    to 0) say nothing about idleness.
+    """
+    idle = []
+    for resource_id, entry, (latest_cost, latest_usage) in ctx.latest_resources(service):
+        earlier_usage = max((usage for month, (_, usage) in entry["months"].items()
+                             if month != ctx.latest_month), default=0)
+        if earlier_usage <= 0:
+            continue
+        peak_cost = max(c for c, _ in entry["months"].values())
+        if latest_usage <= 0 or (
+            latest_usage < IDLE_USAGE_RATIO * earlier_usage
+            and latest_cost >= IDLE_COST_RATIO * peak_cost
+        ):
+            idle.append((resource_id, latest_cost))
+    if not idle:
+        return []
+    savings = sum(c for _, c in idle)
+    examples = ", ".join(resource_id for resource_id, _ in idle[:3])
+    return [_recommendation(
+        f"Remove idle {service} resources",
+        service, cost, savings, "idle_resources",
+        f"{len(idle)} {service} resource(s) are billed but barely used in {ctx.latest_month} "
+        f"(e.g. {examples}). Stopping or deleting them saves about {savings:.0f} INR/month.",
+        "low", "low",
+        [f"Confirm {examples} have no owners or traffic",
+         "Snapshot or export anything worth keeping",
+         "Stop or delete the resources and add an auto-stop schedule for non-production"],
+        [ctx.provider_name],
+    )]
+
+
+def oversized_rule(ctx, service, kind, cost):
+    """
+    Provisioned resources far above their service's median size, or a single
+    service dominating the spend.
+    """
+    resources = list(ctx.latest_resources(service))
+    if len(resources) >= OVERSIZE_MIN_RESOURCES:
+        costs = sorted(latest[0] for _, _, latest in resources)
+        median = costs[len(costs) // 2]
+        oversized = [(resource_id, latest[0]) for resource_id, _, latest in resources
+                     if latest[0] > OVERSIZE_FACTOR * median]
+        if oversized:
+            savings = sum(c for _, c in oversized) * RIGHT_SIZE_SAVINGS
+            examples = ", ".join(resource_id for resource_id, _ in oversized[:3])
+            return [_recommendation(
+                f"Right-size oversized {service} resources",
+                service, cost, savings, "right_sizing",
+                f"{len(oversized)} {service} resource(s) cost more than {OVERSIZE_FACTOR:g}x the "
+                f"median {service} resource (e.g. {examples}). One size down roughly halves their cost.",
+                "medium", "medium",
+                [f"Review CPU and memory utilization of {examples}",
+                 "Move each to the next smaller instance size",
+                 "Watch latency and error rates for a week before downsizing further"],
+                [ctx.provider_name],
+            )]
+
+    if ctx.monthly_cost and cost / ctx.monthly_cost >= DOMINANT_SHARE:
+        share = cost / ctx.monthly_cost * 100
+        budget_note = " while the project is over budget" if ctx.over_budget else ""
+        return [_recommendation(
+            f"Right-size {service}",
+            service, cost, cost * DOMINANT_SAVINGS, "right_sizing",
+            f"{service} is {share:.0f}% of the monthly spend{budget_note}. "
+            f"Right-sizing and committed-use pricing typically cut it by {DOMINANT_SAVINGS:.0%}.",
+            "medium", "medium",
+            [f"Check utilization of every {service} resource",
+             "Downsize over-provisioned resources and schedule non-production ones",
+             "Commit the steady baseline to reserved / committed-use pricing"],
+            [ctx.provider_name],
+        )]
+    return []
+
+
+def storage_tiering_rule(ctx, service, kind, cost):
+    """
+    Moves cold object storage / volumes to a cheaper tier.
+    """
+    ratio, tier = STORAGE_TIERS[ctx.provider][kind]
+    return [_recommendation(
+        f"Tier down cold {service} storage",
+        service, cost, cost * ratio, "storage_tiering",
+        f"Data that is rarely read can move to {tier}, saving about {ratio:.0%} of the {service} cost.",
+        "low", "low",
+        [f"Find {service} data not accessed in the last 30 days",
+         f"Add lifecycle rules that transition it to {tier}",
+         "Delete expired backups and orphaned snapshots"],
+        [ctx.provider_name],
+    )]
+
+
+def free_tier_rule(ctx, service, kind, cost):
+    """
+    Services partly or fully covered by the provider's always-free allowance.
+    """
+    allowance = FREE_TIERS.get(ctx.provider, {}).get(kind)
+    if not allowance:
+        return []
+    value, covered = allowance
+    savings = min(cost, value)
+    return [_recommendation(
+        f"Use the {service} free tier",
+        service, cost, savings, "free_tier",
+        f"The {ctx.provider_name} always-free tier covers {covered} per month, "
+        f"worth about {value} INR; keep {service} usage within it where possible.",
+        "low", "low",
+        [f"Check current {service} usage against the free-tier limits",
+         "Consolidate workloads into the account that holds the free tier",
+         "Set a billing alert at the free-tier threshold"],
+        [ctx.provider_name],
+    )]
+
+
+def substitute_rule(ctx, service, kind, cost, entry):
+    """
+    Replaces a managed service with an open-source / free option from the tech stack.
+    """
+    ratio = entry["ratios"][kind]
+    return _recommendation(
+        entry["title"].format(service=service),
+        service, cost, cost * ratio, entry["type"],
+        f"The tech stack already allows {entry['alternative']}, which can replace {service} "
+        f"for about {ratio:.0%} less.",
+        entry["effort"], entry["risk"],
+        [f"Provision {entry['alternative']}",
+         f"Migrate {service} traffic or data and run both side by side",
+         f"Decommission {service} after verification"],
+        [ctx.provider_name] + entry["providers"],
+    )
+
+
+# Rule catalog indexed by service kind; "*" rules apply to every service
+RULES_BY_KIND = {"*": [idle_resources_rule]}
+for _kind in PROVISIONED_KINDS:
+    RULES_BY_KIND.setdefault(_kind, []).append(oversized_rule)
+for _kind in ("storage", "block_storage"):
+    RULES_BY_KIND.setdefault(_kind, []).append(storage_tiering_rule)
+for _kind in {k for tiers in FREE_TIERS.values() for k in tiers}:
+    RULES_BY_KIND.setdefault(_kind, []).append(free_tier_rule)
+
+
+def evaluate_rules(profile, analysis_summary, billing_data=None, limit=MAX_RECOMMENDATIONS):
+    """
+    Runs the rule catalog against the analysis summary (and billing records,
+    when given, for resource-level rules). Returns recommendations in the
+    same schema as the LLM ones, highest potential_savings first.
+    """
+    if not profile or not analysis_summary:
+        return []
+
+    ctx = RuleContext(profile, analysis_summary, build_resource_index(billing_data))
+    substitutes = ctx.tech_substitutes()
+    common_rules = RULES_BY_KIND["*"]
+
+    recommendations = []
+    for service, cost in ctx.service_costs.items():
+        if cost <= 0:
+            continue
+        kind = service_kind(service)
+        for rule in RULES_BY_KIND.get(kind, []) + common_rules:
+            recommendations.extend(rule(ctx, service, kind, cost))
+        for entry in substitutes.get(kind, []):
+            # Nothing to substitute when the service already is the open-source option
+            if not any(keyword in service.lower() for keyword in entry["keywords"]):
+                recommendations.append(substitute_rule(ctx, service, kind, cost, entry))
+
+    recommendations = [r for r in recommendations if r["potential_savings"] >= MIN_SAVINGS_INR]
+    recommendations.sort(key=lambda r: r["potential_savings"], reverse=True)
+    return recommendations[:limit]
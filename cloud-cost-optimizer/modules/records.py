@@ -0,0 +1,343 @@
+import hashlib
+import json
+import re
+import sys
+from array import array
+
+from .synthetic_billing import BILLING_FIELDS
+from .metrics import get_metrics
+
+NUMERIC_FIELDS = ("usage_quantity", "cost_inr")
+STRING_FIELDS = tuple(f for f in BILLING_FIELDS if f not in NUMERIC_FIELDS)
+NUMBER_TYPE = 'd'
+DEFAULT_BATCH_SIZE = 65536
+# Same fallbacks the cost analyzer and billing store use for missing fields
+STRING_DEFAULTS = {
+    "month": "Unknown", "service": "Other", "resource_id": "Unknown", "region": "Unknown",
+    "usage_type": "", "unit": "", "desc": "",
+}
+
+# Lower-cased unit spelling -> (canonical unit, factor applied to usage_quantity)
+UNIT_ALIASES = {
+    "hour": ("hour", 1), "hours": ("hour", 1), "hr": ("hour", 1), "hrs": ("hour", 1), "h": ("hour", 1),
+    "minute": ("hour", 1 / 60), "minutes": ("hour", 1 / 60), "min": ("hour", 1 / 60),
+    "second": ("hour", 1 / 3600), "seconds": ("hour", 1 / 3600), "sec": ("hour", 1 / 3600),
+    "gb": ("GB", 1), "gib": ("GB", 1), "gigabyte": ("GB", 1), "gigabytes": ("GB", 1),
+    "gb-month": ("GB", 1), "gb-mo": ("GB", 1),
+    "mb": ("GB", 1 / 1024), "mib": ("GB", 1 / 1024), "megabytes": ("GB", 1 / 1024),
+    "tb": ("GB", 1024), "tib": ("GB", 1024), "terabytes": ("GB", 1024),
+    "instance": ("instance", 1), "instances": ("instance", 1),
+    "request": ("request", 1), "requests": ("request", 1),
+}
+
+LEVELS = ("low", "medium", "high")
+RECOMMENDATION_FIELDS = (
+    "title", "service", "current_cost", "potential_savings", "recommendation_type",
+    "description", "implementation_effort", "risk_level", "steps", "cloud_providers",
+)
+
+# Currency symbols/codes, thousands separators and spaces around a number
+_NUMBER_NOISE_RE = re.compile(r"(?i)inr|rs\.?|usd|[₹$,_\s]")
+
+
+def parse_number(value):
+    """
+    Coerces a billing number to float: 1200, "1,200", "₹1,200.50" and
+    "INR 300" are accepted, None and "" count as 0. Raises ValueError for
+    anything else (including booleans).
+    """
+    if value is None or value == "":
+        return 0.0
+    if isinstance(value, bool):
+        raise ValueError(f"not a number: {value!r}")
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        text = _NUMBER_NOISE_RE.sub("", value)
+        if text.startswith("(") and text.endswith(")"):
+            # Accounting notation for credits: (1,200) == -1200
+            text = "-" + text[1:-1]
+        return float(text) if text else 0.0
+    raise ValueError(f"not a number: {value!r}")
+
+
+def normalize_unit(unit):
+    """
+    Returns (canonical unit, usage factor) for a unit spelling; unknown
+    units are kept as-is with factor 1.
+    """
+    unit = unit.strip()
+    return UNIT_ALIASES.get(unit.lower(), (unit, 1))
+
+
+class BillingRecord:
+    """
+    One billing line item with typed fields (numbers as float, strings interned).
+    """
+
+    __slots__ = tuple(BILLING_FIELDS)
+
+    def __init__(self, month, service, resource_id, region, usage_type,
+                 usage_quantity, unit, cost_inr, desc):
+        self.month = month
+        self.service = service
+        self.resource_id = resource_id
+        self.region = region
+        self.usage_type = usage_type
+        self.usage_quantity = usage_quantity
+        self.unit = unit
+        self.cost_inr = cost_inr
+        self.desc = desc
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in BILLING_FIELDS}
+
+    def __repr__(self):
+        return f"BillingRecord({self.month} {self.service} {self.resource_id} {self.cost_inr} INR)"
+
+
+class BillingBatch:
+    """
+    Validated billing records stored column-wise: numeric columns as float64
+    arrays, string columns as lists of interned strings. Built once at
+    ingestion by validate_billing(); exposes the same iter_batches() as
+    BillingStore, so the analyzer and the rules read it without per-field
+    checks.
+
+    rejected lists (input row index, reason) for every problem found: rows
+    with an unparseable cost were dropped, an unparseable usage_quantity was
+    set to 0 and the row kept.
+    """
+
+    __slots__ = ("columns", "rejected")
+
+    def __init__(self, columns, rejected=None):
+        self.columns = columns
+        self.rejected = rejected or []
+
+    def __len__(self):
+        return len(self.columns["cost_inr"])
+
+    def iter_batches(self, batch_size=DEFAULT_BATCH_SIZE, columns=None):
+        """
+        Yields columnar batches (field -> list or array) of at most batch_size rows.
+        """
+        columns = columns or BILLING_FIELDS
+        n = len(self)
+        if n <= batch_size:
+            yield {c: self.columns[c] for c in columns}
+            return
+        for start in range(0, n, batch_size):
+            yield {c: self.columns[c][start:start + batch_size] for c in columns}
+
+    def __iter__(self):
+        """
+        Iterates the rows as BillingRecord objects.
+        """
+        for row in zip(*(self.columns[field] for field in BILLING_FIELDS)):
+            yield BillingRecord(*row)
+
+    def to_json(self):
+        """
+        The records as a list of plain dicts (the mock_billing.json format).
+        """
+        names = BILLING_FIELDS
+        return [dict(zip(names, row)) for row in zip(*(self.columns[f] for f in names))]
+
+    def fingerprint(self):
+        digest = hashlib.sha256()
+        for field in BILLING_FIELDS:
+            values = self.columns[field]
+            if field in NUMERIC_FIELDS:
+                digest.update(values.tobytes())
+            else:
+                digest.update(json.dumps(values, ensure_ascii=False).encode("utf-8"))
+        return digest.hexdigest()
+
+
+def _string_column(values, default):
+    intern = sys.intern
+    return [
+        intern(v) if v.__class__ is str and v else
+        default if v is None or v == "" else intern(str(v))
+        for v in values
+    ]
+
+
+def _number_column(values, rejected, field):
+    try:
+        # Fast path: every value is already an int/float
+        if True in map(bool.__instancecheck__, values):
+            raise TypeError
+        return array(NUMBER_TYPE, values)
+    except TypeError:
+        pass
+    column = array(NUMBER_TYPE, bytes(8 * len(values)))
+    for i, value in enumerate(values):
+        cls = value.__class__
+        if cls is float or cls is int:
+            column[i] = value
+            continue
+        if cls is str:
+            # Exports are mostly plain "12.34"; only the rest needs the cleanup regex
+            try:
+                column[i] = float(value)
+                continue
+            except ValueError:
+                pass
+        try:
+            column[i] = parse_number(value)
+        except (TypeError, ValueError):
+            rejected.append((i, f"invalid {field}: {value!r}"))
+    return column
+
+
+def _columns_from(records):
+    if isinstance(records, dict):
+        n = len(records.get("cost_inr") or [])
+        return {f: records.get(f) or [None] * n for f in BILLING_FIELDS}, n
+    records = [r for r in records if isinstance(r, dict)]
+    return {f: [r.get(f) for r in records] for f in BILLING_FIELDS}, len(records)
+
+
+def validate_billing(records):
+    """
+    Validates and coerces billing data in bulk, column by column:
+    costs/quantities become floats ("1,200" -> 1200.0), units are normalized
+    ("hrs" -> "hour", "TB" -> GB with the quantity scaled), missing strings get
+    the analyzer's defaults and repeated names are interned. Rows whose cost
+    cannot be parsed are dropped; a quantity that cannot be parsed is set to
+    0 so the row's cost still counts. Both are listed in .rejected.
+
+    Accepts a list of record dicts or a columnar batch. A BillingBatch or a
+    BillingStore is returned unchanged.
+    """
+    if records is None or hasattr(records, 'iter_batches'):
+        return records
+
+    with get_metrics().timer("records_validate_seconds"):
+        raw, n = _columns_from(records)
+        rejected = []
+        columns = {}
+        for field in STRING_FIELDS:
+            columns[field] = _string_column(raw[field], STRING_DEFAULTS[field])
+        zeroed = []
+        columns["usage_quantity"] = _number_column(raw["usage_quantity"], zeroed, "usage_quantity")
+        columns["cost_inr"] = _number_column(raw["cost_inr"], rejected, "cost_inr")
+        drop = {i for i, _ in rejected}
+
+        units = {}
+        normalized = [units.get(u) or units.setdefault(u, normalize_unit(u)) for u in columns["unit"]]
+        if any(factor != 1 or unit is not raw_unit
+               for (unit, factor), raw_unit in zip(normalized, columns["unit"])):
+            columns["unit"] = [sys.intern(unit) for unit, _ in normalized]
+            quantities = columns["usage_quantity"]
+            for i, (_, factor) in enumerate(normalized):
+                if factor != 1:
+                    quantities[i] *= factor
+
+        if zeroed:
+            print(f"Set usage_quantity to 0 for {len(zeroed)} billing records (e.g. {zeroed[0][1]}).")
+            rejected.extend((i, f"{reason} (set to 0)") for i, reason in zeroed)
+        if drop:
+            keep = [i for i in range(n) if i not in drop]
+            for field, values in columns.items():
+                if field in NUMERIC_FIELDS:
+                    columns[field] = array(NUMBER_TYPE, [values[i] for i in keep])
+                else:
+                    columns[field] = [values[i] for i in keep]
+            print(f"Dropped {len(drop)} invalid billing records (e.g. {rejected[0][1]}).")
+
+    metrics = get_metrics()
+    metrics.inc("billing_records_total", n - len(drop), result="valid")
+    if drop:
+        metrics.inc("billing_records_total", len(drop), result="rejected")
+    return BillingBatch(columns, rejected)
+
+
+class Recommendation:
+    """
+    One cost optimization recommendation with typed fields.
+    """
+
+    __slots__ = RECOMMENDATION_FIELDS
+
+    def __init__(self, title, service="", current_cost=0.0, potential_savings=0.0,
+                 recommendation_type="", description="", implementation_effort="medium",
+                 risk_level="medium", steps=(), cloud_providers=()):
+        self.title = title
+        self.service = service
+        self.current_cost = current_cost
+        self.potential_savings = potential_savings
+        self.recommendation_type = recommendation_type
+        self.description = description
+        self.implementation_effort = implementation_effort
+        self.risk_level = risk_level
+        self.steps = list(steps)
+        self.cloud_providers = list(cloud_providers)
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Builds a Recommendation from LLM or rule output. Returns None when
+        there is no title; unparseable numbers become 0 and unknown
+        effort/risk levels "medium".
+        """
+        title = data.get('title')
+        if not isinstance(title, str) or not title.strip():
+            return None
+        return cls(
+            title=title.strip(),
+            service=_text(data.get('service')),
+            current_cost=_amount(data.get('current_cost')),
+            potential_savings=_amount(data.get('potential_savings')),
+            recommendation_type=_text(data.get('recommendation_type')),
+            description=_text(data.get('description')),
+            implementation_effort=_level(data.get('implementation_effort')),
+            risk_level=_level(data.get('risk_level')),
+            steps=_strings(data.get('steps')),
+            cloud_providers=_strings(data.get('cloud_providers')),
+        )
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in RECOMMENDATION_FIELDS}
+
+
+def _text(value):
+    return "" if value is None else sys.intern(str(value).strip())
+
+
+def _amount(value):
+    try:
+        return round(parse_number(value), 2)
+    except ValueError:
+        return 0.0
+
+
+def _level(value):
+    value = str(value or "").strip().lower()
+    return value if value in LEVELS else "medium"
+
+
+def _strings(value):
+    if isinstance(value, str):
+        return [value]
+    if not isinstance(value, list):
+        return []
+    return [str(v) for v in value if v is not None and str(v).strip()]
+
+
+def validate_recommendations(recommendations):
+    """
+    Normalizes recommendation dicts (e.g. "potential_savings": "1,200" -> 1200.0)
+    and drops entries without a title. Returns plain dicts in the same order.
+    """
+    if recommendations is None:
+        return None
+    valid = []
+    for data in recommendations:
+        if isinstance(data, dict):
+            recommendation = Recommendation.from_dict(data)
+            if recommendation is not None:
+                valid.append(recommendation.to_dict())
+    return valid
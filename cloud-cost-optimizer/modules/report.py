@@ -0,0 +1,76 @@
+from .cost_analyzer import monthly_service_costs
+from .scenarios import plan_scenarios
+
+def build_report(profile, analysis, recommendations):
+    """
+    Assembles the cost optimization report written to cost_optimization_report.json.
+    recommendations must already be validated (see records.validate_recommendations).
+    total_potential_savings is the best combination from the what-if scenarios,
+    which accounts for recommendations overlapping on the same service, each
+    capped at the service's cost in an average month.
+    """
+    scenarios = plan_scenarios(recommendations, monthly_service_costs(analysis))
+    return {
+        "project_name": profile.get('name', 'Unknown Project'),
+        "analysis": analysis,
+        "recommendations": recommendations,
+        "scenarios": scenarios,
+        "summary": {
+            "total_potential_savings": max((s['savings'] for s in scenarios), default=0),
+            "naive_potential_savings": round(sum(r['potential_savings'] for r in recommendations), 2),
+            "recommendations_count": len(recommendations)
+        }
+    }
+
+def summary_lines(report):
+    """
+    Cost summary of a report as plain text lines (shared by the interactive
+    panel and `main.py view`).
+    """
+    analysis = report.get('analysis', {})
+    lines = [f"Total Cost: {analysis.get('total_monthly_cost')} INR",
+             f"Budget: {analysis.get('budget')} INR",
+             f"Variance: {analysis.get('budget_variance')} INR"]
+    months = analysis.get('months_count') or 1
+    if months > 1:
+        lines[0] += (f" in {analysis.get('budget_month')} "
+                     f"({analysis.get('total_cost')} INR over {months} months)")
+
+    forecast = analysis.get('forecast')
+    if forecast and len(analysis.get('monthly_costs', {})) > 1:
+        next_month, projected = next(iter(forecast['next_months'].items()))
+        lines.append(f"Trend: {forecast['slope_per_month']:+} INR/month, {next_month} forecast {projected} INR")
+        if forecast['projected_over_budget_month']:
+            lines.append(f"Monthly budget exceeded from {forecast['projected_over_budget_month']}")
+    anomalies = analysis.get('anomalies') or []
+    if anomalies:
+        lines.append("Anomalies: " + ", ".join(
+            f"{a['service']} {a['month']} ({a['type']})" for a in anomalies[:3]))
+    return lines
+
+def report_lines(report):
+    """
+    Plain text rendering of a whole report: summary, then one line per recommendation.
+    """
+    lines = [f"Project: {report.get('project_name', 'Unknown Project')}"] + summary_lines(report)
+    recommendations = report.get('recommendations') or []
+    summary = report.get('summary', {})
+    naive = summary.get('naive_potential_savings')
+    naive_note = f", {naive} INR if summed naively" if naive is not None else ""
+    lines.append(f"\nRecommendations ({len(recommendations)}, potential savings "
+                 f"{summary.get('total_potential_savings', 0)} INR{naive_note}):")
+    for r in recommendations:
+        lines.append(f"  - {r.get('title', 'Untitled')}: {r.get('potential_savings', 0)} INR "
+                     f"[{r.get('recommendation_type', 'n/a')}]")
+    return lines
+
+def scenario_lines(recommendations, scenarios):
+    """
+    Plain text rendering of what-if scenarios (see scenarios.plan_scenarios).
+    """
+    lines = [f"{'effort':>6}  {'risk':<6}  {'savings':>10}  {'naive':>10}  recommendations"]
+    for s in scenarios:
+        titles = "; ".join(recommendations[i].get('title', 'Untitled') for i in s['recommendations'])
+        lines.append(f"{s['effort']:>6}  {s['risk_level']:<6}  {s['savings']:>10.2f}  "
+                     f"{s['naive_savings']:>10.2f}  {titles}")
+    return lines
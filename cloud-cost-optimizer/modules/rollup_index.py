@@ -0,0 +1,254 @@
+import heapq
+import json
+import os
+from operator import itemgetter
+
+from .records import validate_billing
+from .metrics import get_metrics
+
+INDEX_FILE = "rollup_index.json"
+DIMENSIONS = ("month", "service", "region", "resource_id", "usage_type")
+MEASURES = ("cost", "usage", "records")
+# Short names accepted in queries, matching CostAggregator.costs_by()
+DIMENSION_ALIASES = {"resource": "resource_id"}
+# Views materialized when the index is built; any other group-by is
+# materialized on its first query and kept up to date from then on
+DEFAULT_VIEWS = (
+    ((), ("month",)), ((), ("service",)), ((), ("region",)), ((), ("resource_id",)),
+    ((), ("usage_type",)), ((), ("service", "month")), (("service",), ("resource_id",)),
+)
+_COLUMNS = list(DIMENSIONS) + ["cost_inr", "usage_quantity"]
+
+
+def _dimension(name):
+    name = DIMENSION_ALIASES.get(name, name)
+    if name not in DIMENSIONS:
+        raise ValueError(f"unknown dimension '{name}', expected one of {', '.join(DIMENSIONS)}")
+    return name
+
+
+def _dimensions(names):
+    if isinstance(names, str):
+        names = (names,)
+    return tuple(_dimension(name) for name in names or ())
+
+
+def _projector(dims):
+    # Scalar keys for one dimension (like CostAggregator.costs_by), tuples for several
+    if not dims:
+        return lambda key: None
+    return itemgetter(*(DIMENSIONS.index(d) for d in dims))
+
+
+def _add(target, key, measures):
+    cell = target.get(key)
+    if cell is None:
+        target[key] = list(measures)
+    else:
+        cell[0] += measures[0]
+        cell[1] += measures[1]
+        cell[2] += measures[2]
+
+
+class RollupIndex:
+    """
+    Pre-aggregated billing cube for drill-down queries.
+
+    The base holds cost, usage and record count per (month, service, region,
+    resource_id, usage_type) cell, so it grows with distinct cells rather than
+    line items. Views are group-bys of the base partitioned by the filtered
+    dimensions: view[(where_dims, group_dims)][where_key][group_key]. A query
+    is then a dict lookup plus a pass over its result, independent of the
+    number of billing records. New batches (e.g. an appended month) are
+    merged into the base and every materialized view incrementally.
+    """
+
+    def __init__(self):
+        self.base = {}
+        self.views = {}
+        self.segments = []
+
+    @classmethod
+    def from_billing(cls, billing_data):
+        """
+        Builds the index from record dicts, a BillingBatch or a BillingStore.
+        """
+        index = cls()
+        with get_metrics().timer("rollup_build_seconds"):
+            index.update(billing_data)
+            for where_dims, group_dims in DEFAULT_VIEWS:
+                index._view(where_dims, group_dims)
+        return index
+
+    @classmethod
+    def for_store(cls, store, path=None):
+        """
+        Loads the index saved next to a BillingStore and indexes only the
+        segments appended since it was saved. Dropped segments (e.g. a
+        re-imported month) trigger a full rebuild. The result is saved back;
+        views are materialized on their first query.
+        """
+        path = path or os.path.join(store.path, INDEX_FILE)
+        names = [info["name"] for info in store.manifest["segments"]]
+        index = cls.load(path) if os.path.exists(path) else None
+        if index is None or not set(index.segments) <= set(names):
+            index = cls()
+        indexed = set(index.segments)
+        new_segments = [s for s in store.segments() if s.name not in indexed]
+        if new_segments or not os.path.exists(path):
+            with get_metrics().timer("rollup_build_seconds"):
+                for segment in new_segments:
+                    index.update(segment.iter_batches(columns=_COLUMNS))
+                    index.segments.append(segment.name)
+            index.save(path)
+        return index
+
+    def update(self, billing_data):
+        """
+        Adds billing data (record dicts, a batch, a store or an iterable of
+        columnar batches) to the base and every materialized view.
+        """
+        if isinstance(billing_data, list) or hasattr(billing_data, 'iter_batches'):
+            batches = validate_billing(billing_data).iter_batches(columns=_COLUMNS)
+        else:
+            batches = billing_data
+
+        for batch in batches:
+            delta = {}
+            keys = zip(*(batch[d] for d in DIMENSIONS))
+            for key, cost, usage in zip(keys, batch["cost_inr"], batch["usage_quantity"]):
+                cell = delta.get(key)
+                if cell is None:
+                    delta[key] = [cost, usage, 1]
+                else:
+                    cell[0] += cost
+                    cell[1] += usage
+                    cell[2] += 1
+            self._merge(delta)
+
+    def _merge(self, delta):
+        base = self.base
+        for key, measures in delta.items():
+            _add(base, key, measures)
+        for (where_dims, group_dims), view in self.views.items():
+            self._fill(view, where_dims, group_dims, delta)
+
+    @staticmethod
+    def _fill(view, where_dims, group_dims, cells):
+        where_key = _projector(where_dims)
+        group_key = _projector(group_dims)
+        for key, measures in cells.items():
+            partition = where_key(key)
+            groups = view.get(partition)
+            if groups is None:
+                groups = view[partition] = {}
+            _add(groups, group_key(key), measures)
+
+    def _view(self, where_dims, group_dims):
+        view_key = (tuple(where_dims), tuple(group_dims))
+        view = self.views.get(view_key)
+        if view is None:
+            view = self.views[view_key] = {}
+            self._fill(view, where_dims, group_dims, self.base)
+        return view
+
+    def _partitions(self, where, group_dims):
+        """
+        Returns the view partitions matching where ({dimension: value or list}).
+        """
+        where = {_dimension(d): v for d, v in (where or {}).items()}
+        where_dims = tuple(d for d in DIMENSIONS if d in where)
+        view = self._view(where_dims, group_dims)
+        if not where_dims:
+            return [view.get(None, {})]
+
+        choices = [where[d] if isinstance(where[d], (list, tuple, set)) else [where[d]]
+                   for d in where_dims]
+        keys = [()]
+        for values in choices:
+            keys = [key + (value,) for key in keys for value in values]
+        if len(where_dims) == 1:
+            keys = [key[0] for key in keys]
+        return [view[key] for key in keys if key in view]
+
+    def query(self, group_by=(), where=None, measure="cost"):
+        """
+        Group-by over the billing data, e.g.
+        query(("region", "service", "month"), where={"service": "EC2"}).
+        Returns {group: value}, keyed by the value for one dimension and by
+        tuples for several. measure is "cost", "usage" or "records".
+        """
+        group_dims = _dimensions(group_by)
+        position = MEASURES.index(measure)
+        partitions = self._partitions(where, group_dims)
+        if len(partitions) == 1:
+            return {group: cell[position] for group, cell in partitions[0].items()}
+        result = {}
+        get = result.get
+        for partition in partitions:
+            for group, cell in partition.items():
+                result[group] = get(group, 0) + cell[position]
+        return result
+
+    def total(self, where=None, measure="cost"):
+        return self.query((), where, measure).get(None, 0)
+
+    def top(self, dimension, k=10, per=None, where=None, measure="cost"):
+        """
+        The k largest groups of dimension, highest first. With per (e.g.
+        top("resource_id", 3, per="service")) returns {per value: top k} for
+        each value of the per dimension.
+        """
+        position = MEASURES.index(measure)
+        if per is None:
+            values = self.query(dimension, where, measure)
+            return dict(heapq.nlargest(k, values.items(), key=itemgetter(1)))
+
+        per_dim = _dimension(per)
+        if where:
+            values = self.query((per_dim,) + _dimensions(dimension), where, measure)
+            grouped = {}
+            for (outer, *inner), value in values.items():
+                grouped.setdefault(outer, {})[inner[0] if len(inner) == 1 else tuple(inner)] = value
+        else:
+            view = self._view((per_dim,), _dimensions(dimension))
+            grouped = {outer: {g: cell[position] for g, cell in groups.items()}
+                       for outer, groups in view.items()}
+        return {outer: dict(heapq.nlargest(k, values.items(), key=itemgetter(1)))
+                for outer, values in grouped.items()}
+
+    def values(self, dimension):
+        """
+        Distinct values of a dimension, sorted.
+        """
+        return sorted(self._view((), (_dimension(dimension),)).get(None, {}), key=str)
+
+    def save(self, path):
+        """
+        Writes the base cells and indexed segments; views are rebuilt on load.
+        """
+        data = {
+            "dimensions": list(DIMENSIONS),
+            "segments": self.segments,
+            "cells": [list(key) + measures for key, measures in self.base.items()],
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            # dumps() uses the C encoder; dump() streams through the pure-Python one
+            f.write(json.dumps(data))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a saved index; returns None if it was written for other dimensions.
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get("dimensions") != list(DIMENSIONS):
+            return None
+        index = cls()
+        width = len(DIMENSIONS)
+        index.base = {tuple(cell[:width]): cell[width:] for cell in data["cells"]}
+        index.segments = data["segments"]
+        return index
@@ -0,0 +1,160 @@
+import math
+
+from .metrics import get_metrics
+from .records import LEVELS
+
+# Effort of a scenario is the sum of these points over its recommendations
+EFFORT_POINTS = {"low": 1, "medium": 2, "high": 3}
+# Recommendations that replace a service outright; at most one per service applies
+REPLACEMENT_TYPES = frozenset({"open_source", "alternative_provider"})
+# Keeps -log(1 - fraction) finite when a recommendation removes a whole service
+MAX_FRACTION = 1 - 1e-9
+
+
+def _risk(rec):
+    level = rec.get("risk_level")
+    return LEVELS.index(level) if level in LEVELS else LEVELS.index("medium")
+
+
+def _service_groups(recommendations, service_costs):
+    """
+    Groups recommendation indices by the service they save on. Returns
+    [(cost, {exclusive group: [(index, weight, effort, risk)]})]; weight is
+    -log(1 - saved fraction of the service cost), so weights of combined
+    recommendations add up while their savings compound.
+    """
+    services = {}
+    for index, rec in enumerate(recommendations):
+        savings = max(float(rec.get("potential_savings") or 0), 0.0)
+        if savings <= 0:
+            continue
+        service = rec.get("service") or ""
+        cost = service_costs.get(service)
+        if cost is None or cost <= 0:
+            # Unknown service: only capped by its own numbers
+            service = ("", index)
+            cost = max(float(rec.get("current_cost") or 0), savings)
+        fraction = min(savings / cost, MAX_FRACTION)
+        rec_type = rec.get("recommendation_type") or ""
+        group = "replace" if rec_type in REPLACEMENT_TYPES else rec_type
+        entry = (index, -math.log1p(-fraction),
+                 EFFORT_POINTS.get(rec.get("implementation_effort"), EFFORT_POINTS["medium"]),
+                 _risk(rec))
+        services.setdefault(service, (cost, {}))[1].setdefault(group, []).append(entry)
+    return list(services.values())
+
+
+def _service_options(cost, groups, max_risk):
+    """
+    Best combinations within one service for each effort total: a grouped
+    knapsack picking at most one recommendation per exclusive group.
+    Returns [(effort, savings, indices)] with savings rising with effort.
+    """
+    best = {0: (0.0, ())}
+    for entries in groups.values():
+        entries = [e for e in entries if e[3] <= max_risk]
+        if not entries:
+            continue
+        merged = dict(best)
+        for effort, (weight, chosen) in best.items():
+            for index, rec_weight, rec_effort, _ in entries:
+                total = effort + rec_effort
+                current = merged.get(total)
+                if current is None or weight + rec_weight > current[0]:
+                    merged[total] = (weight + rec_weight, chosen + (index,))
+        best = merged
+
+    options = []
+    top = 0.0
+    for effort in sorted(best):
+        weight, chosen = best[effort]
+        if weight > top:
+            top = weight
+            options.append((effort, cost * -math.expm1(-weight), chosen))
+    return options
+
+
+def _frontier(groups, max_risk, max_effort):
+    """
+    Maximum savings for every effort total across services (a knapsack over
+    the per-service options). Returns (savings by effort, picks per service,
+    options per service); unreachable efforts hold -inf.
+    """
+    services = [_service_options(cost, g, max_risk) for cost, g in groups]
+    limit = sum(options[-1][0] for options in services if options)
+    if max_effort is not None:
+        limit = min(limit, max_effort)
+
+    best = [0.0] + [-math.inf] * limit
+    picks = []
+    for options in services:
+        merged = best[:]
+        pick = [-1] * (limit + 1)
+        for option, (effort, savings, _) in enumerate(options):
+            # Shift the whole budget axis by this option's effort at once
+            for total, value in enumerate([b + savings for b in best[:limit + 1 - effort]], effort):
+                if value > merged[total]:
+                    merged[total] = value
+                    pick[total] = option
+        best = merged
+        picks.append(pick)
+    return best, picks, services
+
+
+def _chosen(picks, services, effort):
+    indices = []
+    for pick, options in zip(reversed(picks), reversed(services)):
+        option = pick[effort]
+        if option >= 0:
+            option_effort, _, chosen = options[option]
+            indices.extend(chosen)
+            effort -= option_effort
+    return sorted(indices)
+
+
+def plan_scenarios(recommendations, service_costs, max_effort=None, max_risk="high"):
+    """
+    Pareto-optimal sets of recommendations for savings vs. effort vs. risk.
+
+    Recommendations on the same service compound rather than add (each saves
+    its fraction of what is left), so a service never saves more than it
+    costs, and at most one recommendation per type (and one replacement of
+    the service) is combined. Effort is the sum of EFFORT_POINTS, risk the
+    highest risk level in the set. Solved by dynamic programming over effort
+    for each risk level, so hundreds of recommendations take milliseconds
+    instead of enumerating 2^n subsets.
+
+    Returns scenario dicts sorted by effort: savings, effort, risk_level,
+    recommendations (indices into the input) and naive_savings (their plain sum).
+    """
+    with get_metrics().timer("scenario_plan_seconds"):
+        groups = _service_groups(recommendations, service_costs or {})
+        scenarios = []
+        for risk in range(LEVELS.index(max_risk) + 1):
+            best, picks, services = _frontier(groups, risk, max_effort)
+            top = 0.0
+            for effort, savings in enumerate(best):
+                if savings <= top + 0.005:
+                    continue
+                top = savings
+                scenarios.append((effort, risk, savings, _chosen(picks, services, effort)))
+
+    # Keep a point only if no cheaper, safer scenario saves as much
+    pareto = []
+    top_by_risk = [0.0] * len(LEVELS)
+    for effort, risk, savings, indices in sorted(scenarios, key=lambda s: (s[0], s[1], -s[2])):
+        if max(top_by_risk[:risk + 1]) >= savings - 0.005:
+            continue
+        top_by_risk[risk] = savings
+        pareto.append((effort, risk, savings, indices))
+
+    risks = [_risk(rec) for rec in recommendations]
+    naive = [float(rec.get("potential_savings") or 0) for rec in recommendations]
+    return [{
+        "savings": round(savings, 2),
+        "effort": effort,
+        "risk_level": LEVELS[max(risks[i] for i in indices)],
+        "recommendations": indices,
+        "naive_savings": round(sum(naive[i] for i in indices), 2),
+    } for effort, risk, savings, indices in pareto]
+
@@ -0,0 +1,283 @@
+import csv
+import math
+import random
+from itertools import repeat
+from operator import mul
+
+BILLING_FIELDS = [
+    "month", "service", "resource_id", "region", "usage_type",
+    "usage_quantity", "unit", "cost_inr", "desc",
+]
+
+# Service templates per provider: (service, usage_type, unit, units per month, share weight, desc)
+PROVIDER_SERVICES = {
+    "aws": {
+        "compute": ("EC2", "On-Demand", "hour", 730, 0.40, "t3.medium instance"),
+        "serverless": ("Lambda", "Requests", "million requests", 5, 0.08, "Lambda invocations"),
+        "sql": ("RDS", "Provisioned", "hour", 730, 0.20, "db.t3.micro instance"),
+        "nosql": ("DocumentDB", "Provisioned", "hour", 730, 0.18, "document database cluster"),
+        "storage": ("S3", "Storage", "GB", 200, 0.06, "Standard storage"),
+        "cdn": ("CloudFront", "Data Transfer", "GB", 500, 0.05, "CDN egress"),
+        "load_balancer": ("ELB", "Load Balancer", "hour", 730, 0.06, "Application load balancer"),
+        "block_storage": ("EBS", "Storage", "GB", 100, 0.04, "gp3 volume"),
+        "network": ("Data Transfer", "Egress", "GB", 300, 0.04, "Internet egress"),
+        "cache": ("ElastiCache", "Provisioned", "hour", 730, 0.07, "cache.t3.micro node"),
+        "region": "ap-south-1",
+        "regions": ["us-east-1", "eu-west-1", "ap-southeast-1"],
+        "resource_prefix": "i",
+    },
+    "gcp": {
+        "compute": ("Compute Engine", "On-Demand", "hour", 730, 0.40, "e2-medium instance"),
+        "serverless": ("Cloud Functions", "Invocations", "million requests", 5, 0.08, "function invocations"),
+        "sql": ("Cloud SQL", "Provisioned", "hour", 730, 0.20, "db-f1-micro instance"),
+        "nosql": ("Firestore", "Operations", "million operations", 20, 0.18, "document operations"),
+        "storage": ("Cloud Storage", "Storage", "GB", 200, 0.06, "Standard storage"),
+        "cdn": ("Cloud CDN", "Data Transfer", "GB", 500, 0.05, "CDN egress"),
+        "load_balancer": ("Cloud Load Balancing", "Forwarding Rule", "hour", 730, 0.06, "HTTPS load balancer"),
+        "block_storage": ("Persistent Disk", "Storage", "GB", 100, 0.04, "balanced persistent disk"),
+        "network": ("Networking", "Egress", "GB", 300, 0.04, "Internet egress"),
+        "cache": ("Memorystore", "Provisioned", "hour", 730, 0.07, "Redis basic tier"),
+        "region": "asia-south1",
+        "regions": ["us-central1", "europe-west1", "asia-southeast1"],
+        "resource_prefix": "gce",
+    },
+    "azure": {
+        "compute": ("Virtual Machines", "On-Demand", "hour", 730, 0.40, "B2s virtual machine"),
+        "serverless": ("Functions", "Executions", "million requests", 5, 0.08, "function executions"),
+        "sql": ("Azure SQL Database", "Provisioned", "hour", 730, 0.20, "Basic tier database"),
+        "nosql": ("Cosmos DB", "Provisioned", "100 RU/s-hour", 730, 0.18, "Cosmos DB throughput"),
+        "storage": ("Blob Storage", "Storage", "GB", 200, 0.06, "Hot tier storage"),
+        "cdn": ("Azure CDN", "Data Transfer", "GB", 500, 0.05, "CDN egress"),
+        "load_balancer": ("Application Gateway", "Gateway", "hour", 730, 0.06, "Standard_v2 gateway"),
+        "block_storage": ("Managed Disks", "Storage", "GB", 100, 0.04, "Premium SSD"),
+        "network": ("Bandwidth", "Egress", "GB", 300, 0.04, "Internet egress"),
+        "cache": ("Azure Cache for Redis", "Provisioned", "hour", 730, 0.07, "Basic C0 cache"),
+        "region": "centralindia",
+        "regions": ["eastus", "westeurope", "southeastasia"],
+        "resource_prefix": "vm",
+    },
+}
+
+# Tech stack keywords -> service kinds they imply
+TECH_KEYWORDS = {
+    "react": ["storage", "cdn"], "angular": ["storage", "cdn"], "vue": ["storage", "cdn"],
+    "next": ["compute", "cdn"], "static": ["storage", "cdn"],
+    "node": ["compute"], "express": ["compute"], "django": ["compute"], "flask": ["compute"],
+    "fastapi": ["compute"], "spring": ["compute"], "java": ["compute"], "golang": ["compute"],
+    "lambda": ["serverless"], "serverless": ["serverless"], "function": ["serverless"],
+    "mongo": ["nosql"], "dynamo": ["nosql"], "cosmos": ["nosql"], "firestore": ["nosql"],
+    "postgres": ["sql"], "mysql": ["sql"], "sql server": ["sql"], "maria": ["sql"],
+    "redis": ["cache"], "memcache": ["cache"],
+    "nginx": ["load_balancer"], "haproxy": ["load_balancer"], "traefik": ["load_balancer"],
+    "s3": ["storage"], "blob": ["storage"],
+}
+BASELINE_KINDS = ["compute", "block_storage", "network"]
+NOISE_TABLE_SIZE = 100003
+# Decimal places kept when generated numbers are written out
+COST_DIGITS = 2
+QUANTITY_DIGITS = 3
+
+
+def detect_provider(tech_stack):
+    text = " ".join(str(v) for v in tech_stack.values()).lower() if isinstance(tech_stack, dict) \
+        else str(tech_stack).lower()
+    if "azure" in text:
+        return "azure"
+    if "gcp" in text or "google" in text:
+        return "gcp"
+    return "aws"
+
+
+def _service_kinds(tech_stack):
+    kinds = list(BASELINE_KINDS)
+    values = tech_stack.values() if isinstance(tech_stack, dict) else [tech_stack]
+    for value in values:
+        text = str(value).lower()
+        for keyword, implied in TECH_KEYWORDS.items():
+            if keyword in text:
+                for kind in implied:
+                    if kind not in kinds:
+                        kinds.append(kind)
+    return kinds
+
+
+def _month_labels(start_month, months):
+    year, month = (int(part) for part in start_month.split("-"))
+    labels = []
+    for _ in range(months):
+        labels.append(f"{year:04d}-{month:02d}")
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+    return labels
+
+
+class ResourcePlan:
+    """
+    The fixed per-resource columns (service, region, ids, baseline cost) that
+    every generated month repeats, built once from the profile.
+    """
+
+    def __init__(self, profile, resources, rng, region_spread, budget_ratio):
+        tech_stack = profile.get('tech_stack', {}) or {}
+        provider = PROVIDER_SERVICES[detect_provider(tech_stack)]
+        kinds = _service_kinds(tech_stack)
+        templates = [provider[kind] for kind in kinds]
+        weights = [t[4] for t in templates]
+        weight_sum = sum(weights)
+
+        # Spread the resources over the services proportionally to their weight
+        counts = [max(1, round(resources * w / weight_sum)) for w in weights]
+
+        budget = profile.get('budget_inr_per_month', 5000) or 5000
+        target_total = budget * budget_ratio
+
+        self.services, self.regions, self.resource_ids = [], [], []
+        self.usage_types, self.units, self.descs = [], [], []
+        self.base_costs, self.base_quantities = [], []
+
+        for template, weight, count in zip(templates, weights, counts):
+            service, usage_type, unit, quantity, _, desc = template
+            # Lognormal sizes so a few resources dominate, as in real bills
+            sizes = [rng.lognormvariate(0, 0.6) for _ in range(count)]
+            size_sum = sum(sizes)
+            service_budget = target_total * weight / weight_sum
+            slug = service.lower().replace(" ", "-")
+            for i, size in enumerate(sizes):
+                share = size / size_sum
+                region = provider["region"]
+                if region_spread and rng.random() < region_spread:
+                    region = rng.choice(provider["regions"])
+                self.services.append(service)
+                self.regions.append(region)
+                self.resource_ids.append(f"{provider['resource_prefix']}-{slug}-{i:05d}")
+                self.usage_types.append(usage_type)
+                self.units.append(unit)
+                self.descs.append(desc)
+                self.base_costs.append(service_budget * share)
+                self.base_quantities.append(quantity * size)
+
+    def __len__(self):
+        return len(self.resource_ids)
+
+
+def iter_local_billing_batches(profile, months=1, resources=12, start_month="2025-01",
+                               line_items_per_month=1, seed=42, noise_sigma=0.15,
+                               monthly_growth=0.0, spike_probability=0.02,
+                               spike_multiplier=(2.0, 5.0), region_spread=0.0,
+                               budget_ratio=None):
+    """
+    Deterministic synthetic billing driven by the profile's tech_stack and
+    budget_inr_per_month. Yields one columnar batch (field -> list) per
+    month and line item, with the same fields as the LLM-generated records.
+    Costs and quantities are left unrounded; round_billing_columns() rounds
+    them when they are written out (CSV, JSON records, the billing store).
+
+    Args:
+        months: Number of consecutive months starting at start_month
+        resources: Approximate number of distinct resources
+        line_items_per_month: Records per resource per month (e.g. 30 for daily rows)
+        seed: RNG seed; identical arguments always produce identical data
+        noise_sigma: Lognormal sigma of the per-record cost noise
+        monthly_growth: Compound month-over-month cost growth (0.05 = +5%)
+        spike_probability: Fraction of records multiplied by a spike factor
+        spike_multiplier: (low, high) range of spike factors
+        region_spread: Fraction of resources placed outside the primary region
+        budget_ratio: Expected monthly total / budget; random in [0.85, 1.2] if None
+    """
+    if not profile:
+        return
+    rng = random.Random(seed)
+    if budget_ratio is None:
+        budget_ratio = rng.uniform(0.85, 1.2)
+    plan = ResourcePlan(profile, resources, rng, region_spread, budget_ratio)
+    n = len(plan)
+
+    # Noise is drawn once into a table and read back as slices at random
+    # offsets, which keeps per-row work down to list slicing and a multiply.
+    mu = -noise_sigma * noise_sigma / 2  # keeps the noise mean at 1.0
+    table_size = NOISE_TABLE_SIZE
+    noise_table = [rng.lognormvariate(mu, noise_sigma) for _ in range(table_size)]
+    noise_table = noise_table + noise_table[:n] if n <= table_size else \
+        noise_table * (n // table_size + 2)
+
+    for month_index, month in enumerate(_month_labels(start_month, months)):
+        growth = (1 + monthly_growth) ** month_index / line_items_per_month
+        month_column = [month] * n
+        base_costs = [base * growth for base in plan.base_costs]
+        base_quantities = [q / line_items_per_month for q in plan.base_quantities]
+        for _ in range(line_items_per_month):
+            offset = rng.randrange(table_size)
+            noise = noise_table[offset:offset + n]
+            costs = list(map(mul, base_costs, noise))
+            quantities = list(map(mul, base_quantities, noise))
+
+            if spike_probability:
+                expected = n * spike_probability
+                spikes = int(round(rng.gauss(expected, math.sqrt(expected * (1 - spike_probability)))))
+                low, high = spike_multiplier
+                for index in rng.sample(range(n), max(0, min(n, spikes))):
+                    factor = rng.uniform(low, high)
+                    costs[index] *= factor
+                    quantities[index] *= factor
+
+            yield {
+                "month": month_column,
+                "service": plan.services,
+                "resource_id": plan.resource_ids,
+                "region": plan.regions,
+                "usage_type": plan.usage_types,
+                "usage_quantity": quantities,
+                "unit": plan.units,
+                "cost_inr": costs,
+                "desc": plan.descs,
+            }
+
+
+def round_billing_columns(columns):
+    """
+    Returns the batch with cost_inr rounded to COST_DIGITS and usage_quantity
+    to QUANTITY_DIGITS decimals, one column at a time.
+    """
+    n = len(columns["cost_inr"])
+    return dict(
+        columns,
+        cost_inr=list(map(round, columns["cost_inr"], repeat(COST_DIGITS, n))),
+        usage_quantity=list(map(round, columns["usage_quantity"], repeat(QUANTITY_DIGITS, n))),
+    )
+
+
+def columns_to_records(columns):
+    """
+    Converts a columnar batch into a list of record dicts.
+    """
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*(columns[name] for name in names))]
+
+
+def generate_local_billing(profile, **options):
+    """
+    Returns local synthetic billing as a list of record dicts
+    (see iter_local_billing_batches for the options).
+    """
+    records = []
+    for batch in iter_local_billing_batches(profile, **options):
+        records.extend(columns_to_records(round_billing_columns(batch)))
+    return records or None
+
+
+def write_billing_csv(path, batches):
+    """
+    Streams columnar batches to a CSV file with the billing record header,
+    rounding costs and quantities as they are written. Returns the number
+    of rows written.
+    """
+    rows = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(BILLING_FIELDS)
+        for batch in batches:
+            batch = round_billing_columns(batch)
+            writer.writerows(zip(*(batch[field] for field in BILLING_FIELDS)))
+            rows += len(batch["cost_inr"])
+    return rows
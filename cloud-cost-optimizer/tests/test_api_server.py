@@ -0,0 +1,61 @@
+import asyncio
+import json
+
+from modules.api_server import ApiServer, OptimizerService
+from modules.billing_store import BillingStore
+
+
+async def _exchange(server, request):
+    reader, writer = await asyncio.open_connection(server.host, server.port)
+    writer.write(request)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return response
+
+
+def _run(request):
+    async def main():
+        server = await ApiServer(OptimizerService(workers=1), port=0).start()
+        try:
+            return await asyncio.wait_for(_exchange(server, request), 5)
+        finally:
+            await server.close()
+    return asyncio.run(main())
+
+
+def test_invalid_content_length_is_a_bad_request():
+    for value in (b"abc", b"-5"):
+        response = _run(b"POST /v1/billing HTTP/1.1\r\nContent-Length: " + value + b"\r\n\r\n{}")
+        head, _, body = response.partition(b"\r\n\r\n")
+        assert head.startswith(b"HTTP/1.1 400")
+        assert "Content-Length" in json.loads(body)["error"]
+
+
+def test_concurrent_store_ingests(tmp_path):
+    service = OptimizerService(workers=4, billing_store=str(tmp_path))
+
+    async def main():
+        params = [{"store": True, "records": [{"month": f"2025-0{i % 9 + 1}", "service": "S3",
+                                               "cost_inr": 1}] * 50} for i in range(16)]
+        return await asyncio.gather(*(service.run_task("billing", p) for p in params))
+
+    try:
+        results = asyncio.run(main())
+    finally:
+        service.close()
+    assert [r["stored"] for r in results] == [50] * 16
+    assert BillingStore(str(tmp_path)).rows == 800
+
+
+def test_metrics_endpoint_serves_prometheus_text():
+    from modules.metrics import get_metrics
+
+    get_metrics().reset()
+    get_metrics().observe("llm_request_seconds", 0.2, status="200")
+    response = _run(b"GET /metrics HTTP/1.1\r\nConnection: close\r\n\r\n")
+    head, _, body = response.partition(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 200") and b"text/plain; version=0.0.4" in head
+    lines = body.decode("utf-8").splitlines()
+    assert "# TYPE cloud_cost_optimizer_llm_request_seconds histogram" in lines
+    assert 'cloud_cost_optimizer_llm_request_seconds_bucket{le="+Inf",status="200"} 1' in lines
@@ -0,0 +1,124 @@
+import csv
+
+import pytest
+
+from modules.billing_exports import (BillingExports, detect_provider, import_exports,
+                                     iter_export_batches, parse_fx_rates)
+from modules.billing_store import BillingStore
+from modules.synthetic_billing import BILLING_FIELDS
+
+RATES = {"INR": 1.0, "USD": 80.0, "EUR": 100.0}
+
+AWS = [
+    ["lineItem/UsageStartDate", "lineItem/ProductCode", "lineItem/UsageType", "lineItem/ResourceId",
+     "product/region", "lineItem/UsageAmount", "pricing/unit", "lineItem/UnblendedCost",
+     "lineItem/CurrencyCode", "lineItem/LineItemDescription"],
+    ["2025-03-01T00:00:00Z", "AmazonEC2", "APS3-BoxUsage:t3.large", "i-1", "ap-south-1",
+     "720", "Hrs", "60.5", "USD", "t3.large"],
+    ["2025-03-01T00:00:00Z", "AmazonEC2", "APS3-EBS:VolumeUsage.gp3", "vol-1", "ap-south-1",
+     "100", "GB-Mo", "8", "USD", "gp3"],
+    ["2025-03-02T00:00:00Z", "AmazonEC2", "APS3-DataTransfer-Out-Bytes", "i-1", "ap-south-1",
+     "", "GB", "1.5", "USD", "transfer"],
+    ["2025-04-01T00:00:00Z", "AmazonRDS", "APS3-InstanceUsage:db.t3.medium", "db-1", "ap-south-1",
+     "720", "Hrs", "40", "USD", "db.t3.medium"],
+]
+GCP = [
+    ["usage_start_time", "service.description", "sku.description", "resource.name",
+     "location.region", "usage.amount", "usage.unit", "cost", "currency"],
+    ["2025-03-05 00:00:00 UTC", "Compute Engine", "N2 Instance Core", "vm-1", "asia-south1",
+     "744", "hour", "10", "USD"],
+    ["2025-03-05 00:00:00 UTC", "Cloud Storage", "Standard Storage", "bucket-1", "asia-south1",
+     "50", "gibibyte month", "2", "EUR"],
+    ["2025-03-06 00:00:00 UTC", "Compute Engine", "N2 Instance Ram", "vm-1", "asia-south1",
+     "744", "hour", "5", "USD"],
+]
+AZURE = [
+    ["Date", "MeterCategory", "MeterSubCategory", "ResourceId", "ResourceLocation", "Quantity",
+     "UnitOfMeasure", "CostInBillingCurrency", "BillingCurrency", "MeterName"],
+    ["03/15/2025", "Virtual Machines", "Dv3 Series", "/vm/web", "centralindia", "720", "1 Hour",
+     "4000", "INR", "D2 v3"],
+    ["04/01/2025", "Storage", "Premium SSD", "/disk/web", "centralindia", "1", "1/Month",
+     "900", "INR", "P10"],
+]
+
+
+def _write(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerows(rows)
+    return str(path)
+
+
+def _records(path, **options):
+    return [dict(zip(batch, row)) for batch in iter_export_batches(path, rates=RATES, **options)
+            for row in zip(*batch.values())]
+
+
+def test_provider_is_detected_from_the_header():
+    assert detect_provider(AWS[0]) == "aws"
+    assert detect_provider(GCP[0]) == "gcp"
+    assert detect_provider(AZURE[0]) == "azure"
+    assert detect_provider(["month", "service", "cost_inr"]) == "native"
+    with pytest.raises(ValueError):
+        detect_provider(["foo", "bar"])
+
+
+def test_aws_columns_services_and_blank_usage(tmp_path):
+    records = _records(_write(tmp_path / "cur.csv", AWS))
+    assert [r["service"] for r in records] == ["EC2", "EBS", "Data Transfer", "RDS"]
+    assert [r["month"] for r in records] == ["2025-03", "2025-03", "2025-03", "2025-04"]
+    assert [r["cost_inr"] for r in records] == [4840, 640, 120, 3200]
+    first = records[0]
+    assert (first["resource_id"], first["region"], first["usage_quantity"], first["unit"]) == \
+        ("i-1", "ap-south-1", 720, "hour")
+    assert records[1]["unit"] == "GB"
+    # A blank usage amount is 0; the row and its cost are kept
+    assert records[2]["usage_quantity"] == 0
+
+
+def test_mixed_currency_chunk_is_converted_per_currency(tmp_path):
+    records = _records(_write(tmp_path / "gcp.csv", GCP))
+    assert sorted((r["usage_type"], r["cost_inr"]) for r in records) == [
+        ("N2 Instance Core", 800), ("N2 Instance Ram", 400), ("Standard Storage", 200)]
+    assert {r["service"] for r in records} == {"Compute Engine", "Cloud Storage"}
+    assert {r["month"] for r in records} == {"2025-03"}
+
+    with pytest.raises(ValueError, match="GBP"):
+        _records(_write(tmp_path / "gbp.csv", GCP[:2] + [GCP[2][:-1] + ["GBP"]]))
+
+
+def test_azure_us_dates_and_billing_currency(tmp_path):
+    records = _records(_write(tmp_path / "azure.csv", AZURE))
+    assert [(r["month"], r["service"], r["cost_inr"]) for r in records] == [
+        ("2025-03", "Virtual Machines", 4000), ("2025-04", "Storage", 900)]
+    assert records[0]["resource_id"] == "/vm/web"
+
+
+def test_small_batches_match_one_batch(tmp_path):
+    path = _write(tmp_path / "cur.csv", AWS)
+    assert _records(path, batch_size=1) == _records(path)
+
+
+def test_import_with_a_process_pool_matches_a_sequential_import(tmp_path):
+    paths = [_write(tmp_path / "cur.csv", AWS), _write(tmp_path / "gcp.csv", GCP),
+             _write(tmp_path / "azure.csv", AZURE)]
+    parallel = BillingStore(str(tmp_path / "parallel"))
+    sequential = BillingStore(str(tmp_path / "sequential"))
+
+    imported = import_exports(paths, parallel, workers=3, rates=RATES)
+    assert imported == import_exports(paths, sequential, workers=1, rates=RATES)
+    assert imported == {paths[0]: 4, paths[1]: 3, paths[2]: 2}
+
+    def rows(batches):
+        return [tuple(row) for batch in batches
+                for row in zip(*(batch[field] for field in BILLING_FIELDS))]
+
+    stored = rows(BillingStore(parallel.path).iter_batches())
+    assert stored == rows(BillingStore(sequential.path).iter_batches())
+    assert stored == rows(BillingExports(paths, rates=RATES).iter_batches())
+    assert sorted(BillingStore(parallel.path).months) == ["2025-03", "2025-04"]
+
+
+def test_parse_fx_rates():
+    assert parse_fx_rates("usd=83.2, EUR=90") == {"USD": 83.2, "EUR": 90.0}
+    with pytest.raises(ValueError):
+        parse_fx_rates("USD")
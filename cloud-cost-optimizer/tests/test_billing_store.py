@@ -0,0 +1,71 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from modules.billing_store import BillingStore
+
+
+def _records(month, n, cost=1.0):
+    return [{"month": month, "service": "EC2", "resource_id": f"i-{i}", "cost_inr": cost} for i in range(n)]
+
+
+def test_concurrent_appends_keep_every_segment(tmp_path):
+    path = str(tmp_path / "store")
+    shared = BillingStore(path)
+    months = [f"2025-{m:02d}" for m in range(1, 13)]
+
+    def ingest(i):
+        # Half the writers share one instance, half open their own (stale manifest)
+        store = shared if i % 2 else BillingStore(path)
+        return store.append([_records(months[i % 12], 100 + i)])
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        written = sum(pool.map(ingest, range(24)))
+
+    store = BillingStore(path)
+    assert store.rows == written == sum(100 + i for i in range(24))
+    assert len(store.manifest["segments"]) == 24
+    assert sum(len(b["cost_inr"]) for b in store.iter_batches()) == written
+    assert not [name for name in os.listdir(path) if name.startswith(".staging")]
+
+
+def test_drop_month_keeps_other_months(tmp_path):
+    store = BillingStore(str(tmp_path))
+    store.append([_records("2025-01", 3) + _records("2025-02", 2)])
+    store.drop_month("2025-01")
+    assert BillingStore(str(tmp_path)).months == ["2025-02"]
+    assert [s["name"] for s in store.manifest["segments"]] == sorted(
+        n for n in os.listdir(tmp_path) if n.startswith("2025-"))
+
+
+def test_drop_month_saves_manifest_before_deleting(tmp_path, monkeypatch):
+    store = BillingStore(str(tmp_path))
+    store.append([_records("2025-01", 3) + _records("2025-02", 2)])
+
+    def crash(path, ignore_errors=False):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr("modules.billing_store.shutil.rmtree", crash)
+    try:
+        store.drop_month("2025-01")
+    except KeyboardInterrupt:
+        pass
+    reopened = BillingStore(str(tmp_path))
+    assert reopened.months == ["2025-02"]
+    assert sum(len(b["cost_inr"]) for b in reopened.iter_batches()) == 2
+
+
+def test_record_lists_are_validated_on_append(tmp_path):
+    store = BillingStore(str(tmp_path))
+    records = [
+        {"month": "2025-01", "service": "EC2", "cost_inr": "1,200", "usage_quantity": "2", "unit": "hrs"},
+        {"month": "2025-01", "service": "S3", "cost_inr": None, "usage_quantity": 1, "unit": "TB"},
+        {"month": "2025-01", "service": "RDS", "cost_inr": "n/a"},
+    ]
+    assert store.append([records]) == 2
+    rows = store.read_records()
+    assert [(r["service"], r["cost_inr"], r["usage_quantity"], r["unit"]) for r in rows] == [
+        ("EC2", 1200.0, 2.0, "hour"), ("S3", 0.0, 1024.0, "GB")]
+
+    # Columnar batches with text numbers are coerced the same way
+    store.append([{"month": ["2025-02"], "service": ["EC2"], "cost_inr": ["₹300"]}])
+    assert store.read_records(months=["2025-02"])[0]["cost_inr"] == 300.0
@@ -0,0 +1,120 @@
+import csv
+from datetime import datetime
+
+from modules.budget_watch import BudgetWatcher, month_end_projection
+from modules.synthetic_billing import BILLING_FIELDS
+
+NOW = datetime(2026, 10, 11)
+
+
+def _write(path, rows, header=True, mode="w", tail=""):
+    with open(path, mode, newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        if header:
+            writer.writerow(BILLING_FIELDS)
+        for month, service, cost in rows:
+            record = {"month": month, "service": service, "resource_id": "r-1", "cost_inr": cost}
+            writer.writerow([record.get(field, "") for field in BILLING_FIELDS])
+        f.write(tail)
+
+
+def _watcher(directory, budget=1000, **options):
+    alerts = []
+    clock = options.pop("clock", lambda: 0.0)
+    watcher = BudgetWatcher({"budget_inr_per_month": budget}, str(directory), sinks=[alerts.append],
+                            clock=clock, now=lambda: NOW, recommend=lambda *args: [], **options)
+    return watcher, alerts
+
+
+def test_budget_is_compared_with_the_latest_month(tmp_path):
+    _write(tmp_path / "billing.csv", [("2026-09", "EC2", 600), ("2026-10", "EC2", 600)])
+    watcher, alerts = _watcher(tmp_path, thresholds=(0.8, 1.0))
+    watcher.poll()
+    assert watcher.status["month"] == "2026-10"
+    assert watcher.status["budget_variance"] == -400
+    assert not watcher.status["is_over_budget"]
+    assert not [a for a in alerts if a["severity"] == "critical" and a["type"] != "projected"]
+
+
+def test_alerts_fire_once_per_crossing(tmp_path):
+    path = tmp_path / "billing.csv"
+    _write(path, [("2026-09", "EC2", 900)])
+    watcher, alerts = _watcher(tmp_path, thresholds=(0.5, 0.8, 1.0))
+    watcher.poll()
+    # Past month: no projection beyond the spend; only the highest crossed threshold is sent
+    assert [(a["type"], a["threshold"]) for a in alerts] == [("spend", 0.8), ("projected", 0.8)]
+
+    _write(path, [("2026-09", "EC2", 50)], header=False, mode="a")
+    watcher.poll()
+    assert len(alerts) == 2
+
+    _write(path, [("2026-09", "RDS", 100)], header=False, mode="a")
+    watcher.poll()
+    assert [a["type"] for a in alerts[2:]] == ["over_budget", "projected"]
+    assert alerts[2]["severity"] == "critical"
+
+
+def test_appends_are_read_incrementally_and_rewrites_retracted(tmp_path):
+    path = tmp_path / "billing.csv"
+    _write(path, [("2026-10", "EC2", 100)], tail="2026-10,RDS")
+    watcher, _ = _watcher(tmp_path, budget=0)
+    watcher.poll()
+    assert watcher.aggregator.service_costs == {"EC2": 100}
+
+    # The partial line is completed: only then is it counted
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(",,r-2,,,,50,\n")
+    assert watcher.poll()
+    assert watcher.aggregator.service_costs == {"EC2": 100, "RDS": 50}
+    assert watcher.billing.files[str(path)].offset == path.stat().st_size
+
+    _write(path, [("2026-10", "S3", 7)])
+    watcher.poll()
+    assert watcher.aggregator.service_costs == {"S3": 7}
+    assert watcher.aggregator.record_count == 1
+
+    path.unlink()
+    watcher.poll()
+    assert watcher.aggregator.record_count == 0 and watcher.status is None
+
+
+def test_unreadable_files_are_reported_to_the_sinks(tmp_path):
+    (tmp_path / "bad.csv").write_text("foo,bar\n1,2\n", encoding="utf-8")
+    watcher, alerts = _watcher(tmp_path)
+    watcher.poll()
+    assert [a["type"] for a in alerts] == ["file_error"]
+    watcher.poll()
+    assert len(alerts) == 1
+
+
+def test_recommendations_are_debounced(tmp_path):
+    path = tmp_path / "billing.csv"
+    now = [0.0]
+    calls = []
+    watcher, _ = _watcher(tmp_path, budget=10_000, debounce=10, clock=lambda: now[0])
+    watcher.recommend = lambda *args: calls.append(now[0]) or []
+
+    _write(path, [("2026-10", "EC2", 100)])
+    watcher.poll()
+    now[0] = 5
+    _write(path, [("2026-10", "EC2", 100)], header=False, mode="a")
+    watcher.poll()
+    now[0] = 12
+    watcher.poll()
+    assert calls == []
+    now[0] = 15
+    watcher.poll()
+    assert calls == [15]
+
+    # An immaterial change (under 5%) does not schedule another run
+    _write(path, [("2026-10", "EC2", 1)], header=False, mode="a")
+    now[0] = 100
+    watcher.poll()
+    now[0] = 200
+    watcher.poll()
+    assert calls == [15]
+
+
+def test_month_end_projection():
+    assert month_end_projection("2026-10", 1000, NOW) == 1000 * 31 / 10
+    assert month_end_projection("2026-09", 1000, NOW) == 1000
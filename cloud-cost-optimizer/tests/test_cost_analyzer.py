@@ -0,0 +1,79 @@
+import pytest
+
+from modules.cost_analyzer import (TREND_DIMENSIONS, CostAggregator, analyze_cost_batches,
+                                   analyze_costs, monthly_service_costs)
+from modules.report import build_report
+
+RECORDS = [
+    {"month": "2025-01", "service": "EC2", "region": "ap-south-1", "resource_id": "i-1", "cost_inr": 100},
+    {"month": "2025-01", "service": "RDS", "region": "ap-south-1", "resource_id": "db-1", "cost_inr": 50},
+    {"month": "2025-02", "service": "EC2", "region": "us-east-1", "resource_id": "i-2", "cost_inr": 30},
+    {"month": "2025-02", "service": "S3", "cost_inr": 5},
+]
+
+
+def test_fast_path_builds_no_cells():
+    aggregator = CostAggregator(dimensions=())
+    aggregator.update(RECORDS)
+    assert aggregator.cells == {}
+    assert aggregator.total_cost == 185
+    assert aggregator.service_costs == {"EC2": 130, "RDS": 50, "S3": 5}
+    with pytest.raises(ValueError):
+        aggregator.costs_by("month")
+
+
+def test_totals_match_with_and_without_trends():
+    # Without month tracking the billing is one month, so compare on one month
+    fast = analyze_costs({"budget_inr_per_month": 100}, RECORDS[:2], trends=False)
+    full = analyze_costs({"budget_inr_per_month": 100}, RECORDS[:2])
+    assert "monthly_costs" not in fast
+    assert full["monthly_costs"] == {"2025-01": 150}
+    assert {key: full[key] for key in fast if key != "budget_month"} == \
+        {key: value for key, value in fast.items() if key != "budget_month"}
+    assert fast["budget_variance"] == 50 and fast["is_over_budget"]
+
+
+def test_budget_is_judged_on_the_latest_month():
+    records = [
+        {"month": f"2025-{m:02d}", "service": service, "cost_inr": cost + m / 3}
+        for m in range(1, 13) for service, cost in (("EC2", 2000), ("RDS", 1000.1))
+    ]
+    analysis = analyze_costs({"budget_inr_per_month": 3000}, records)
+    assert analysis["budget_month"] == "2025-12" and analysis["months_count"] == 12
+    assert analysis["total_monthly_cost"] == round(3000.1 + 8, 2) == analysis["monthly_costs"]["2025-12"]
+    assert analysis["budget_variance"] == 8.1 and analysis["is_over_budget"]
+    assert analysis["total_cost"] == round(sum(r["cost_inr"] for r in records), 2)
+    assert monthly_service_costs(analysis) == {"EC2": round(2000 + 78 / 36, 2),
+                                               "RDS": round(1000.1 + 78 / 36, 2)}
+
+    # Scenario caps are per month: a recommendation cannot save more than a month of EC2
+    recommendation = {"title": "Drop EC2", "service": "EC2", "potential_savings": 10000,
+                      "implementation_effort": "low", "risk_level": "low"}
+    report = build_report({"name": "Shop"}, analysis, [recommendation])
+    assert report["summary"]["total_potential_savings"] == monthly_service_costs(analysis)["EC2"]
+
+
+def test_record_and_column_batches_agree():
+    by_records = CostAggregator()
+    by_records.update(RECORDS)
+    by_columns = CostAggregator()
+    fields = ("month", "service", "region", "resource_id", "cost_inr")
+    by_columns.update_columns({f: [r.get(f, "Unknown") for r in RECORDS] for f in fields})
+    assert by_records.cells == by_columns.cells
+    assert by_records.costs_by("region") == {"ap-south-1": 150, "us-east-1": 30, "Unknown": 5}
+
+
+def test_merge_retracts_to_empty():
+    total = CostAggregator(TREND_DIMENSIONS)
+    part = CostAggregator(TREND_DIMENSIONS)
+    part.update(RECORDS[:2])
+    total.update(RECORDS)
+    total.merge(part, -1)
+    assert total.service_costs == {"EC2": 30, "S3": 5}
+    assert total.costs_by("month") == {"2025-02": 35}
+    with pytest.raises(ValueError):
+        total.merge(CostAggregator(), 1)
+
+
+def test_empty_stream_returns_none():
+    assert analyze_cost_batches({"budget_inr_per_month": 1}, iter([])) is None
@@ -0,0 +1,33 @@
+from modules.cost_trends import detect_anomalies, forecast_costs, service_trends
+
+MONTHS = [f"2025-{m:02d}" for m in range(1, 7)]
+
+
+def test_spike_over_flat_history_is_flagged():
+    anomalies = detect_anomalies(MONTHS, ["EC2"], [[100] * 5 + [5000]])
+    assert [(a["month"], a["type"]) for a in anomalies] == [("2025-06", "spike")]
+
+
+def test_small_wobbles_and_constant_rows_are_not_flagged():
+    assert detect_anomalies(MONTHS, ["EC2", "S3"], [[100] * 5 + [101], [50] * 6]) == []
+
+
+def test_robust_score_still_used_when_mad_is_positive():
+    anomalies = detect_anomalies(MONTHS, ["EC2"], [[100, 110, 90, 105, 95, 400]])
+    assert anomalies[0]["month"] == "2025-06"
+    assert anomalies[0]["score"] > 3.5
+
+
+def test_forecast_accounts_for_missing_months():
+    # 100/month growth, but March and April have no billing
+    months = ["2025-01", "2025-02", "2025-05", "2025-06"]
+    forecast = forecast_costs(months, [1000, 1100, 1400, 1500], budget=1650)
+    assert forecast["slope_per_month"] == 100
+    assert forecast["next_months"]["2025-07"] == 1600
+    assert forecast["projected_over_budget_month"] == "2025-08"
+    assert forecast["months_until_over_budget"] == 2
+
+
+def test_service_trend_slope_uses_calendar_spacing():
+    trends = service_trends(["2025-01", "2025-03"], ["EC2"], [[1000, 1200]])
+    assert trends["EC2"]["slope_per_month"] == 100
@@ -0,0 +1,31 @@
+import json
+
+from modules.json_extract import _close_truncated, extract_json
+
+
+def _closed(text):
+    return json.loads(_close_truncated(text))
+
+
+def test_truncated_item_after_complete_sibling_is_dropped():
+    assert _closed('[{"title":"A","x":1}, {"title":"B"') == [{"title": "A", "x": 1}]
+    assert _closed('{"recommendations": [{"title":"A"}, {"title":"B", "x": 1') == \
+        {"recommendations": [{"title": "A"}]}
+
+
+def test_trailing_scalar_is_kept_when_complete():
+    assert _closed('[1,2,3') == [1, 2, 3]
+    assert _closed('{"a": 1, "b": 2') == {"a": 1, "b": 2}
+    assert _closed('{"a": 1, "b": tr') == {"a": 1}
+    assert _closed('{"a": "x", "b": "y') == {"a": "x"}
+
+
+def test_nested_object_values_are_cut_inside():
+    text = '{"name": "X", "tech_stack": {"frontend": "React", "backend": "No'
+    assert _closed(text) == {"name": "X", "tech_stack": {"frontend": "React"}}
+    assert _closed('[{"title":"B","x":1, "y"') == [{"title": "B", "x": 1}]
+
+
+def test_extract_truncated_recommendations():
+    text = 'Sure:\n```json\n[{"title": "Use spot"}, {"title": "Tier S3", "steps": ["a", "b'
+    assert extract_json(text, schema="recommendations") == [{"title": "Use spot"}]
@@ -0,0 +1,46 @@
+from modules.json_stream import JSONStreamParser, iter_json_items
+
+
+def _chunks(text, size=3):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def _parse(text, key=None, size=3):
+    parser = JSONStreamParser(key=key)
+    items = []
+    for chunk in _chunks(text, size):
+        items.extend(parser.feed(chunk))
+    return items
+
+
+def test_streams_top_level_array_items():
+    text = 'Here you go:\n```json\n[{"t": 1}, {"t": [2, "]"]}]\n```'
+    assert _parse(text) == [{"t": 1}, {"t": [2, "]"]}]
+
+
+def test_skips_brackets_in_prose():
+    assert _parse('I think [1] is fine. [{"t":1}]') == [{"t": 1}]
+    assert _parse("It's {simple}: [{'t': 1}]") == [{"t": 1}]
+
+
+def test_root_object_prefers_key_and_skips_scalar_arrays():
+    text = '{"providers":["aws"],"notes":[{"x":1}],"recommendations":[{"title":"A"},{"title":"B"}]}'
+    assert _parse(text, key="recommendations") == [{"title": "A"}, {"title": "B"}]
+    assert _parse('{"providers":["aws"],"records":[{"service":"EC2"}]}') == [{"service": "EC2"}]
+
+
+def test_repairs_items():
+    parser = JSONStreamParser()
+    items = parser.feed("[{'title': 'A, [b]',}, {\"title\": \"B\",}, {oops}]")
+    assert items == [{"title": "A, [b]"}, {"title": "B"}]
+    assert parser.errors == 1
+
+
+def test_iter_json_items_falls_back_to_full_text():
+    # No "recommendations" key, so the parser never picks an array
+    text = '{"items": [{"title": "A"}, {"title": "B"}]}'
+    assert _parse(text, key="recommendations") == []
+    assert list(iter_json_items(_chunks(text), schema="recommendations")) == [{"title": "A"}, {"title": "B"}]
+
+    text = 'Result: {"data": [{"title": "A"}]'  # truncated root object
+    assert list(iter_json_items(_chunks(text), schema="recommendations")) == [{"title": "A"}]
@@ -0,0 +1,113 @@
+import pytest
+
+from modules import llm_client
+from modules.llm_cache import LLMCache
+from modules.llm_client import parses_as, query_llm, query_llm_stream
+
+
+class FakeClient:
+    model = "fake-model"
+    api_url = "http://fake/v1/chat/completions"
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = 0
+
+    def complete(self, messages, **kwargs):
+        self.calls += 1
+        return self.replies.pop(0)
+
+    def stream(self, messages, **kwargs):
+        yield self.complete(messages)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = LLMCache(str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(llm_client, "get_cache", lambda: cache)
+    return cache
+
+
+def _use(monkeypatch, client):
+    monkeypatch.setattr(llm_client, "_default_client", client)
+    return client
+
+
+MESSAGES = [{"role": "user", "content": "profile please"}]
+
+
+def test_unparseable_reply_is_not_cached(cache, monkeypatch):
+    client = _use(monkeypatch, FakeClient(["Sorry, I can't help.", '{"name": "Shop"}']))
+    validate = parses_as("profile")
+
+    assert query_llm(MESSAGES, validate=validate) == "Sorry, I can't help."
+    assert cache.stats()["entries"] == 0
+    assert query_llm(MESSAGES, validate=validate) == '{"name": "Shop"}'
+    assert query_llm(MESSAGES, validate=validate) == '{"name": "Shop"}'
+    assert client.calls == 2
+
+
+def test_cached_reply_that_fails_validation_is_evicted(cache, monkeypatch):
+    client = _use(monkeypatch, FakeClient(["not json", '{"name": "Shop"}']))
+    query_llm(MESSAGES)  # no validate: cached as before
+    assert cache.stats()["entries"] == 1
+
+    assert query_llm(MESSAGES, validate=parses_as("profile")) == '{"name": "Shop"}'
+    assert client.calls == 2
+    assert cache.stats()["entries"] == 1
+
+
+def test_stream_caches_only_valid_replies(cache, monkeypatch):
+    _use(monkeypatch, FakeClient(['[{"oops": 1}]']))
+    assert "".join(query_llm_stream(MESSAGES, validate=parses_as("billing"))) == '[{"oops": 1}]'
+    assert cache.stats()["entries"] == 0
+
+
+def test_delete_and_running_size(tmp_path):
+    cache = LLMCache(str(tmp_path / "cache.sqlite"), max_bytes=25)
+    cache.set("a", "x" * 10)
+    cache.set("a", "x" * 5)  # replacing counts the new size only
+    cache.set("b", "y" * 10)
+    assert cache._bytes == cache.stats()["bytes"] == 15
+
+    cache.delete("a")
+    assert cache.get("a") is None
+    assert cache._bytes == cache.stats()["bytes"] == 10
+
+    cache.set("c", "z" * 10)
+    cache.set("d", "w" * 10)  # over max_bytes: "b" is the least recently used
+    assert cache.get("b") is None
+    assert cache._bytes == cache.stats()["bytes"] == 20
+
+    reopened = LLMCache(cache.path, max_bytes=25)
+    reopened.get("c")
+    assert reopened._bytes == 20
+
+
+def test_cache_hit_does_not_build_a_client(cache, monkeypatch):
+    monkeypatch.setenv("LLM_BACKEND", "http")
+    monkeypatch.setattr(llm_client, "_default_client", None)
+
+    def create_client(**options):
+        raise AssertionError("client built on a cache hit")
+
+    monkeypatch.setattr(llm_client, "create_client", create_client)
+    key = llm_client.make_cache_key(llm_client.MODEL_ID, MESSAGES, 1000, 0.1,
+                                    endpoint=llm_client.API_URL)
+    cache.set(key, '{"name": "Shop"}')
+
+    assert query_llm(MESSAGES) == '{"name": "Shop"}'
+    assert "".join(query_llm_stream(MESSAGES)) == '{"name": "Shop"}'
+    assert llm_client._default_client is None
+
+
+def test_replies_are_cached_per_endpoint(cache, monkeypatch):
+    stub = _use(monkeypatch, FakeClient(['{"name": "Stub"}']))
+    stub.api_url = "http://127.0.0.1:8000/v1/chat/completions"
+    assert query_llm(MESSAGES) == '{"name": "Stub"}'
+
+    live = _use(monkeypatch, FakeClient(['{"name": "Live"}']))
+    assert query_llm(MESSAGES) == '{"name": "Live"}'
+    assert query_llm(MESSAGES) == '{"name": "Live"}'
+    assert (stub.calls, live.calls) == (1, 1)
+    assert cache.stats()["entries"] == 2
@@ -0,0 +1,112 @@
+import asyncio
+import random
+
+import pytest
+
+from modules.llm_client import LLMClient
+from modules.llm_stub import StubLLMServer
+from modules.metrics import get_metrics
+
+MESSAGES = [{"role": "user", "content": "ping"}]
+REPLY = '{"status": "ok", "working": true}'
+
+
+class RecordingClient(LLMClient):
+    """
+    Records the delay chosen before each retry.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.delays = []
+
+    def backoff_delay(self, attempt, retry_after=None):
+        delay = super().backoff_delay(attempt, retry_after)
+        self.delays.append(delay)
+        return delay
+
+
+@pytest.fixture
+def stub():
+    # Every second request is rate limited with Retry-After: 0.05
+    with StubLLMServer(rate_limit_every=2, retry_after=0.05, chunk_size=4) as server:
+        yield server
+
+
+def _client(stub, **options):
+    return RecordingClient(api_url=stub.url, api_token="stub", backoff_base=0.01, **options)
+
+
+def _counter(name, **labels):
+    return sum(c["value"] for c in get_metrics().snapshot()["counters"]
+               if c["name"] == name and all(c["labels"].get(k) == v for k, v in labels.items()))
+
+
+def test_complete_honours_retry_after(stub):
+    get_metrics().reset()
+    client = _client(stub)
+    assert client.complete(MESSAGES) == REPLY
+    assert client.complete(MESSAGES) == REPLY
+    assert (stub.request_count, stub.rate_limited_count) == (3, 1)
+    assert client.delays == [0.05]
+    assert _counter("llm_retries_total", mode="complete", reason="http_429") == 1
+
+
+def test_complete_gives_up_after_retries():
+    get_metrics().reset()
+    with StubLLMServer(rate_limit_every=1, retry_after=0.01) as stub:
+        client = _client(stub)
+        with pytest.raises(RuntimeError):
+            client.complete(MESSAGES, retries=3)
+        assert stub.request_count == 3
+        assert client.delays == [0.01, 0.01]
+    assert _counter("llm_failures_total", mode="complete") == 1
+
+
+def test_backoff_is_capped_and_jittered():
+    client = LLMClient(api_url="http://127.0.0.1:9", api_token="stub", backoff_base=1.0, backoff_max=5.0)
+    assert client.backoff_delay(0, retry_after=60) == 5.0
+    random.seed(1)
+    delays = [client.backoff_delay(attempt) for attempt in range(6)]
+    assert all(0 <= d <= min(5.0, 2 ** a) for a, d in enumerate(delays))
+    assert len(set(delays)) == len(delays)
+
+
+def test_stream_retries_and_holds_its_slot_until_closed(stub):
+    client = _client(stub, max_concurrency=1)
+    assert client.complete(MESSAGES) == REPLY  # next request is rate limited
+
+    stream = client.stream(MESSAGES)
+    first = next(stream)
+    assert client.delays == [0.05]
+    # The body is still being read, so the only slot is taken
+    assert not client._sync_limit.acquire(blocking=False)
+    assert first + "".join(stream) == REPLY
+    assert client._sync_limit.acquire(blocking=False)
+    client._sync_limit.release()
+
+    stream = client.stream(MESSAGES)
+    next(stream)
+    stream.close()
+    assert client._sync_limit.acquire(blocking=False)
+    client._sync_limit.release()
+
+
+def test_stream_releases_its_slot_when_retries_run_out():
+    with StubLLMServer(rate_limit_every=1, retry_after=0.01) as stub:
+        client = _client(stub, max_concurrency=1)
+        with pytest.raises(RuntimeError):
+            list(client.stream(MESSAGES, retries=2))
+        assert client._sync_limit.acquire(blocking=False)
+        client._sync_limit.release()
+
+
+def test_acomplete_retries(stub):
+    client = _client(stub, max_concurrency=2)
+
+    async def run():
+        return [await client.acomplete(MESSAGES) for _ in range(3)]
+
+    assert asyncio.run(run()) == [REPLY] * 3
+    assert stub.rate_limited_count == 2 and client.delays == [0.05, 0.05]
+    client.close()
@@ -0,0 +1,82 @@
+import json
+
+from modules.metrics import LATENCY_BUCKETS, MetricsRegistry
+
+PREFIX = "cloud_cost_optimizer_"
+
+
+def _lines(registry):
+    return registry.to_prometheus().splitlines()
+
+
+def test_counters_and_gauges():
+    registry = MetricsRegistry()
+    registry.inc("llm_retries_total", mode="complete")
+    registry.inc("llm_retries_total", 2, mode="complete")
+    registry.inc("cache_hits")  # missing the _total suffix
+    registry.set_gauge("analyzer_records_per_second", 1500)
+
+    lines = _lines(registry)
+    assert f"# TYPE {PREFIX}llm_retries_total counter" in lines
+    assert f'{PREFIX}llm_retries_total{{mode="complete"}} 3' in lines
+    assert f"# TYPE {PREFIX}cache_hits_total counter" in lines
+    assert f"{PREFIX}cache_hits_total 1" in lines
+    assert f"# TYPE {PREFIX}analyzer_records_per_second gauge" in lines
+    assert f"{PREFIX}analyzer_records_per_second 1500" in lines
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.inc("errors_total", reason='bad "quote"\\path\nnext')
+    assert f'{PREFIX}errors_total{{reason="bad \\"quote\\"\\\\path\\nnext"}} 1' in _lines(registry)
+
+
+def test_seconds_are_histograms():
+    registry = MetricsRegistry()
+    for value in (0.003, 0.2, 0.2, 7.0, 500.0):
+        registry.observe("llm_request_seconds", value, status="200")
+
+    lines = _lines(registry)
+    name = f"{PREFIX}llm_request_seconds"
+    assert f"# TYPE {name} histogram" in lines
+    buckets = [line for line in lines if line.startswith(f"{name}_bucket")]
+    assert len(buckets) == len(LATENCY_BUCKETS) + 1
+    assert f'{name}_bucket{{le="0.005",status="200"}} 1' in lines
+    assert f'{name}_bucket{{le="0.25",status="200"}} 3' in lines
+    assert f'{name}_bucket{{le="10.0",status="200"}} 4' in lines
+    assert f'{name}_bucket{{le="120.0",status="200"}} 4' in lines
+    assert buckets[-1] == f'{name}_bucket{{le="+Inf",status="200"}} 5'
+    counts = [int(line.rsplit(" ", 1)[1]) for line in buckets]
+    assert counts == sorted(counts)
+    assert f'{name}_sum{{status="200"}} 507.403' in lines
+    assert f'{name}_count{{status="200"}} 5' in lines
+
+
+def test_other_observations_are_summaries():
+    registry = MetricsRegistry()
+    for value in range(1, 101):
+        registry.observe("prompt_tokens_estimated", value)
+
+    lines = _lines(registry)
+    name = f"{PREFIX}prompt_tokens_estimated"
+    assert f"# TYPE {name} summary" in lines
+    assert f'{name}{{quantile="0.5"}} 51' in lines
+    assert f"{name}_count 100" in lines
+    assert not any("_bucket" in line for line in lines)
+
+
+def test_snapshot_is_json_and_reset_clears_it(tmp_path):
+    registry = MetricsRegistry()
+    with registry.timer("pipeline_stage_seconds", stage="analyze"):
+        pass
+    registry.inc("pipeline_stages_total", stage="analyze", result="executed")
+
+    path = tmp_path / "metrics.json"
+    registry.write_json(str(path))
+    snapshot = json.loads(path.read_text(encoding="utf-8"))
+    (summary,) = snapshot["summaries"]
+    assert summary["labels"] == {"stage": "analyze"} and summary["count"] == 1
+    assert summary["buckets"][0] == [LATENCY_BUCKETS[0], 1]
+
+    registry.reset()
+    assert registry.to_prometheus() == "\n"
@@ -0,0 +1,59 @@
+import json
+import os
+
+import pytest
+
+from modules.portfolio import REPORT_FILE, discover_projects, run_portfolio
+
+
+def _project(root, path, name, budget):
+    directory = root / path
+    directory.mkdir(parents=True)
+    profile = {"name": name, "budget_inr_per_month": budget, "tech_stack": {"hosting": "AWS"}}
+    (directory / "project_profile.json").write_text(json.dumps(profile), encoding="utf-8")
+
+
+def test_manifest_entries_with_the_same_basename_get_separate_outputs(tmp_path, monkeypatch):
+    monkeypatch.setenv("BILLING_SOURCE", "local")
+    monkeypatch.setenv("RECOMMENDATION_SOURCE", "rules")
+    _project(tmp_path, "team-a/api", "Team A API", 5000)
+    _project(tmp_path, "team-b/api", "Team B API", 9000)
+    _project(tmp_path, "web", "Web", 3000)
+    manifest = tmp_path / "projects.json"
+    manifest.write_text(json.dumps(["team-a/api", "team-b/api", {"path": "web"}]), encoding="utf-8")
+
+    assert [p["name"] for p in discover_projects(str(manifest))] == ["api-1", "api-2", "web"]
+
+    out = tmp_path / "out"
+    portfolio = run_portfolio(str(manifest), str(out), workers=3, progress=lambda message: None)
+    assert sorted(os.listdir(out)) == ["api-1", "api-2", "portfolio_report.json", "web"]
+    names = {}
+    for name in ("api-1", "api-2"):
+        with open(out / name / REPORT_FILE, encoding="utf-8") as f:
+            names[name] = json.load(f)["project_name"]
+    assert names == {"api-1": "Team A API", "api-2": "Team B API"}
+    assert portfolio["succeeded"] == 3
+
+
+def _manifest(tmp_path, entries):
+    manifest = tmp_path / "projects.json"
+    manifest.write_text(json.dumps(entries), encoding="utf-8")
+    return str(manifest)
+
+
+def test_renamed_entries_do_not_collide_with_explicit_names(tmp_path):
+    manifest = _manifest(tmp_path, ["team-a/api", {"name": "api-2", "path": "legacy"}, "team-b/api",
+                                    {"name": "api-3-2", "path": "other"}, "team-c/api"])
+    names = [p["name"] for p in discover_projects(manifest)]
+    assert names == ["api-1", "api-2", "api-3", "api-3-2", "api-5"]
+    assert len(set(names)) == len(names)
+
+    manifest = _manifest(tmp_path, ["x/api", "y/api", {"name": "api-2", "path": "z"}])
+    names = [p["name"] for p in discover_projects(manifest)]
+    assert names == ["api-1", "api-2-2", "api-2"]
+
+
+def test_names_that_leave_the_output_directory_are_rejected(tmp_path):
+    for name in ("../escape", "a/b", "..", "a\\b"):
+        with pytest.raises(ValueError, match="Invalid project name"):
+            discover_projects(_manifest(tmp_path, [{"name": name, "path": "web"}]))
@@ -0,0 +1,31 @@
+import json
+
+from modules.prompt_budget import CostsField, build_prompt, describe_compaction, log_compaction
+
+
+def test_costs_level_zero_is_lossless():
+    costs = {"S3": 12.345, "EC2": 1000.5, "Lambda": 0.4, "Credits": -20.0}
+    rendered = json.loads(CostsField(costs).render(0))
+    assert rendered == costs
+    assert list(rendered) == ["EC2", "S3", "Lambda", "Credits"]
+
+    folded = json.loads(CostsField(costs).render(1))
+    assert folded["EC2"] == 1000 and "Other (2 services)" in folded
+
+
+def test_small_prompt_is_sent_in_full(capsys):
+    costs = {f"svc-{i}": 100.25 + i for i in range(10)}
+    prompt, report = build_prompt("Costs: {costs}", {"costs": CostsField(costs)})
+    assert json.loads(prompt[len("Costs: "):]) == costs
+    assert describe_compaction(report) is None
+    log_compaction(report)
+    assert capsys.readouterr().out == ""
+
+
+def test_compaction_is_reported(capsys):
+    costs = {f"service-{i:04d}": 1000 / (i + 1) for i in range(500)}
+    _, report = build_prompt("Costs: {costs}", {"costs": CostsField(costs)}, budget=300, name="recs")
+    assert report["levels"]["costs"] > 0 and report["within_budget"]
+    log_compaction(report)
+    out = capsys.readouterr().out
+    assert "Prompt 'recs' shortened to fit 300 tokens" in out and "costs" in out
@@ -0,0 +1,36 @@
+from modules.recommendation_rules import RuleContext, build_resource_index, idle_resources_rule
+
+PROFILE = {"name": "Shop", "budget_inr_per_month": 10000, "tech_stack": {"hosting": "AWS"}}
+SUMMARY = {"budget": 10000, "total_monthly_cost": 4000, "service_costs": {"EC2": 4000},
+           "monthly_costs": {"2025-01": 2000, "2025-02": 2000}}
+
+
+def _row(resource_id, month, cost, usage):
+    return {"month": month, "service": "EC2", "resource_id": resource_id, "region": "ap-south-1",
+            "usage_quantity": usage, "unit": "hour", "cost_inr": cost}
+
+
+def _idle(records):
+    ctx = RuleContext(PROFILE, SUMMARY, build_resource_index(records))
+    recommendations = idle_resources_rule(ctx, "EC2", "compute", 4000)
+    return recommendations[0]["description"] if recommendations else ""
+
+
+def test_missing_usage_is_not_idle():
+    records = [_row("i-1", "2025-01", 1000, None), _row("i-1", "2025-02", 1000, None),
+               _row("i-2", "2025-02", 1000, "")]
+    assert _idle(records) == ""
+
+
+def test_usage_that_dropped_to_zero_is_idle():
+    records = [_row("i-1", "2025-01", 1000, 720), _row("i-1", "2025-02", 1000, 0),
+               _row("i-2", "2025-01", 1000, 720), _row("i-2", "2025-02", 1000, 700)]
+    description = _idle(records)
+    assert "i-1" in description and "i-2" not in description
+
+
+def test_collapsed_usage_is_idle_only_while_cost_stays():
+    records = [_row("i-1", "2025-01", 1000, 720), _row("i-1", "2025-02", 900, 20),
+               _row("i-2", "2025-01", 1000, 720), _row("i-2", "2025-02", 100, 20)]
+    description = _idle(records)
+    assert "i-1" in description and "i-2" not in description
@@ -0,0 +1,26 @@
+from modules.cost_analyzer import analyze_costs
+from modules.records import validate_billing
+
+RECORDS = [
+    {"month": "2025-01", "service": "EC2", "usage_quantity": 720, "unit": "hours", "cost_inr": 500},
+    {"month": "2025-01", "service": "RDS", "usage_quantity": "720 hours", "unit": "hours", "cost_inr": 1200},
+    {"month": "2025-01", "service": "S3", "usage_quantity": "N/A", "unit": "GB", "cost_inr": "1,000"},
+]
+
+
+def test_bad_usage_quantity_keeps_the_cost():
+    batch = validate_billing(RECORDS)
+    assert len(batch) == 3
+    assert list(batch.columns["usage_quantity"]) == [720, 0, 0]
+    assert [i for i, _ in batch.rejected] == [1, 2]
+    assert all("usage_quantity" in reason and "set to 0" in reason for _, reason in batch.rejected)
+
+    analysis = analyze_costs({"budget_inr_per_month": 3000}, RECORDS)
+    assert analysis["total_monthly_cost"] == 2700
+
+
+def test_bad_cost_drops_the_row():
+    batch = validate_billing(RECORDS + [{"service": "EBS", "usage_quantity": 5, "cost_inr": "free"}])
+    assert len(batch) == 3
+    assert batch.rejected[0] == (3, "invalid cost_inr: 'free'")
+    assert [r["service"] for r in batch.to_json()] == ["EC2", "RDS", "S3"]
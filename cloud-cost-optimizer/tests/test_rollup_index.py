@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+from modules.billing_store import BillingStore
+from modules.cost_analyzer import ALL_DIMENSIONS, CostAggregator
+from modules.rollup_index import INDEX_FILE, RollupIndex
+from modules.synthetic_billing import generate_local_billing
+
+PROFILE = {"name": "Shop", "budget_inr_per_month": 30000,
+           "tech_stack": {"hosting": "AWS", "database": "PostgreSQL", "cache": "Redis"}}
+RECORDS = generate_local_billing(PROFILE, months=3, resources=12, region_spread=0.5)
+FIRST = [r for r in RECORDS if r["month"] != "2025-03"]
+SECOND = [r for r in RECORDS if r["month"] == "2025-03"]
+
+
+def _aggregate(records):
+    aggregator = CostAggregator(ALL_DIMENSIONS)
+    aggregator.update(records)
+    return aggregator
+
+
+def _assert_matches(index, records):
+    aggregator = _aggregate(records)
+    for dimension in ("service", "region", "resource", "month"):
+        assert index.query(dimension) == pytest.approx(aggregator.costs_by(dimension))
+    assert index.query(("service", "month")) == pytest.approx(aggregator.costs_by("service", "month"))
+    assert index.total() == pytest.approx(aggregator.total_cost)
+    assert index.total(measure="records") == aggregator.record_count
+
+    by_resource = aggregator.costs_by("service", "resource")
+    for service in aggregator.service_costs:
+        costs = {resource: cost for (s, resource), cost in by_resource.items() if s == service}
+        assert index.query("resource", where={"service": service}) == pytest.approx(costs)
+        top = sorted(costs.items(), key=lambda item: item[1], reverse=True)[:2]
+        got = index.top("resource", 2, per="service")[service]
+        assert list(got) == [resource for resource, _ in top]
+        assert list(got.values()) == pytest.approx([cost for _, cost in top])
+
+
+def test_queries_match_the_aggregator():
+    assert FIRST and SECOND
+    index = RollupIndex.from_billing(RECORDS)
+    _assert_matches(index, RECORDS)
+
+    services = sorted(index.values("service"))[:2]
+    expected = {month: sum(r["cost_inr"] for r in RECORDS
+                           if r["month"] == month and r["service"] in services)
+                for month in index.values("month")}
+    assert index.query("month", where={"service": services}) == pytest.approx(expected)
+    usage = sum(r["usage_quantity"] for r in RECORDS if r["month"] == "2025-02")
+    assert index.total(where={"month": "2025-02"}, measure="usage") == pytest.approx(usage)
+
+    with pytest.raises(ValueError):
+        index.query("zone")
+
+
+def test_top_per_with_a_filter():
+    index = RollupIndex.from_billing(RECORDS)
+    top = index.top("resource", 1, per="service", where={"month": "2025-01"})
+    january = _aggregate([r for r in RECORDS if r["month"] == "2025-01"]).costs_by("service", "resource")
+    for service, resources in top.items():
+        costs = {res: cost for (s, res), cost in january.items() if s == service}
+        assert list(resources) == [max(costs, key=costs.get)]
+
+
+def test_update_merges_into_materialized_views():
+    index = RollupIndex.from_billing(FIRST)
+    index.query("region", where={"service": "EC2"})  # materialize a non-default view
+    index.update(SECOND)
+    _assert_matches(index, RECORDS)
+    fresh = RollupIndex.from_billing(RECORDS)
+    assert index.query("region", where={"service": "EC2"}) == \
+        pytest.approx(fresh.query("region", where={"service": "EC2"}))
+
+
+def test_for_store_round_trip(tmp_path):
+    store = BillingStore(str(tmp_path / "store"))
+    store.append([FIRST])
+    first = RollupIndex.for_store(store)
+    assert os.path.exists(os.path.join(store.path, INDEX_FILE))
+    _assert_matches(first, FIRST)
+
+    store.append([SECOND])
+    updated = RollupIndex.for_store(BillingStore(store.path))
+    assert updated.segments[:len(first.segments)] == first.segments
+    assert len(updated.segments) == len(store.manifest["segments"])
+    _assert_matches(updated, RECORDS)
+    _assert_matches(RollupIndex.load(os.path.join(store.path, INDEX_FILE)), RECORDS)
+
+    # Dropping a month rebuilds from the remaining segments
+    store = BillingStore(store.path)
+    store.drop_month("2025-03")
+    _assert_matches(RollupIndex.for_store(store), FIRST)
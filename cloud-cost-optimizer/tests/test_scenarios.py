@@ -0,0 +1,109 @@
+import random
+from itertools import combinations
+
+import pytest
+
+from modules.records import LEVELS
+from modules.scenarios import EFFORT_POINTS, REPLACEMENT_TYPES, plan_scenarios
+
+
+def _rec(service, savings, rec_type="right_sizing", effort="low", risk="low"):
+    return {"title": f"{rec_type} {service}", "service": service, "potential_savings": savings,
+            "recommendation_type": rec_type, "implementation_effort": effort, "risk_level": risk}
+
+
+def _group(rec):
+    rec_type = rec["recommendation_type"]
+    return rec["service"], "replace" if rec_type in REPLACEMENT_TYPES else rec_type
+
+
+def test_one_recommendation_per_exclusive_group_and_replacement():
+    recommendations = [
+        _rec("EC2", 300), _rec("EC2", 500),                      # same type
+        _rec("EC2", 200, "idle_resources"),
+        _rec("EC2", 400, "open_source"), _rec("EC2", 450, "alternative_provider"),  # both replace EC2
+    ]
+    scenarios = plan_scenarios(recommendations, {"EC2": 1000})
+    assert scenarios
+    for s in scenarios:
+        groups = [_group(recommendations[i]) for i in s["recommendations"]]
+        assert len(groups) == len(set(groups))
+    best = scenarios[-1]
+    assert best["recommendations"] == [1, 2, 4]
+    assert best["savings"] == round(1000 - 1000 * 0.5 * 0.8 * 0.55, 2)
+
+
+def test_savings_compound_and_never_exceed_the_service_cost():
+    recommendations = [_rec("EC2", 600, t) for t in ("right_sizing", "idle_resources", "free_tier")]
+    recommendations.append(_rec("S3", 500, "storage_tiering"))  # more than S3 costs
+    scenarios = plan_scenarios(recommendations, {"EC2": 1000, "S3": 100})
+    best = scenarios[-1]
+    assert best["recommendations"] == [0, 1, 2, 3]
+    assert best["savings"] == pytest.approx(1000 * (1 - 0.4 ** 3) + 100, abs=0.01)
+    assert best["naive_savings"] == 2300
+
+
+def test_pareto_front_across_risk_levels():
+    recommendations = [
+        _rec("EC2", 100, risk="low"),
+        _rec("RDS", 50, risk="high"),
+        _rec("S3", 80, "storage_tiering", effort="medium", risk="medium"),
+        _rec("EBS", 90, risk="high"),  # saves less than the low-risk EC2 option at the same effort
+    ]
+    scenarios = plan_scenarios(recommendations, {"EC2": 1000, "RDS": 1000, "S3": 1000, "EBS": 1000})
+    assert [(s["effort"], s["risk_level"], s["recommendations"]) for s in scenarios] == [
+        (1, "low", [0]),
+        (2, "high", [0, 3]),
+        (3, "medium", [0, 2]),
+        (3, "high", [0, 1, 3]),
+        (4, "high", [0, 2, 3]),
+        (5, "high", [0, 1, 2, 3]),
+    ]
+    for a in scenarios:
+        for b in scenarios:
+            if a is not b:
+                dominated = (b["effort"] <= a["effort"]
+                             and LEVELS.index(b["risk_level"]) <= LEVELS.index(a["risk_level"])
+                             and b["savings"] >= a["savings"])
+                assert not dominated, (a, b)
+
+    low_only = plan_scenarios(recommendations, {"EC2": 1000, "RDS": 1000, "S3": 1000, "EBS": 1000},
+                              max_risk="low")
+    assert [s["recommendations"] for s in low_only] == [[0]]
+
+
+def test_max_effort_limits_every_scenario():
+    recommendations = [_rec(f"svc-{i}", 100 + i, effort=effort)
+                       for i, effort in enumerate(["low", "medium", "high", "high"])]
+    costs = {f"svc-{i}": 1000 for i in range(4)}
+    scenarios = plan_scenarios(recommendations, costs, max_effort=4)
+    assert max(s["effort"] for s in scenarios) == 4
+    assert scenarios[-1]["recommendations"] == [0, 3]  # 1 + 3 effort points
+    assert all(s["effort"] <= 4 for s in scenarios)
+    assert plan_scenarios(recommendations, costs, max_effort=0) == []
+
+
+def test_matches_brute_force_on_a_small_set():
+    rng = random.Random(3)
+    costs = {"EC2": 2000.0, "RDS": 900.0, "S3": 300.0}
+    types = ["right_sizing", "idle_resources", "open_source", "alternative_provider"]
+    recommendations = [_rec(rng.choice(list(costs)), round(rng.uniform(20, 600), 2), rng.choice(types),
+                            rng.choice(LEVELS), rng.choice(LEVELS)) for _ in range(9)]
+
+    best = {}
+    for size in range(1, len(recommendations) + 1):
+        for chosen in combinations(range(len(recommendations)), size):
+            recs = [recommendations[i] for i in chosen]
+            if len({_group(r) for r in recs}) < len(recs):
+                continue
+            remaining = dict(costs)
+            for r in recs:
+                remaining[r["service"]] *= 1 - min(r["potential_savings"] / costs[r["service"]], 1)
+            key = (sum(EFFORT_POINTS[r["implementation_effort"]] for r in recs),
+                   max(LEVELS.index(r["risk_level"]) for r in recs))
+            best[key] = max(best.get(key, 0), sum(costs.values()) - sum(remaining.values()))
+
+    for s in plan_scenarios(recommendations, costs):
+        risk = LEVELS.index(s["risk_level"])
+        expected = max(v for (e, r), v in best.items() if e <= s["effort"] and r <= risk)
+        assert s["savings"] == pytest.approx(expected, abs=0.01)
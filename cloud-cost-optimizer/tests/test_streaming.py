@@ -0,0 +1,52 @@
+import pytest
+
+from modules import llm_client
+from modules.billing_generator import generate_synthetic_billing, stream_synthetic_billing
+from modules.cost_analyzer import analyze_costs
+from modules.llm_cache import LLMCache
+from modules.llm_offline import OfflineLLM
+from modules.recommendation_engine import generate_recommendations, stream_recommendations
+
+PROFILE = {"name": "Shop", "budget_inr_per_month": 20000,
+           "tech_stack": {"frontend": "React", "database": "PostgreSQL", "hosting": "AWS"}}
+
+
+@pytest.fixture(params=[0.0, 1.0], ids=["clean", "malformed"])
+def offline(request, monkeypatch):
+    monkeypatch.setattr(llm_client, "get_cache", lambda: LLMCache(enabled=False))
+    monkeypatch.setattr(llm_client, "_default_client",
+                        OfflineLLM(malformed_rate=request.param, chunk_size=7))
+
+
+def test_streamed_billing_matches_the_full_reply(offline):
+    streamed = list(stream_synthetic_billing(PROFILE, source="llm"))
+    assert streamed and streamed == generate_synthetic_billing(PROFILE, source="llm")
+
+
+def test_streamed_recommendations_match_the_full_reply(offline):
+    billing = generate_synthetic_billing(PROFILE, source="llm")
+    analysis = analyze_costs(PROFILE, billing)
+    for source in ("llm", "hybrid"):
+        streamed = list(stream_recommendations(PROFILE, analysis, billing, source=source))
+        assert streamed
+        assert streamed == generate_recommendations(PROFILE, analysis, billing, source=source)
+
+
+def test_streamed_billing_stage_validates_once(monkeypatch, capsys):
+    import main
+    from modules import billing_generator
+    from modules.metrics import get_metrics
+    from modules.records import validate_billing
+
+    rows = [{"service": "EC2", "cost_inr": "1,200"}, {"service": "S3", "cost_inr": "n/a"},
+            {"service": "RDS", "cost_inr": 300}]
+    monkeypatch.setattr(billing_generator, "stream_synthetic_billing", lambda profile: iter(rows))
+    get_metrics().reset()
+
+    # The pipeline validates the stage's output with validate_billing as its loader
+    batch = validate_billing(main.stream_billing_stage(PROFILE))
+    assert list(batch.columns["cost_inr"]) == [1200, 300]
+    assert capsys.readouterr().out.count("Dropped 1 invalid billing records") == 1
+    counts = {dict(c["labels"])["result"]: c["value"] for c in get_metrics().snapshot()["counters"]
+              if c["name"] == "billing_records_total"}
+    assert counts == {"valid": 2, "rejected": 1}
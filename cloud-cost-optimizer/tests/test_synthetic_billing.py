@@ -0,0 +1,60 @@
+import csv
+
+from modules.pipeline import Pipeline, default_stages
+from modules.synthetic_billing import generate_local_billing, iter_local_billing_batches, write_billing_csv
+
+PROFILE = {"name": "Shop", "budget_inr_per_month": 20000, "tech_stack": {"hosting": "AWS", "db": "Postgres"}}
+
+
+def test_generator_is_deterministic_and_rounded_on_write(tmp_path):
+    options = dict(months=2, resources=20, line_items_per_month=3)
+    batches = list(iter_local_billing_batches(PROFILE, **options))
+    assert batches == list(iter_local_billing_batches(PROFILE, **options))
+
+    records = generate_local_billing(PROFILE, **options)
+    assert all(r["cost_inr"] == round(r["cost_inr"], 2) for r in records)
+    assert all(r["usage_quantity"] == round(r["usage_quantity"], 3) for r in records)
+    total = sum(sum(b["cost_inr"]) for b in batches)
+    assert abs(sum(r["cost_inr"] for r in records) - total) < len(records) * 0.005
+
+    path = str(tmp_path / "billing.csv")
+    assert write_billing_csv(path, iter_local_billing_batches(PROFILE, **options)) == len(records)
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [float(r["cost_inr"]) for r in rows] == [r["cost_inr"] for r in records]
+
+
+def test_local_billing_is_regenerated_after_a_budget_change(tmp_path, monkeypatch):
+    monkeypatch.setenv("BILLING_SOURCE", "local")
+    stages = default_stages()[1:2]
+
+    first = Pipeline(stages, workdir=str(tmp_path)).run({"profile": PROFILE})
+    again = Pipeline(stages, workdir=str(tmp_path))
+    again.run({"profile": PROFILE})
+    assert again.skipped == ["billing"]
+
+    raised = Pipeline(stages, workdir=str(tmp_path))
+    values = raised.run({"profile": dict(PROFILE, budget_inr_per_month=40000)})
+    assert raised.executed == ["billing"]
+    total = sum(values["billing"].columns["cost_inr"])
+    assert total > 1.5 * sum(first["billing"].columns["cost_inr"])
+
+
+def test_store_and_csv_outputs_have_the_same_costs(tmp_path):
+    import json
+
+    import main
+    from modules.billing_store import BillingStore
+
+    profile = tmp_path / "profile.json"
+    profile.write_text(json.dumps(PROFILE), encoding="utf-8")
+    csv_path, store_path = tmp_path / "billing.csv", tmp_path / "store"
+    common = ["generate-billing", "--profile", str(profile), "--months", "2", "--resources", "15"]
+    main.generate_billing_flow(main.parse_args(common + ["--out", str(csv_path)]))
+    main.generate_billing_flow(main.parse_args(common + ["--store", str(store_path)]))
+
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    stored = [c for batch in BillingStore(str(store_path)).iter_batches(columns=["cost_inr"])
+              for c in batch["cost_inr"]]
+    assert stored == [float(r["cost_inr"]) for r in rows]